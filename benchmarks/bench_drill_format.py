@@ -0,0 +1,73 @@
+"""
+Benchmark formattazione fori: riga per riga (f-string per foro, come
+prima) contro add_drilling e add_drilling_arrays (formattazione in blocco)
+su un gruppo di fori reggi-ripiano.
+
+Uso:
+    python benchmarks/bench_drill_format.py [numero_fori]
+"""
+
+import os
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from postprocessor.xilog_generator import XilogGenerator, np  # noqa: E402
+from tlg_parser.tlg_library import TLGLibrary  # noqa: E402
+
+
+def per_hole(holes, origin):
+    """Ciclo originale: lookup nei dict e f-string per ogni foro."""
+    ox, oy = origin
+    lines = []
+    for hole in holes:
+        x, y = hole['x'] + ox, hole['y'] + oy
+        z = hole.get('z', 0)
+        depth = hole['depth']
+        lines.append(f'  X={x:.2f} Y={y:.2f} Z={z:.2f} P={depth:.2f}')
+    return lines
+
+
+def timed(run):
+    t0 = time.perf_counter()
+    result = run()
+    return time.perf_counter() - t0, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    # Colonne di fori a passo 32 su pannelli affiancati
+    xs = [32.0 + 836.0 * (i % 2) + 1000.0 * (i // 1000) for i in range(n)]
+    ys = [100.0 + 32.0 * ((i // 2) % 15) + 0.5 * ((i // 30) % 7) for i in range(n)]
+    holes = [{'x': x, 'y': y, 'diameter': 5.0, 'depth': 12.0} for x, y in zip(xs, ys)]
+    origin = (10.0, 10.0)
+    tlg = TLGLibrary()
+
+    def generator():
+        gen = XilogGenerator(tlg)
+        gen.set_origin(*origin)
+        return gen
+
+    base_time, base = timed(lambda: per_hole(holes, origin))
+    runs = [('add_drilling (dict)', lambda g: g.add_drilling(holes))]
+    runs.append(('add_drilling_arrays list', lambda g: g.add_drilling_arrays(xs, ys, 12.0, 5.0)))
+    runs.append(("add_drilling_arrays array('d')", lambda g: g.add_drilling_arrays(
+        array('d', xs), array('d', ys), 12.0, 5.0)))
+    if np is not None:
+        nx, ny = np.array(xs), np.array(ys)
+        runs.append(('add_drilling_arrays NumPy', lambda g: g.add_drilling_arrays(nx, ny, 12.0, 5.0)))
+
+    print('Fori: {}'.format(n))
+    print('{:32s} {:.3f} s'.format('riga per riga (prima)', base_time))
+    for name, run in runs:
+        gen = generator()
+        elapsed, _ = timed(lambda: run(gen))
+        lines = gen.program_lines[4:-2]
+        print('{:32s} {:.3f} s  (x{:.1f})  {}'.format(
+            name, elapsed, base_time / elapsed, 'identico' if lines == base else 'DIVERSO'))
+
+
+if __name__ == '__main__':
+    main()
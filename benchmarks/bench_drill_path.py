@@ -0,0 +1,52 @@
+"""
+Benchmark ordine fori: percorso in rapido dei programmi per ciclo
+macchina (carico piano) con e senza ottimizzazione, e tempo di calcolo.
+
+Uso:
+    python benchmarks/bench_drill_path.py [numero_mobili]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from furniture_core.bed_layout import layout_bed  # noqa: E402
+from furniture_core.xilog_export import _bed_parts, _panel_operations  # noqa: E402
+from postprocessor.xilog_generator import XilogGenerator  # noqa: E402
+
+
+def run(project):
+    cycles, _ = layout_bed(_bed_parts(project))
+    total = {'percorso_prima': 0.0, 'percorso_dopo': 0.0, 'fori': 0}
+    t0 = time.perf_counter()
+    for cycle in cycles:
+        gen = XilogGenerator(optimize_path=True)
+        for placed in cycle.placements:
+            name, params = placed.part.data
+            gen.set_origin(placed.x, placed.y)
+            _panel_operations(gen, name, (placed.part.length, placed.part.width, placed.part.thickness), params)
+        report = gen.travel_report()
+        for key in total:
+            total[key] += report[key]
+    return time.perf_counter() - t0, total, len(cycles)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    project = [
+        {'larghezza': w, 'num_ante': 2, 'num_ripiani': 3, 'spinatura': True}
+        for w in ([40, 60, 80, 90, 100, 120] * n)[:n]
+    ]
+    elapsed, total, cycles = run(project)
+    print('Mobili: {}  cicli: {}  fori: {}'.format(n, cycles, total['fori']))
+    print('percorso in ordine di input : {:10.0f} mm'.format(total['percorso_prima']))
+    print('percorso ottimizzato       : {:10.0f} mm  (-{:.1f}%)  calcolo {:.3f} s'.format(
+        total['percorso_dopo'],
+        100.0 * (1 - total['percorso_dopo'] / total['percorso_prima']),
+        elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Benchmark piani di taglio a ghigliottina: stesso lavoro di
+bench_nesting, confronto tra tolleranze di resa (lastre, schemi,
+pacchi e cicli sega).
+
+Uso:
+    python benchmarks/bench_guillotine.py [numero_mobili]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_nesting import job  # noqa: E402
+from furniture_core.guillotine import optimize_cutting  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 220
+    rows = job(n)
+    print('Pezzi: {}'.format(len(rows)))
+    for tolerance in (0.0, 0.03, 0.05):
+        t0 = time.perf_counter()
+        plans = optimize_cutting(rows, yield_tolerance=tolerance)
+        elapsed = time.perf_counter() - t0
+        print('tolleranza {:4.2f}: {:6.3f} s  lastre {:4d}  schemi {:4d}  pacchi {:4d}  cicli {:5d}'.format(
+            tolerance, elapsed,
+            sum(p.sheets for p in plans), sum(len(p.patterns) for p in plans),
+            sum(p.books for p in plans), sum(p.saw_cycles for p in plans)))
+
+
+if __name__ == '__main__':
+    main()
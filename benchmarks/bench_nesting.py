@@ -0,0 +1,56 @@
+"""
+Benchmark nesting lista taglio: lavoro da ~2000 pezzi su più gruppi
+materiale/spessore, sequenziale vs pool di processi, con resa media.
+
+Uso:
+    python benchmarks/bench_nesting.py [numero_mobili]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from furniture_core.assembly_spec import iter_panel_specs  # noqa: E402
+from furniture_core.cutlist import iter_project_cutlist  # noqa: E402
+from furniture_core.nesting import nest_cutlist  # noqa: E402
+
+
+def job(n_cabinets):
+    rnd = random.Random(0)
+    project = [
+        {
+            'larghezza': rnd.choice([40, 45, 50, 60, 80, 90, 100, 120]),
+            'num_ante': rnd.choice([0, 1, 2]),
+            'num_ripiani': rnd.choice([1, 2, 3]),
+            'spessore_pannello': rnd.choice([1.8, 1.8, 2.5]),
+        }
+        for _ in range(n_cabinets)
+    ]
+    rows = list(iter_project_cutlist(iter_panel_specs(project)))
+    for row in rows:
+        if row['nome'].startswith('Anta'):
+            row['materiale'] = 'Rovere'
+            row['venatura'] = 'L'
+    return rows
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 220
+    rows = job(n)
+    print('Pezzi: {}  CPU: {}'.format(len(rows), os.cpu_count()))
+    for label, processes in (('sequenziale', 1), ('pool', None)):
+        t0 = time.perf_counter()
+        results = nest_cutlist(rows, processes=processes)
+        elapsed = time.perf_counter() - t0
+        sheets = sum(len(r.sheets) for r in results)
+        print('{:<12}: {:6.2f} s  lastre {:4d}'.format(label, elapsed, sheets))
+    for r in results:
+        print('  {:<8} {:4.1f} mm  lastre {:4d}  resa {:5.1f}%'.format(
+            r.materiale, r.spessore * 10, len(r.sheets), 100 * r.yield_ratio))
+
+
+if __name__ == '__main__':
+    main()
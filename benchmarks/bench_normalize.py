@@ -0,0 +1,72 @@
+"""
+Benchmark normalize_params: implementazione storica (deepcopy dei default +
+tre tuple di chiavi a ogni chiamata) vs normalizzatore precompilato e
+normalize_many su lotto colonnare.
+
+Uso:
+    python benchmarks/bench_normalize.py [numero_chiamate]
+"""
+
+import os
+import sys
+import time
+from copy import deepcopy
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from furniture_core import models  # noqa: E402
+from furniture_core.models import normalize_many, normalize_params  # noqa: E402
+
+
+def legacy_normalize(raw):
+    """Copia della versione precedente (riferimento del benchmark)."""
+    tipo = raw.get('tipo_mobile', models._BASE_DEFAULTS['tipo_mobile'])
+    params = deepcopy(models._BASE_DEFAULTS)
+    params['tipo_mobile'] = tipo
+    params.update(models._DEFAULTS_BY_TYPE.get(tipo, {}))
+    params.update(raw)
+    params['tipo_mobile'] = tipo
+    for key in ('larghezza', 'altezza', 'profondita', 'spessore_pannello', 'spessore_schienale',
+                'altezza_zoccolo', 'arretramento_schienale', 'groove_offset_cm',
+                'shelf_front_setback', 'spessore_anta'):
+        if key in params and params[key] is not None:
+            params[key] = float(params[key])
+    for key in ('num_ripiani', 'num_ante', 'num_cassetti', 'num_cerniere'):
+        if key in params and params[key] is not None:
+            params[key] = int(params[key])
+    for key in ('sistema_32mm', 'fori_ripiani', 'spinatura', 'con_zoccolo'):
+        if key in params:
+            params[key] = bool(params[key])
+    if params.get('num_ante', 0) > 0 and params.get('num_cerniere', 0) == 0:
+        params['num_cerniere'] = params['num_ante'] * 2
+    return params
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    tipi = models.FURNITURE_TYPES
+    rows = [
+        {'tipo_mobile': tipi[i % len(tipi)], 'larghezza': 40 + i % 80, 'num_ante': i % 3}
+        for i in range(n)
+    ]
+    columns = {key: [row[key] for row in rows] for key in rows[0]}
+
+    legacy, t_legacy = timed(lambda: [legacy_normalize(r) for r in rows])
+    single, t_single = timed(lambda: [normalize_params(r) for r in rows])
+    batch, t_batch = timed(lambda: normalize_many(columns))
+    assert legacy == single == batch
+
+    print('Chiamate: {}'.format(n))
+    for label, t in (('storico', t_legacy), ('precompilato', t_single), ('normalize_many', t_batch)):
+        print('{:<15}: {:7.3f} s  {:6.2f} us/chiamata  {:5.1f}x'.format(
+            label, t, t / n * 1e6, t_legacy / t))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark: build_panels (scalare, un mobile alla volta) vs
+build_panel_specs_batch (colonnare, un solo passaggio) su 10k mobili.
+
+Uso:
+    python benchmarks/bench_panel_batch.py [numero_mobili]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from furniture_core.panel_batch import (  # noqa: E402
+    batch_cabinet_specs,
+    build_panel_specs_batch,
+    np,
+    rows_to_columns,
+)
+from furniture_core.panel_specs import build_panels  # noqa: E402
+
+TIPI = ['Mobile Base', 'Pensile', 'Armadio']
+SCHIENALI = ['A filo dietro', 'Incastrato (scanalatura 10mm)', 'Arretrato custom']
+
+
+def random_cabinets(n, seed=42):
+    """Varianti mobili casuali ma riproducibili."""
+    rnd = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        rows.append({
+            'tipo_mobile': rnd.choice(TIPI),
+            'larghezza': rnd.choice([30.0, 40.0, 45.0, 60.0, 80.0, 90.0, 120.0]),
+            'num_ripiani': rnd.randint(0, 4),
+            'num_ante': rnd.randint(0, 2),
+            'tipo_schienale': rnd.choice(SCHIENALI),
+        })
+    return rows
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rows = random_cabinets(n)
+    columns = rows_to_columns(rows)
+
+    t0 = time.perf_counter()
+    scalar = [build_panels(row) for row in rows]
+    t_scalar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch = build_panel_specs_batch(columns)
+    t_batch = time.perf_counter() - t0
+
+    # Verifica a campione: stessa geometria del percorso scalare
+    for i in range(0, n, max(1, n // 200)):
+        assert batch_cabinet_specs(batch, i) == scalar[i], 'Mismatch mobile {}'.format(i)
+
+    panels = len(batch['cabinet'])
+    print('Mobili: {}  Pannelli: {}  NumPy: {}'.format(n, panels, np is not None))
+    print('Scalare : {:8.3f} s'.format(t_scalar))
+    print('Batch   : {:8.3f} s'.format(t_batch))
+    print('Speedup : {:8.1f}x'.format(t_scalar / t_batch if t_batch else float('inf')))
+
+
+if __name__ == '__main__':
+    main()
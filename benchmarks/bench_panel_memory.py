@@ -0,0 +1,52 @@
+"""
+Benchmark memoria: dict per pannello (formato storico) vs Panel vs PanelTable.
+
+Uso:
+    python benchmarks/bench_panel_memory.py [numero_mobili]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from furniture_core.cutlist import panels_to_cutlist  # noqa: E402
+from furniture_core.panel_specs import build_panels  # noqa: E402
+from furniture_core.panel_table import Panel, PanelTable  # noqa: E402
+
+
+def measure(build):
+    """Restituisce (oggetto, byte allocati) per la funzione di costruzione."""
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    # Valori float distinti per mobile, come in un progetto reale
+    params = [{'larghezza': 40.0 + (i % 800) / 10.0, 'num_ante': 2} for i in range(n)]
+    panels = [p for row in params for p in build_panels(row)]
+
+    dicts, dict_bytes = measure(lambda: [p.as_dict() for p in panels])
+    records, record_bytes = measure(lambda: [Panel._make(p) for p in panels])
+    table, table_bytes = measure(lambda: PanelTable(panels))
+
+    count = len(panels)
+    print('Pannelli: {}'.format(count))
+    print('dict       : {:7.1f} byte/pannello'.format(dict_bytes / count))
+    print('Panel      : {:7.1f} byte/pannello'.format(record_bytes / count))
+    print('PanelTable : {:7.1f} byte/pannello'.format(table_bytes / count))
+
+    for label, source in (('dict', dicts), ('Panel', panels), ('PanelTable', table)):
+        t0 = time.perf_counter()
+        panels_to_cutlist(source)
+        print('cutlist {:<10}: {:.3f} s'.format(label, time.perf_counter() - t0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark parse_description: implementazione storica (sette re.search + scansioni
+di sottostringhe a ogni riga) vs parser a passata unica con cache, su un foglio
+ordine con righe ripetute.
+
+Uso:
+    python benchmarks/bench_parser.py [numero_righe]
+"""
+
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from furniture_core.models import default_params_for_type, normalize_params  # noqa: E402
+from furniture_core.parser_nl import _parse, parse_description, parse_many  # noqa: E402
+
+
+def legacy_parse(description, tipo_mobile='Mobile Base'):
+    """Copia della versione precedente (riferimento del benchmark)."""
+    desc_lower = description.lower()
+    params = default_params_for_type(tipo_mobile)
+    m = re.search(r'(?:larg|l[=:]?\s*)(\d+(?:\.\d+)?)\s*(?:cm)?', desc_lower)
+    if m:
+        params['larghezza'] = float(m.group(1))
+    m = re.search(r'(?:alt|h[=:]?\s*)(\d+(?:\.\d+)?)\s*(?:cm)?', desc_lower)
+    if m:
+        params['altezza'] = float(m.group(1))
+    m = re.search(r'(?:prof|p[=:]?\s*)(\d+(?:\.\d+)?)\s*(?:cm)?', desc_lower)
+    if m:
+        params['profondita'] = float(m.group(1))
+    if 'pensile' in desc_lower or 'sospeso' in desc_lower:
+        params['tipo_mobile'] = 'Pensile'
+        params['con_zoccolo'] = False
+    elif 'armadio' in desc_lower:
+        params['tipo_mobile'] = 'Armadio'
+    elif 'cassetto' in desc_lower:
+        params['tipo_mobile'] = 'Cassetto'
+    elif 'anta' in desc_lower and 'ante' not in desc_lower:
+        params['tipo_mobile'] = 'Anta'
+    if 'pensile' in desc_lower:
+        params.setdefault('altezza', 70.0)
+        params.setdefault('profondita', 35.0)
+    elif 'cucina' in desc_lower or 'base' in desc_lower:
+        params.setdefault('altezza', 90.0)
+        params.setdefault('profondita', 60.0)
+    elif 'armadio' in desc_lower:
+        params.setdefault('altezza', 220.0)
+    m = re.search(r'(\d+)\s*ripian', desc_lower)
+    if m:
+        params['num_ripiani'] = int(m.group(1))
+    m = re.search(r'(\d+)\s*ant', desc_lower)
+    if m:
+        params['num_ante'] = int(m.group(1))
+        params['num_cerniere'] = params['num_ante'] * 2
+    m = re.search(r'(\d+)\s*cassett', desc_lower)
+    if m:
+        params['num_cassetti'] = int(m.group(1))
+    if 'incastr' in desc_lower:
+        params['tipo_schienale'] = 'Incastrato (scanalatura 10mm)'
+    return normalize_params(params)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    templates = (
+        'Mobile base cucina L{} H90 P60 con 2 ante e {} ripiani',
+        'Pensile sospeso larg{} alt70 prof35, {} ripiani, schienale incastrato',
+        'Armadio l={} h=220 p=60 con 3 ante e {} cassetti',
+    )
+    lines = [templates[i % 3].format(40 + (i * 7) % 80, i % 4) for i in range(n)]
+    distinct = len(set(lines))
+
+    legacy, t_legacy = timed(lambda: [legacy_parse(line) for line in lines])
+    single, t_single = timed(lambda: [_parse(line, 'Mobile Base') for line in lines])
+    cached, t_cached = timed(lambda: list(parse_many(lines)))
+    assert legacy == single == cached
+    assert parse_description(lines[0]) == legacy[0]
+
+    print('Righe: {} ({} distinte)'.format(n, distinct))
+    for label, t in (('storico', t_legacy), ('passata unica', t_single), ('parse_many', t_cached)):
+        print('{:<15}: {:7.3f} s  {:8.0f} righe/s  {:5.1f}x'.format(label, t, n / t, t_legacy / t))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark dimensione programmi: programma di progetto completo, in forma
+modale, con sottoprogrammi e senza righe di commento.
+
+Uso:
+    python benchmarks/bench_program_size.py [numero_mobili]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from furniture_core.xilog_export import generate_xilog_for_project  # noqa: E402
+from postprocessor.modal_output import compress_program, verify_compression  # noqa: E402
+from postprocessor.subprograms import expand_subprograms  # noqa: E402
+
+
+def instructions(text):
+    """Righe istruzione (senza commenti e righe vuote)"""
+    return [line for line in text.split('\n') if line.strip() and not line.startswith(';')]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    project = [
+        {'larghezza': w, 'num_ante': 2, 'num_ripiani': 3, 'spinatura': True}
+        for w in ([40, 60, 80, 90, 100, 120] * n)[:n]
+    ]
+    full = generate_xilog_for_project(project)
+    variants = [('completo', lambda: generate_xilog_for_project(project))]
+    variants.append(('modale', lambda: generate_xilog_for_project(project, modal=True)))
+    variants.append(('sottoprogrammi', lambda: generate_xilog_for_project(project, subprograms=True)))
+    variants.append(('modale + sottoprogrammi', lambda: generate_xilog_for_project(
+        project, modal=True, subprograms=True)))
+    variants.append(('  senza righe commento', lambda: compress_program(
+        generate_xilog_for_project(project, subprograms=True), comment_lines=False)))
+
+    print('Mobili: {}'.format(n))
+    for name, build in variants:
+        t0 = time.perf_counter()
+        text = build()
+        elapsed = time.perf_counter() - t0
+        errors = verify_compression(full, expand_subprograms(text))
+        print('{:26s} {:9d} byte  {:6d} istruzioni  {:.3f} s  {}'.format(
+            name, len(text), len(instructions(text)), elapsed, 'OK' if not errors else errors[0]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Benchmark export progetto: un programma per pannello, tempo con 1..N
+processi (libreria utensili caricata una volta per processo).
+
+Uso:
+    python benchmarks/bench_project_export.py [numero_mobili] [processi_max]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from furniture_core.program_export import export_project_programs  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    max_processes = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    project = [
+        {'larghezza': w, 'num_ante': 2, 'num_ripiani': 3, 'spinatura': True}
+        for w in ([40, 60, 80, 90, 100, 120] * n)[:n]
+    ]
+    base = None
+    processes = 1
+    while processes <= max_processes:
+        with tempfile.TemporaryDirectory() as tmp:
+            t0 = time.perf_counter()
+            programs = export_project_programs(project, tmp, processes=processes)
+            elapsed = time.perf_counter() - t0
+        base = base or elapsed
+        print('processi {:2d}: {:5d} programmi  {:.2f} s  (x{:.1f})'.format(
+            processes, len(programs), elapsed, base / elapsed))
+        processes *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark magazzino sfridi: costruzione indice, ricerca "sfrido più
+piccolo che contiene il pezzo" e prelievo, confrontati con una scansione
+lineare della lista.
+
+Uso:
+    python benchmarks/bench_remnants.py [numero_sfridi]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from furniture_core.nesting import Part  # noqa: E402
+from furniture_core.remnants import Remnant, RemnantStore  # noqa: E402
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rnd = random.Random(0)
+    remnants = [
+        Remnant(i, 'Truciolare', 18.0, float(rnd.randint(100, 2800)), float(rnd.randint(100, 2070)))
+        for i in range(1, n + 1)
+    ]
+    queries = [(float(rnd.randint(200, 1500)), float(rnd.randint(200, 900))) for _ in range(2000)]
+
+    t0 = time.perf_counter()
+    store = RemnantStore(remnants)
+    print('Sfridi: {}  costruzione indice: {:6.3f} s'.format(n, time.perf_counter() - t0))
+
+    t0 = time.perf_counter()
+    for l, w in queries:
+        store.find('Truciolare', 18.0, l, w)
+    indexed = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for l, w in queries[:50]:
+        short, long_ = min(l, w), max(l, w)
+        min(
+            (r for r in remnants if min(r.length, r.width) >= short and max(r.length, r.width) >= long_),
+            key=lambda r: (min(r.length, r.width), max(r.length, r.width)),
+            default=None,
+        )
+    linear = (time.perf_counter() - t0) * len(queries) / 50
+    print('ricerca x{}: indice {:6.3f} s  lineare {:6.3f} s  ({:.0f}x)'.format(
+        len(queries), indexed, linear, linear / indexed))
+
+    t0 = time.perf_counter()
+    claimed = sum(
+        1 for l, w in queries if store.claim('Truciolare', 18.0, Part('Pezzo', l, w), kerf=4.0) is not None
+    )
+    print('prelievi: {} in {:6.3f} s  sfridi a magazzino {}'.format(claimed, time.perf_counter() - t0, len(store)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Benchmark memoria scrittura programmi: generate() + scrittura del testo
+contro scrittura in streaming (ProgramSink), picco tracemalloc.
+
+Uso:
+    python benchmarks/bench_stream_writer.py [numero_mobili]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from furniture_core.xilog_export import generate_xilog_for_project, save_xilog_for_project  # noqa: E402
+
+
+def peak(run):
+    """Restituisce (secondi, picco byte) della funzione."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - t0
+    _, top = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, top
+
+
+def write_in_memory(project, path):
+    text = generate_xilog_for_project(project)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    project = [
+        {'larghezza': w, 'num_ante': 2, 'num_ripiani': 3, 'spinatura': True}
+        for w in ([40, 60, 80, 90, 100, 120] * n)[:n]
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'progetto.xilog')
+        mem_time, mem_peak = peak(lambda: write_in_memory(project, path))
+        size = os.path.getsize(path)
+        stream_time, stream_peak = peak(lambda: save_xilog_for_project(project, path))
+        assert os.path.getsize(path) == size
+    print('Mobili: {}  programma: {:.1f} MB'.format(n, size / 1e6))
+    print('in memoria : picco {:7.1f} MB  {:.2f} s'.format(mem_peak / 1e6, mem_time))
+    print('streaming  : picco {:7.1f} MB  {:.2f} s'.format(stream_peak / 1e6, stream_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -214,12 +214,10 @@ class CmdExportCutlist:
         if not path:
             return
 
-        from furniture_core.panel_specs import build_panel_specs
-        from furniture_core.cutlist import export_csv, panels_to_cutlist
+        from furniture_core.cutlist import export_csv
+        from furniture_core.spec_cache import cached_cutlist
 
-        panels = build_panel_specs(params)
-        cutlist = panels_to_cutlist(panels)
-        export_csv(cutlist, path)
+        export_csv(cached_cutlist(params), path)
         App.Console.PrintMessage("FurnitureAI: lista taglio salvata in {}\n".format(path))
 
     def GetClassName(self):
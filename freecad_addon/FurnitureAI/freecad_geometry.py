@@ -17,10 +17,16 @@ from furniture_core.assembly_spec import (
     safe_object_name,
     suggest_module_name,
 )
-from furniture_core.models import normalize_params
+from furniture_core.incremental import SpecDiff
+from furniture_core.models import ensure_params
 from furniture_core.validation import validate_cabinet_params
 
 
+# Proprietà con il nome del pannello nella specifica (la Label può cambiare:
+# FreeCAD la rende unica nel documento e l'utente può rinominarla)
+PANEL_PROPERTY = "FurnitureAI_Panel"
+
+
 def _cm_to_mm(value: float) -> float:
     return value * 10.0
 
@@ -51,20 +57,38 @@ def _create_panel_part(
     panel_name = _unique_name(doc, spec["name"])
     panel_asm = doc.addObject("App::Part", panel_name)
     panel_asm.Label = spec["name"]
+    panel_asm.addProperty("App::PropertyString", PANEL_PROPERTY, "FurnitureAI", "Nome pannello nella specifica")
+    setattr(panel_asm, PANEL_PROPERTY, spec["name"])
+
+    _add_panel_solid(doc, panel_asm, spec)
+    parent.addObject(panel_asm)
+    return panel_asm
+
 
-    sx = _cm_to_mm(spec["size_x"])
-    sy = _cm_to_mm(spec["size_y"])
-    sz = _cm_to_mm(spec["size_z"])
+def _add_panel_solid(doc: App.Document, panel_asm: App.DocumentObject, spec: Dict[str, Any]) -> None:
+    """Aggiunge il solido del pannello al suo sotto-assieme."""
     solid = doc.addObject("Part::Feature", "Solido")
-    solid.Shape = Part.makeBox(sx, sy, sz)
+    _apply_panel_geometry(solid, spec)
+    panel_asm.addObject(solid)
+
+
+def _panel_key(obj: App.DocumentObject) -> str:
+    """Nome pannello nella specifica (Label per assiemi creati senza la proprietà)."""
+    return getattr(obj, PANEL_PROPERTY, "") or obj.Label
+
+
+def _apply_panel_geometry(solid: App.DocumentObject, spec: Dict[str, Any]) -> None:
+    """Imposta forma e posizione del solido pannello (cm → mm)."""
+    solid.Shape = Part.makeBox(
+        _cm_to_mm(spec["size_x"]),
+        _cm_to_mm(spec["size_y"]),
+        _cm_to_mm(spec["size_z"]),
+    )
     solid.Placement.Base = App.Vector(
         _cm_to_mm(spec["pos_x"]),
         _cm_to_mm(spec["pos_y"]),
         _cm_to_mm(spec["pos_z"]),
     )
-    panel_asm.addObject(solid)
-    parent.addObject(panel_asm)
-    return panel_asm
 
 
 def build_cabinet_assembly_in_document(
@@ -78,7 +102,7 @@ def build_cabinet_assembly_in_document(
 
     Restituisce (assieme_mobile, nomi_pannelli).
     """
-    errors = validate_cabinet_params(normalize_params(raw_params))
+    errors = validate_cabinet_params(ensure_params(raw_params))
     if errors:
         raise ValueError("; ".join(errors))
 
@@ -102,6 +126,43 @@ def build_cabinet_assembly_in_document(
     return mobile, created
 
 
+def update_cabinet_assembly_in_document(
+    doc: App.Document,
+    mobile: App.DocumentObject,
+    diff: SpecDiff,
+) -> None:
+    """
+    Applica un diff incrementale (furniture_core.incremental.respec) a un assieme
+    esistente: aggiorna solo i pannelli modificati, senza ricreare il mobile.
+    """
+    panels_by_name = {_panel_key(obj): obj for obj in mobile.Group if obj.TypeId == "App::Part"}
+
+    for spec in diff.removed:
+        panel_asm = panels_by_name.pop(spec["name"], None)
+        if panel_asm is None:
+            continue
+        for child in list(panel_asm.Group):
+            doc.removeObject(child.Name)
+        doc.removeObject(panel_asm.Name)
+
+    for _, spec in diff.modified:
+        panel_asm = panels_by_name.get(spec["name"])
+        if panel_asm is None:
+            _create_panel_part(doc, spec, mobile)
+            continue
+        solids = [o for o in panel_asm.Group if o.TypeId == "Part::Feature"]
+        if solids:
+            _apply_panel_geometry(solids[0], spec)
+        else:
+            # Sotto-assieme senza solido (cancellato a mano): lo ricrea nello stesso Part
+            _add_panel_solid(doc, panel_asm, spec)
+
+    for spec in diff.added:
+        _create_panel_part(doc, spec, mobile)
+
+    doc.recompute()
+
+
 def build_cabinet_in_document(
     doc: App.Document,
     raw_params: Dict[str, Any],
@@ -4,25 +4,48 @@ Logica condivisa FurnitureAI (indipendente da Fusion 360 / FreeCAD).
 
 from .models import (
     FURNITURE_TYPES,
+    CabinetParams,
     default_params_for_type,
+    normalize_many,
     normalize_params,
 )
-from .validation import validate_cabinet_params
-from .parser_nl import parse_description
-from .panel_specs import build_panel_specs
-from .cutlist import panels_to_cutlist, export_csv, export_excel
+from .validation import validate_cabinet_params, validate_many
+from .parser_nl import parse_description, parse_many, parse_project_description
+from .panel_specs import build_panel_specs, build_panels
+from .panel_batch import build_panel_specs_batch
+from .panel_table import Panel, PanelTable
+from .cutlist import (
+    aggregate_cutlist,
+    export_csv,
+    export_csv_stream,
+    export_excel,
+    export_excel_stream,
+    panels_to_cutlist,
+)
 from .xilog_export import generate_xilog_for_cabinet, save_xilog_for_cabinet
 
 __all__ = [
     "FURNITURE_TYPES",
+    "CabinetParams",
     "default_params_for_type",
     "normalize_params",
+    "normalize_many",
     "validate_cabinet_params",
+    "validate_many",
     "parse_description",
+    "parse_many",
+    "parse_project_description",
     "build_panel_specs",
+    "build_panels",
+    "build_panel_specs_batch",
+    "Panel",
+    "PanelTable",
     "panels_to_cutlist",
+    "aggregate_cutlist",
     "export_csv",
+    "export_csv_stream",
     "export_excel",
+    "export_excel_stream",
     "generate_xilog_for_cabinet",
     "save_xilog_for_cabinet",
 ]
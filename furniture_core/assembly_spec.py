@@ -5,10 +5,11 @@ Specifica assieme mobile (logica pura) — allineata a Fusion Component + corpi
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, Mapping, NamedTuple, Optional, Tuple, Union
 
-from .models import normalize_params
-from .panel_specs import build_panel_specs
+from .models import CabinetParams, ensure_params
+from .panel_table import Panel
+from .spec_cache import cached_panel_specs
 
 
 def safe_object_name(label: str) -> str:
@@ -17,16 +18,16 @@ def safe_object_name(label: str) -> str:
     return name or "Mobile"
 
 
-def cabinet_assembly_label(params: Dict[str, Any]) -> str:
+def cabinet_assembly_label(params: Mapping[str, Any]) -> str:
     """Etichetta assieme mobile (come nome componente Fusion)."""
-    params = normalize_params(params)
+    params = ensure_params(params)
     return safe_object_name(params.get("tipo_mobile", "Mobile_Base"))
 
 
-def suggest_module_name(existing_names: List[str], prefix: str = "Modulo") -> str:
-    """Genera Modulo_1, Modulo_2, … evitando collisioni."""
-    used = set(existing_names)
-    n = 1
+def suggest_module_name(existing_names: Iterable[str], prefix: str = "Modulo", start: int = 1) -> str:
+    """Genera Modulo_1, Modulo_2, … evitando collisioni (a partire da ``start``)."""
+    used = existing_names if isinstance(existing_names, (set, frozenset)) else set(existing_names)
+    n = start
     while True:
         candidate = f"{prefix}_{n}"
         if candidate not in used:
@@ -35,7 +36,7 @@ def suggest_module_name(existing_names: List[str], prefix: str = "Modulo") -> st
 
 
 def build_cabinet_assembly_spec(
-    raw_params: Dict[str, Any],
+    raw_params: Mapping[str, Any],
     assembly_name: Optional[str] = None,
     position_cm: Tuple[float, float, float] = (0.0, 0.0, 0.0),
 ) -> Dict[str, Any]:
@@ -45,7 +46,7 @@ def build_cabinet_assembly_spec(
     Restituisce:
         assembly_name, label, position_cm, panels (da panel_specs)
     """
-    params = normalize_params(raw_params)
+    params = ensure_params(raw_params)
     label = assembly_name or cabinet_assembly_label(params)
     name = safe_object_name(label)
 
@@ -54,5 +55,75 @@ def build_cabinet_assembly_spec(
         "assembly_label": label.replace("_", " "),
         "position_cm": position_cm,
         "params": params,
-        "panels": build_panel_specs(params),
+        "panels": [panel.as_dict() for panel in cached_panel_specs(params)],
     }
+
+
+class ProjectModule(NamedTuple):
+    """Modulo di un progetto (mobile posizionato) con parametri normalizzati."""
+
+    index: int
+    name: str
+    position_cm: Tuple[float, float, float]
+    params: CabinetParams
+
+
+class ProjectPanel(NamedTuple):
+    """Pannello con il contesto del modulo di provenienza."""
+
+    module: ProjectModule
+    panel: Panel
+
+
+ProjectItem = Union[Mapping[str, Any], Tuple[Mapping[str, Any], Tuple[float, float, float]]]
+
+
+def iter_project_modules(project: Iterable[ProjectItem]) -> Iterator[ProjectModule]:
+    """
+    Normalizza lazy i moduli di un progetto.
+
+    Ogni elemento può essere:
+    - dict parametri mobile;
+    - tupla ``(parametri, position_cm)``;
+    - dict stile ``build_cabinet_assembly_spec`` con ``params`` e opzionali
+      ``assembly_name`` / ``position_cm``.
+
+    I nomi restano unici nel progetto: un ``assembly_name`` già usato (anche
+    da un nome generato) diventa ``Modulo_1_2``, ``Modulo_1_3``, …
+    """
+    used: set = set()
+    next_n = 1
+    for index, item in enumerate(project):
+        name: Optional[str] = None
+        position: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+        if isinstance(item, tuple):
+            raw, position = item
+        elif "params" in item:
+            raw = item["params"]
+            name = item.get("assembly_name")
+            position = item.get("position_cm", position)
+        else:
+            raw = item
+        if not name:
+            name = suggest_module_name(used, start=next_n)
+            next_n = int(name.rsplit("_", 1)[1]) + 1
+        elif name in used:
+            n = 2
+            while f"{name}_{n}" in used:
+                n += 1
+            name = f"{name}_{n}"
+        used.add(name)
+        # Moduli identici condividono la stessa istanza CabinetParams
+        yield ProjectModule(index, name, tuple(position), CabinetParams(raw))
+
+
+def iter_panel_specs(project: Iterable[ProjectItem]) -> Iterator[ProjectPanel]:
+    """
+    Pannelli di tutto il progetto, uno alla volta, con il loro modulo.
+
+    Nessuna lista di progetto viene materializzata: in memoria c'è solo il
+    modulo corrente (le configurazioni ripetute arrivano dalla cache specs).
+    """
+    for module in iter_project_modules(project):
+        for panel in cached_panel_specs(module.params):
+            yield ProjectPanel(module, panel)
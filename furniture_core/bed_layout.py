@@ -0,0 +1,126 @@
+"""
+Carico piano CNC: più pannelli nello stesso ciclo macchina.
+
+Dispone i pannelli sul campo di lavoro della Record 130TV (2930 x 1300 mm)
+con il MaxRects di ``nesting``: distanza minima tra i pezzi (passaggio
+fresa / ventose), margine dalle battute e zone vietate (morse, battute
+alzate). Pezzi di spessore diverso non condividono il ciclo: la quota Z
+delle lavorazioni è riferita alla faccia superiore. I pezzi non vengono
+ruotati, così le lavorazioni restano una semplice traslazione.
+
+Misure in mm.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
+
+from .nesting import MaxRectsBin
+
+BED_LENGTH_MM = 2930.0  # campo X Record 130TV
+BED_WIDTH_MM = 1300.0  # campo Y
+DEFAULT_BED_GAP_MM = 40.0  # distanza tra pezzi e dalle zone vietate
+DEFAULT_BED_MARGIN_MM = 10.0  # distanza dalle battute sul bordo campo
+
+
+class BedSpec(NamedTuple):
+    """Campo di lavoro; ``clamp_zones`` = rettangoli (x, y, lunghezza, larghezza) vietati."""
+
+    length: float = BED_LENGTH_MM
+    width: float = BED_WIDTH_MM
+    gap: float = DEFAULT_BED_GAP_MM
+    margin: float = DEFAULT_BED_MARGIN_MM
+    clamp_zones: Tuple[Tuple[float, float, float, float], ...] = ()
+
+
+class BedPart(NamedTuple):
+    """Pannello da caricare; ``data`` accompagna il pezzo fino al programma."""
+
+    label: str
+    length: float
+    width: float
+    thickness: float
+    data: Any = None
+
+
+class BedPlacement(NamedTuple):
+    part: BedPart
+    x: float
+    y: float
+
+
+class BedCycle(NamedTuple):
+    """Un carico macchina: pezzi e loro origine sul campo."""
+
+    index: int
+    thickness: float
+    placements: List[BedPlacement]
+
+    @property
+    def extent(self) -> Tuple[float, float]:
+        """Ingombro (X, Y) dei pezzi dall'origine campo."""
+        return (
+            max(p.x + p.part.length for p in self.placements),
+            max(p.y + p.part.width for p in self.placements),
+        )
+
+
+def _empty_bed(bed: BedSpec) -> MaxRectsBin:
+    # Coordinate del contenitore: origine al margine, ogni pezzo occupa
+    # anche un gap a destra e in alto (recuperato sul bordo campo)
+    w = bed.length - 2 * bed.margin + bed.gap
+    h = bed.width - 2 * bed.margin + bed.gap
+    bin_ = MaxRectsBin(w, h)
+    for zx, zy, zl, zw in bed.clamp_zones:
+        # Verso l'origine il gap è già nell'ingombro del pezzo; dall'altro lato va aggiunto
+        x0 = max(0.0, zx - bed.margin)
+        y0 = max(0.0, zy - bed.margin)
+        x1 = min(w, zx - bed.margin + zl + bed.gap)
+        y1 = min(h, zy - bed.margin + zw + bed.gap)
+        if x1 > x0 and y1 > y0:
+            bin_.place(x0, y0, x1 - x0, y1 - y0)
+    return bin_
+
+
+def layout_bed(parts: Iterable[BedPart], bed: BedSpec = BedSpec()) -> Tuple[List[BedCycle], List[BedPart]]:
+    """
+    Raggruppa i pannelli nel minor numero di cicli macchina.
+
+    Per spessore, pezzi ordinati per area decrescente; ciascuno va nella
+    posizione migliore (Best Short Side Fit) tra i cicli aperti, altrimenti
+    apre un nuovo carico.
+
+    Returns:
+        (cicli in ordine, pezzi che non entrano nel campo libero)
+    """
+    by_thickness: Dict[float, List[BedPart]] = {}
+    for part in parts:
+        by_thickness.setdefault(part.thickness, []).append(part)
+
+    cycles: List[BedCycle] = []
+    oversize: List[BedPart] = []
+    for thickness, group in by_thickness.items():
+        bins: List[MaxRectsBin] = []
+        placements: List[List[BedPlacement]] = []
+        for part in sorted(group, key=lambda p: (p.length * p.width, p.length), reverse=True):
+            w, h = part.length + bed.gap, part.width + bed.gap
+            best = None
+            for i, bin_ in enumerate(bins):
+                found = bin_.find(w, h, False)
+                if found is not None and (best is None or found[5] < best[1][5]):
+                    best = (i, found)
+            if best is None:
+                bin_ = _empty_bed(bed)
+                found = bin_.find(w, h, False)
+                if found is None:
+                    oversize.append(part)
+                    continue
+                bins.append(bin_)
+                placements.append([])
+                best = (len(bins) - 1, found)
+            i, (x, y, pw, ph, _, _) = best
+            bins[i].place(x, y, pw, ph)
+            placements[i].append(BedPlacement(part, x + bed.margin, y + bed.margin))
+        for placed in placements:
+            cycles.append(BedCycle(len(cycles) + 1, thickness, placed))
+    return cycles, oversize
@@ -14,3 +14,6 @@ DOOR_GAP_TOP_CM = 0.2
 DOOR_GAP_BOTTOM_CM = 0.0
 DOOR_GAP_BETWEEN_CM = 0.3
 DEFAULT_DOOR_THICKNESS_CM = 1.8
+
+# Composizioni (progetti multi-modulo)
+WALL_UNIT_BOTTOM_CM = 145.0  # quota inferiore pensili da pavimento
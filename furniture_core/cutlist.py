@@ -5,78 +5,251 @@ Lista taglio da specifiche pannelli (senza CAD).
 from __future__ import annotations
 
 import csv
-from typing import Any, Dict, List
+import gzip
+from itertools import chain, islice
+from operator import itemgetter
+from typing import IO, TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+from .panel_table import Panel, PanelLike, PanelTable, iter_cut_dimensions
 
-def panels_to_cutlist(panels: List[Dict[str, Any]], materiale: str = "Legno") -> List[Dict[str, Any]]:
+if TYPE_CHECKING:
+    from .assembly_spec import ProjectPanel
+
+
+def _cutlist_row(nome: str, lunghezza: float, larghezza: float, spessore: float, materiale: str) -> Dict[str, Any]:
+    return {
+        "nome": nome,
+        "lunghezza": round(lunghezza, 1),
+        "larghezza": round(larghezza, 1),
+        "spessore": round(spessore, 1),
+        "materiale": materiale,
+        "quantita": 1,
+        "area_m2": round((lunghezza * larghezza) / 10000.0, 3),
+    }
+
+
+def iter_cutlist(
+    panels: Union[PanelTable, Iterable[PanelLike]],
+    materiale: str = "Legno",
+) -> Iterator[Dict[str, Any]]:
+    """Righe lista taglio generate una alla volta."""
+    for nome, lunghezza, larghezza, spessore in iter_cut_dimensions(panels):
+        yield _cutlist_row(nome, lunghezza, larghezza, spessore, materiale)
+
+
+def iter_project_cutlist(
+    project_panels: Iterable["ProjectPanel"],
+    materiale: str = "Legno",
+) -> Iterator[Dict[str, Any]]:
+    """Righe lista taglio da ``assembly_spec.iter_panel_specs`` (con colonna modulo)."""
+    for item in project_panels:
+        row = _cutlist_row(item.panel.name, *item.panel.cut_dimensions(), materiale)
+        row["modulo"] = item.module.name
+        yield row
+
+
+def panels_to_cutlist(
+    panels: Union[PanelTable, Iterable[PanelLike]],
+    materiale: str = "Legno",
+) -> List[Dict[str, Any]]:
     """Converte pannelli (cm) in righe lista taglio."""
-    cutlist: List[Dict[str, Any]] = []
+    return list(iter_cutlist(panels, materiale))
+
 
-    for panel in panels:
-        dims = sorted(
-            [panel["size_x"], panel["size_y"], panel["size_z"]],
-            reverse=True,
+def aggregate_cutlist(cutlist: Iterable[Dict[str, Any]], decimali: int = 1) -> List[Dict[str, Any]]:
+    """
+    Raggruppa pezzi uguali (anche di mobili diversi) in una riga con quantità.
+
+    Chiave: (lunghezza, larghezza, spessore arrotondati a ``decimali``,
+    materiale, venatura). Ogni riga raggruppata elenca i pezzi di origine in
+    ``pezzi`` ("Modulo_1/Fianco_SX" se la riga ha la colonna modulo) e somma
+    quantità e area. Un solo passaggio, ordine di prima comparsa.
+    """
+    groups: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    for item in cutlist:
+        key = (
+            round(item["lunghezza"], decimali),
+            round(item["larghezza"], decimali),
+            round(item["spessore"], decimali),
+            item["materiale"],
+            item.get("venatura", ""),
         )
-        lunghezza, larghezza, spessore = dims[0], dims[1], dims[2]
-        cutlist.append(
-            {
-                "nome": panel["name"],
-                "lunghezza": round(lunghezza, 1),
-                "larghezza": round(larghezza, 1),
-                "spessore": round(spessore, 1),
-                "materiale": materiale,
-                "quantita": 1,
-                "area_m2": round((lunghezza * larghezza) / 10000.0, 3),
+        pezzo = "{}/{}".format(item["modulo"], item["nome"]) if "modulo" in item else item["nome"]
+        row = groups.get(key)
+        if row is None:
+            groups[key] = {
+                "nome": item["nome"],
+                "lunghezza": key[0],
+                "larghezza": key[1],
+                "spessore": key[2],
+                "materiale": key[3],
+                "venatura": key[4],
+                "quantita": item["quantita"],
+                "area_m2": item["area_m2"],
+                "pezzi": [pezzo],
+                "_nomi": {item["nome"]},
             }
+            continue
+        row["quantita"] += item["quantita"]
+        row["area_m2"] += item["area_m2"]
+        row["pezzi"].append(pezzo)
+        if item["nome"] not in row["_nomi"]:
+            row["_nomi"].add(item["nome"])
+            row["nome"] += ", " + item["nome"]
+
+    result = list(groups.values())
+    for row in result:
+        del row["_nomi"]
+        row["area_m2"] = round(row["area_m2"], 3)
+    return result
+
+
+CSV_HEADER = ["Nome", "Lunghezza (cm)", "Larghezza (cm)", "Spessore (cm)", "Materiale", "Quantita", "Area m2"]
+_CSV_KEYS = ("nome", "lunghezza", "larghezza", "spessore", "materiale", "quantita", "area_m2")
+CSV_CHUNK_ROWS = 10000
+_WRITE_BUFFER = 1 << 20
+
+
+def _csv_records(items: Union[PanelTable, Iterable[Any]], materiale: str) -> Iterator[Tuple[Any, ...]]:
+    """
+    Tuple nell'ordine di ``CSV_HEADER``.
+
+    Le specifiche pannello (PanelTable, Panel o dict con size_x) vanno
+    direttamente in tupla, senza costruire il dict riga intermedio.
+    """
+    if isinstance(items, PanelTable):
+        return _panel_records(items, materiale)
+    it = iter(items)
+    for first in it:
+        rest = chain([first], it)
+        if isinstance(first, Panel) or "size_x" in first:
+            return _panel_records(rest, materiale)
+        return map(itemgetter(*_CSV_KEYS), rest)
+    return iter(())
+
+
+def _panel_records(panels: Union[PanelTable, Iterable[PanelLike]], materiale: str) -> Iterator[Tuple[Any, ...]]:
+    # Stessi arrotondamenti di _cutlist_row
+    for nome, lunghezza, larghezza, spessore in iter_cut_dimensions(panels):
+        yield (
+            nome,
+            round(lunghezza, 1),
+            round(larghezza, 1),
+            round(spessore, 1),
+            materiale,
+            1,
+            round((lunghezza * larghezza) / 10000.0, 3),
         )
 
-    return cutlist
 
+def _open_csv(filepath: str, compress: bool) -> IO[str]:
+    if compress:
+        return gzip.open(filepath, "wt", newline="", encoding="utf-8", compresslevel=6)
+    return open(filepath, "w", newline="", encoding="utf-8", buffering=_WRITE_BUFFER)
 
-def export_csv(cutlist: List[Dict[str, Any]], filepath: str) -> None:
-    """Esporta lista taglio in CSV."""
-    with open(filepath, "w", newline="", encoding="utf-8") as f:
+
+def export_csv_stream(
+    items: Union[PanelTable, Iterable[Any]],
+    filepath: str,
+    materiale: str = "Legno",
+    chunk_rows: int = CSV_CHUNK_ROWS,
+    compress: Optional[bool] = None,
+) -> int:
+    """
+    Esporta in CSV una lista taglio di qualsiasi dimensione a memoria costante.
+
+    Args:
+        items: righe lista taglio o specifiche pannello (anche generatori)
+        filepath: file di destinazione
+        materiale: usato solo se ``items`` sono specifiche pannello
+        chunk_rows: righe per blocco passato a ``writerows``
+        compress: gzip; None = automatico se il file termina con ``.gz``
+
+    Returns:
+        numero di righe scritte (intestazione esclusa)
+    """
+    if compress is None:
+        compress = filepath.endswith(".gz")
+    # Prima i record (può sollevare sul primo elemento), poi il file
+    records = _csv_records(items, materiale)
+    written = 0
+    with _open_csv(filepath, compress) as f:
         writer = csv.writer(f)
-        writer.writerow(
-            ["Nome", "Lunghezza (cm)", "Larghezza (cm)", "Spessore (cm)", "Materiale", "Quantita", "Area m2"]
-        )
-        for item in cutlist:
-            writer.writerow(
-                [
-                    item["nome"],
-                    item["lunghezza"],
-                    item["larghezza"],
-                    item["spessore"],
-                    item["materiale"],
-                    item["quantita"],
-                    item["area_m2"],
-                ]
-            )
-
-
-def export_excel(cutlist: List[Dict[str, Any]], filepath: str) -> None:
-    """Esporta lista taglio in Excel; fallback CSV se openpyxl manca."""
-    try:
-        import openpyxl
-
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Lista Taglio"
-        ws.append(
-            ["Nome", "Lunghezza (cm)", "Larghezza (cm)", "Spessore (cm)", "Materiale", "Quantita", "Area m2"]
+        writer.writerow(CSV_HEADER)
+        while True:
+            chunk = list(islice(records, chunk_rows))
+            if not chunk:
+                break
+            writer.writerows(chunk)
+            written += len(chunk)
+    return written
+
+
+def export_csv(cutlist: Iterable[Dict[str, Any]], filepath: str) -> None:
+    """Esporta lista taglio in CSV."""
+    export_csv_stream(cutlist, filepath, compress=False)
+
+
+SUMMARY_SHEET = "Riepilogo"
+SUMMARY_HEADER = ["Materiale", "Spessore (cm)", "Foglio", "Righe", "Quantita", "Area m2"]
+
+
+def export_excel_stream(
+    items: Union[PanelTable, Iterable[Any]],
+    filepath: str,
+    materiale: str = "Legno",
+    engine: str = "auto",
+) -> Dict[str, Any]:
+    """
+    Esporta lista taglio in XLSX in streaming: un foglio per materiale/spessore
+    più il foglio riepilogo con i totali.
+
+    Args:
+        items: righe lista taglio o specifiche pannello (anche generatori)
+        filepath: file .xlsx
+        materiale: usato solo se ``items`` sono specifiche pannello
+        engine: 'auto' (openpyxl write-only se installato), 'openpyxl' o 'stdlib'
+
+    Returns:
+        dict con ``fogli`` (nome foglio → (righe, quantità, area m2)) e ``righe``
+    """
+    from .xlsx_writer import open_workbook
+
+    totals: Dict[Tuple[str, float], List[Any]] = {}
+    with open_workbook(filepath, engine) as book:
+        summary = book.add_sheet(SUMMARY_SHEET)
+        for record in _csv_records(items, materiale):
+            key = (record[4], record[3])
+            entry = totals.get(key)
+            if entry is None:
+                sheet = book.add_sheet("{} {:g}".format(record[4], record[3]))
+                book.append(sheet, CSV_HEADER)
+                entry = totals[key] = [sheet, 0, 0, 0.0]
+            book.append(entry[0], record)
+            entry[1] += 1
+            entry[2] += record[5]
+            entry[3] += record[6]
+
+        book.append(summary, SUMMARY_HEADER)
+        for (mat, spessore), (sheet, rows, quantita, area) in totals.items():
+            book.append(summary, (mat, spessore, sheet, rows, quantita, round(area, 3)))
+        book.append(
+            summary,
+            (
+                "Totale",
+                None,
+                None,
+                sum(e[1] for e in totals.values()),
+                sum(e[2] for e in totals.values()),
+                round(sum(e[3] for e in totals.values()), 3),
+            ),
         )
-        for item in cutlist:
-            ws.append(
-                [
-                    item["nome"],
-                    item["lunghezza"],
-                    item["larghezza"],
-                    item["spessore"],
-                    item["materiale"],
-                    item["quantita"],
-                    item["area_m2"],
-                ]
-            )
-        wb.save(filepath)
-    except ImportError:
-        export_csv(cutlist, filepath.replace(".xlsx", ".csv"))
+    return {
+        "fogli": {e[0]: (e[1], e[2], round(e[3], 3)) for e in totals.values()},
+        "righe": sum(e[1] for e in totals.values()),
+    }
+
+
+def export_excel(cutlist: Iterable[Dict[str, Any]], filepath: str) -> None:
+    """Esporta lista taglio in Excel (openpyxl write-only o writer XLSX interno)."""
+    export_excel_stream(cutlist, filepath)
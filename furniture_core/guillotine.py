@@ -0,0 +1,353 @@
+"""
+Schemi di taglio a ghigliottina per sezionatrice, con taglio a pacco.
+
+Ogni lastra è tagliata a strisce lungo la lunghezza (tagli longitudinali),
+poi ogni striscia a pezzi (tagli trasversali); i pezzi più stretti della
+striscia richiedono un terzo taglio di rifilo. Gli schemi vengono generati
+sulla domanda residua e ripetuti finché la domanda lo consente, così le
+lastre uguali si tagliano a pacco (fino all'altezza pacco della macchina):
+meno schemi diversi e meno cicli sega a parità di sfrido. Come nel
+nesting, i pezzi possono prima essere prelevati dal magazzino sfridi.
+
+Misure in mm, come ``nesting``.
+"""
+
+from __future__ import annotations
+
+import csv
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from .nesting import Part, SheetSpec, parts_from_cutlist
+
+if TYPE_CHECKING:
+    from .remnants import RemnantClaim, RemnantStore
+
+DEFAULT_BOOK_HEIGHT_MM = 75.0  # altezza massima pacco sezionatrice
+DEFAULT_YIELD_TOLERANCE = 0.03  # resa sacrificabile per uno schema ripetibile
+
+
+class StripPiece(NamedTuple):
+    names: str  # nomi pezzo con queste misure (es. "Fianco_SX, Fianco_DX")
+    length: float
+    width: float
+    rotated: bool
+
+
+class Strip(NamedTuple):
+    width: float  # larghezza striscia (taglio longitudinale)
+    pieces: Tuple[StripPiece, ...]
+
+    @property
+    def trim_cuts(self) -> int:
+        return sum(1 for p in self.pieces if p.width < self.width)
+
+
+class GuillotinePattern(NamedTuple):
+    """Schema di una lastra e quante lastre lo ripetono."""
+
+    sheet: SheetSpec
+    strips: Tuple[Strip, ...]
+    sheets: int
+    sheets_per_book: int
+
+    @property
+    def used_area(self) -> float:
+        return sum(p.length * p.width for s in self.strips for p in s.pieces)
+
+    @property
+    def yield_ratio(self) -> float:
+        return self.used_area / self.sheet.area
+
+    @property
+    def cuts(self) -> int:
+        """Passate sega per un pacco: strisce + pezzi + rifili di terza fase."""
+        return sum(1 + len(s.pieces) + s.trim_cuts for s in self.strips)
+
+    @property
+    def books(self) -> int:
+        return -(-self.sheets // self.sheets_per_book)
+
+    @property
+    def saw_cycles(self) -> int:
+        return self.books * self.cuts
+
+
+class CuttingPlan(NamedTuple):
+    materiale: str
+    spessore: float  # cm, come la lista taglio
+    patterns: List[GuillotinePattern]
+    unplaced: List[Part]
+    remnant_claims: Tuple["RemnantClaim", ...] = ()  # pezzi tagliati da sfridi
+
+    @property
+    def sheets(self) -> int:
+        return sum(p.sheets for p in self.patterns)
+
+    @property
+    def books(self) -> int:
+        return sum(p.books for p in self.patterns)
+
+    @property
+    def saw_cycles(self) -> int:
+        return sum(p.saw_cycles for p in self.patterns)
+
+    @property
+    def yield_ratio(self) -> float:
+        if not self.patterns:
+            return 0.0
+        used = sum(p.used_area * p.sheets for p in self.patterns)
+        return used / sum(p.sheet.area * p.sheets for p in self.patterns)
+
+
+# Tipo pezzo: (lunghezza, larghezza, ruotabile) → quantità residua
+_PartKey = Tuple[float, float, bool]
+
+
+def _orientations(key: _PartKey) -> Tuple[Tuple[float, float, bool], ...]:
+    length, width, rotatable = key
+    if rotatable and length != width:
+        return ((length, width, False), (width, length, True))
+    return ((length, width, False),)
+
+
+def _fill_sheet(
+    demand: Dict[_PartKey, int],
+    types: List[_PartKey],
+    usable_l: float,
+    usable_w: float,
+    kerf: float,
+) -> Tuple[List[Tuple[float, List[Tuple[_PartKey, float, float, bool]]]], Dict[_PartKey, int]]:
+    """Riempie una lastra a strisce dalla domanda residua (non la modifica)."""
+    left = dict(demand)
+    strips: List[Tuple[float, List[Tuple[_PartKey, float, float, bool]]]] = []
+    free_w = usable_w
+    while True:
+        # Apre la striscia con il pezzo più largo che entra (lato lungo lungo X)
+        opener = None
+        for key in types:
+            if not left[key]:
+                continue
+            for l, w, rotated in sorted(_orientations(key), key=lambda o: o[1]):
+                if l + kerf <= usable_l and w + kerf <= free_w:
+                    opener = (key, l, w, rotated)
+                    break
+            if opener is not None:
+                break
+        if opener is None:
+            break
+        key, l, w, rotated = opener
+        height = w + kerf
+        free_w -= height
+        left[key] -= 1
+        pieces = [(key, l, w, rotated)]
+        free_l = usable_l - (l + kerf)
+        while True:
+            # Pezzo più largo (meno rifilo), poi più lungo, che entra nel resto striscia
+            best = None
+            for key in types:
+                if not left[key]:
+                    continue
+                for l, w, rotated in _orientations(key):
+                    if w + kerf <= height and l + kerf <= free_l:
+                        score = (w, l)
+                        if best is None or score > best[0]:
+                            best = (score, key, l, w, rotated)
+            if best is None:
+                break
+            _, key, l, w, rotated = best
+            left[key] -= 1
+            pieces.append((key, l, w, rotated))
+            free_l -= l + kerf
+        strips.append((height - kerf, pieces))
+    used = {key: demand[key] - left[key] for key in demand if demand[key] != left[key]}
+    return strips, used
+
+
+def _pattern_area(strips: List[Tuple[float, List[Tuple[_PartKey, float, float, bool]]]]) -> float:
+    return sum(l * w for _, pieces in strips for _, l, w, _ in pieces)
+
+
+def optimize_parts(
+    parts: Iterable[Part],
+    sheet: SheetSpec = SheetSpec(),
+    thickness_mm: float = 18.0,
+    book_height_mm: float = DEFAULT_BOOK_HEIGHT_MM,
+    yield_tolerance: float = DEFAULT_YIELD_TOLERANCE,
+) -> Tuple[List[GuillotinePattern], List[Part]]:
+    """
+    Schemi a ghigliottina per un gruppo di pezzi dello stesso materiale/spessore.
+
+    Per ogni nuovo schema si prova a riempire la lastra con una frazione
+    della domanda (1/r, con r multiplo del pacco): lo schema si ripete
+    almeno r volte. Viene scelto il più ripetibile la cui resa non scende
+    più di ``yield_tolerance`` sotto lo schema avido sull'intera domanda.
+
+    Returns:
+        (schemi con numero lastre, pezzi più grandi della lastra)
+    """
+    usable_l, usable_w = sheet.usable()
+    kerf = sheet.kerf
+    demand: Dict[_PartKey, int] = {}
+    names: Dict[_PartKey, List[str]] = {}
+    unplaced: List[Part] = []
+    for part in parts:
+        key = (part.length, part.width, part.rotatable)
+        if not any(l + kerf <= usable_l and w + kerf <= usable_w for l, w, _ in _orientations(key)):
+            unplaced.append(part)
+            continue
+        demand[key] = demand.get(key, 0) + 1
+        seen = names.setdefault(key, [])
+        if part.name not in seen:
+            seen.append(part.name)
+    # Più larghi prima (aprono le strisce), poi più lunghi
+    types = sorted(demand, key=lambda k: (min(k[0], k[1]) if k[2] else k[1], max(k[0], k[1])), reverse=True)
+    per_book = max(1, int(book_height_mm // thickness_mm)) if thickness_mm > 0 else 1
+
+    patterns: List[GuillotinePattern] = []
+    while any(demand.values()):
+        raw_strips, used = _fill_sheet(demand, types, usable_l, usable_w, kerf)
+        target = _pattern_area(raw_strips) - yield_tolerance * sheet.area
+        top = max(demand.values())
+        for r in (per_book * m for m in (4, 3, 2, 1)):
+            if r < 2 or r > top:
+                continue
+            share = {key: n // r for key, n in demand.items()}
+            if not any(share.values()):
+                continue
+            candidate, candidate_used = _fill_sheet(share, types, usable_l, usable_w, kerf)
+            if candidate_used and _pattern_area(candidate) >= target:
+                raw_strips, used = candidate, candidate_used
+                break
+        repeats = min(demand[key] // n for key, n in used.items())
+        for key, n in used.items():
+            demand[key] -= n * repeats
+        strips = tuple(
+            Strip(
+                width,
+                tuple(StripPiece(", ".join(names[key]), l, w, rotated) for key, l, w, rotated in pieces),
+            )
+            for width, pieces in raw_strips
+        )
+        patterns.append(GuillotinePattern(sheet, strips, repeats, per_book))
+    return patterns, unplaced
+
+
+def optimize_cutting(
+    cutlist: Iterable[Mapping[str, Any]],
+    sheet: SheetSpec = SheetSpec(),
+    sheets_by_material: Optional[Mapping[str, SheetSpec]] = None,
+    book_height_mm: float = DEFAULT_BOOK_HEIGHT_MM,
+    allow_rotation: bool = True,
+    yield_tolerance: float = DEFAULT_YIELD_TOLERANCE,
+    remnants: Optional["RemnantStore"] = None,
+) -> List[CuttingPlan]:
+    """
+    Piani di taglio per sezionatrice da una lista taglio (righe cm).
+
+    Un piano per (materiale, spessore); i pezzi con ``venatura`` non ruotano.
+    Con ``remnants`` i pezzi che entrano in uno sfrido vengono prelevati
+    dal magazzino (aggiornato) prima di generare gli schemi.
+    """
+    groups: Dict[Tuple[str, float], List[Mapping[str, Any]]] = {}
+    for row in cutlist:
+        groups.setdefault((row["materiale"], row["spessore"]), []).append(row)
+    sheets_by_material = sheets_by_material or {}
+    plans: List[CuttingPlan] = []
+    for (materiale, spessore), rows in groups.items():
+        group_sheet = sheets_by_material.get(materiale, sheet)
+        parts = parts_from_cutlist(rows, allow_rotation)
+        claimed: List["RemnantClaim"] = []
+        if remnants is not None:
+            claimed, parts = remnants.claim_parts(materiale, round(spessore * 10.0, 1), parts, group_sheet.kerf)
+        patterns, unplaced = optimize_parts(parts, group_sheet, spessore * 10.0, book_height_mm, yield_tolerance)
+        plans.append(CuttingPlan(materiale, spessore, patterns, unplaced, tuple(claimed)))
+    return plans
+
+
+def _claim_line(plan: CuttingPlan, claim: "RemnantClaim") -> str:
+    r = claim.remnant
+    return "  DA SFRIDO {} ({} {:g} mm, {:g}x{:g}): {} {:g}x{:g}{}".format(
+        r.id, plan.materiale, r.spessore, r.length, r.width,
+        claim.part.name, claim.part.length, claim.part.width, " (R)" if claim.rotated else "",
+    )
+
+
+def cutting_plan_text(plans: Iterable[CuttingPlan]) -> str:
+    """Piano di taglio leggibile in officina."""
+    lines: List[str] = []
+    for plan in plans:
+        if not plan.patterns:
+            for claim in plan.remnant_claims:
+                lines.append(_claim_line(plan, claim))
+            continue
+        sheet = plan.patterns[0].sheet
+        lines.append(
+            "PIANO DI TAGLIO — {} {:g} mm — lastra {:g} x {:g} (lama {:g}, rifilo {:g})".format(
+                plan.materiale, plan.spessore * 10.0, sheet.length, sheet.width, sheet.kerf, sheet.trim
+            )
+        )
+        lines.append(
+            "Lastre {}  pacchi {}  cicli sega {}  resa {:.1f}%".format(
+                plan.sheets, plan.books, plan.saw_cycles, 100.0 * plan.yield_ratio
+            )
+        )
+        for n, pattern in enumerate(plan.patterns, start=1):
+            lines.append(
+                "  Schema {}: {} lastre, pacco da {} ({} pacchi), {} tagli/pacco, resa {:.1f}%".format(
+                    n, pattern.sheets, pattern.sheets_per_book, pattern.books, pattern.cuts,
+                    100.0 * pattern.yield_ratio,
+                )
+            )
+            for s, strip in enumerate(pattern.strips, start=1):
+                pieces = "; ".join(
+                    "{} {:g}x{:g}{}".format(p.names, p.length, p.width, " (R)" if p.rotated else "")
+                    for p in strip.pieces
+                )
+                lines.append("    Striscia {} ({:g}): {}".format(s, strip.width, pieces))
+        for claim in plan.remnant_claims:
+            lines.append(_claim_line(plan, claim))
+        for part in plan.unplaced:
+            lines.append("  FUORI MISURA: {} {:g}x{:g}".format(part.name, part.length, part.width))
+        lines.append("")
+    return "\n".join(lines)
+
+
+CUTTING_PLAN_HEADER = [
+    "Materiale",
+    "Spessore (mm)",
+    "Schema",
+    "Lastre",
+    "Pacchi",
+    "Striscia",
+    "Larghezza striscia (mm)",
+    "Pezzo",
+    "Lunghezza (mm)",
+    "Larghezza (mm)",
+    "Ruotato",
+]
+
+
+def export_cutting_plan_csv(plans: Iterable[CuttingPlan], filepath: str) -> None:
+    """Esporta i piani di taglio in CSV (una riga per pezzo di schema)."""
+    with open(filepath, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CUTTING_PLAN_HEADER)
+        for plan in plans:
+            for n, pattern in enumerate(plan.patterns, start=1):
+                for s, strip in enumerate(pattern.strips, start=1):
+                    writer.writerows(
+                        [
+                            plan.materiale,
+                            round(plan.spessore * 10.0, 1),
+                            n,
+                            pattern.sheets,
+                            pattern.books,
+                            s,
+                            strip.width,
+                            piece.names,
+                            piece.length,
+                            piece.width,
+                            int(piece.rotated),
+                        ]
+                        for piece in strip.pieces
+                    )
@@ -0,0 +1,104 @@
+"""
+Ricalcolo incrementale pannelli dopo una modifica parametri.
+
+Ogni famiglia di pannelli (``panel_specs.PANEL_FAMILIES``) dichiara i
+parametri da cui dipende: cambiando ``num_ante`` si ricalcolano solo le ante,
+i fianchi restano gli stessi oggetti. Il risultato è un diff minimo
+(aggiunti / rimossi / modificati) da applicare alla vista CAD.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+from .models import CabinetParams, ensure_params, normalize_params
+from .panel_specs import PANEL_FAMILIES, build_panels, panel_family
+from .panel_table import Panel, PanelLike
+
+
+class SpecDiff(NamedTuple):
+    """Esito di ``respec``: nuova specifica completa + differenze."""
+
+    params: Mapping[str, Any]
+    panels: List[Panel]
+    added: List[Panel]
+    removed: List[Panel]
+    modified: List[Tuple[Panel, Panel]]  # (vecchio, nuovo)
+    recomputed: Tuple[str, ...]  # famiglie ricalcolate
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.modified)
+
+
+def panel_dependencies(name: str) -> FrozenSet[str]:
+    """Parametri da cui dipende il pannello (es. Fianco_SX → L, H, P, S)."""
+    family = panel_family(name)
+    for fam, _, _, deps in PANEL_FAMILIES:
+        if fam == family:
+            return deps
+    raise KeyError(name)
+
+
+def changed_params(old: Mapping[str, Any], new: Mapping[str, Any]) -> Set[str]:
+    """Chiavi con valore diverso tra due set di parametri normalizzati."""
+    keys = set(old) | set(new)
+    return {k for k in keys if old.get(k) != new.get(k)}
+
+
+def respec(
+    old_params: Mapping[str, Any],
+    delta: Mapping[str, Any],
+    old_panels: Optional[Sequence[PanelLike]] = None,
+) -> SpecDiff:
+    """
+    Applica ``delta`` ai parametri e ricalcola solo le famiglie coinvolte.
+
+    Args:
+        old_params: parametri del mobile prima della modifica
+        delta: parametri cambiati (es. ``{"num_ripiani": 3}``)
+        old_panels: pannelli già calcolati per ``old_params`` (``Panel`` o dict di
+            ``build_panel_specs``; se None si ricalcolano)
+    """
+    old = ensure_params(old_params)
+    if isinstance(old, CabinetParams):
+        new: Mapping[str, Any] = old.replace(**delta)
+    else:
+        new = normalize_params({**old, **delta})
+    if old_panels is None:
+        old_panels = build_panels(old)
+    else:
+        old_panels = [p if isinstance(p, Panel) else Panel(**p) for p in old_panels]
+    changed = changed_params(old, new)
+
+    by_family: Dict[str, List[Panel]] = {}
+    for panel in old_panels:
+        by_family.setdefault(panel_family(panel["name"]), []).append(panel)
+
+    panels: List[Panel] = []
+    added: List[Panel] = []
+    removed: List[Panel] = []
+    modified: List[Tuple[Panel, Panel]] = []
+    recomputed: List[str] = []
+
+    for family, _, builder, deps in PANEL_FAMILIES:
+        previous = by_family.get(family, [])
+        if not (deps & changed):
+            panels.extend(previous)
+            continue
+        recomputed.append(family)
+        current = builder(new)
+        panels.extend(current)
+
+        old_by_name = {p["name"]: p for p in previous}
+        new_names = set()
+        for panel in current:
+            new_names.add(panel["name"])
+            before = old_by_name.get(panel["name"])
+            if before is None:
+                added.append(panel)
+            elif before != panel:
+                modified.append((before, panel))
+        removed.extend(p for p in previous if p["name"] not in new_names)
+
+    return SpecDiff(new, panels, added, removed, modified, tuple(recomputed))
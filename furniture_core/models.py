@@ -4,8 +4,11 @@ Modelli dati e default per mobili parametrici.
 
 from __future__ import annotations
 
-from copy import deepcopy
-from typing import Any, Dict, List
+import hashlib
+import json
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+from weakref import WeakValueDictionary
 
 FURNITURE_TYPES: List[str] = [
     "Mobile Base",
@@ -76,46 +79,213 @@ _BASE_DEFAULTS: Dict[str, Any] = {
 }
 
 
+_FLOAT_KEYS = (
+    "larghezza",
+    "altezza",
+    "profondita",
+    "spessore_pannello",
+    "spessore_schienale",
+    "altezza_zoccolo",
+    "arretramento_schienale",
+    "groove_offset_cm",
+    "shelf_front_setback",
+    "spessore_anta",
+)
+_INT_KEYS = ("num_ripiani", "num_ante", "num_cassetti", "num_cerniere")
+_BOOL_KEYS = ("sistema_32mm", "fori_ripiani", "spinatura", "con_zoccolo")
+
+# Piano di coercizione compilato una volta: chiave → (tipo, None ammesso)
+_COERCION_PLAN: Dict[str, Tuple[type, bool]] = {
+    **{key: (float, True) for key in _FLOAT_KEYS},
+    **{key: (int, True) for key in _INT_KEYS},
+    **{key: (bool, False) for key in _BOOL_KEYS},
+}
+
+
+def _coerce(params: Dict[str, Any], keys: Iterable[str]) -> None:
+    for key in keys:
+        rule = _COERCION_PLAN.get(key)
+        if rule is None:
+            continue
+        cast, skip_none = rule
+        value = params[key]
+        if type(value) is cast or (skip_none and value is None):
+            continue
+        params[key] = cast(value)
+
+
+def _build_type_defaults(tipo: str) -> Mapping[str, Any]:
+    params = dict(_BASE_DEFAULTS)
+    params["tipo_mobile"] = tipo
+    params.update(_DEFAULTS_BY_TYPE.get(tipo, {}))
+    _coerce(params, list(params))
+    return MappingProxyType(params)
+
+
+# Tabelle default immutabili per tipo (valori scalari: basta una copia superficiale)
+_TYPE_DEFAULTS: Dict[str, Mapping[str, Any]] = {
+    tipo: _build_type_defaults(tipo) for tipo in FURNITURE_TYPES
+}
+
+
+def _type_defaults(tipo: str) -> Mapping[str, Any]:
+    table = _TYPE_DEFAULTS.get(tipo)
+    if table is None:
+        # Tipo non previsto: stessi default base, senza memorizzarlo
+        table = _build_type_defaults(tipo)
+    return table
+
+
 def default_params_for_type(tipo: str) -> Dict[str, Any]:
     """Restituisce parametri di default per il tipo mobile."""
-    params = deepcopy(_BASE_DEFAULTS)
-    params["tipo_mobile"] = tipo
-    overrides = _DEFAULTS_BY_TYPE.get(tipo, {})
-    params.update(overrides)
-    return params
+    return _type_defaults(tipo).copy()
 
 
-def normalize_params(raw: Dict[str, Any]) -> Dict[str, Any]:
+def normalize_params(raw: Mapping[str, Any]) -> Dict[str, Any]:
     """Unisce input utente con default e tipi coerenti."""
+    if isinstance(raw, CabinetParams):
+        return raw.to_dict()
     tipo = raw.get("tipo_mobile", _BASE_DEFAULTS["tipo_mobile"])
-    params = default_params_for_type(tipo)
+    params = _type_defaults(tipo).copy()
     params.update(raw)
     params["tipo_mobile"] = tipo
+    # I default sono già tipizzati: si convertono solo le chiavi fornite
+    _coerce(params, raw)
+    return _apply_derived(params)
 
-    for key in (
-        "larghezza",
-        "altezza",
-        "profondita",
-        "spessore_pannello",
-        "spessore_schienale",
-        "altezza_zoccolo",
-        "arretramento_schienale",
-        "groove_offset_cm",
-        "shelf_front_setback",
-        "spessore_anta",
-    ):
-        if key in params and params[key] is not None:
-            params[key] = float(params[key])
-
-    for key in ("num_ripiani", "num_ante", "num_cassetti", "num_cerniere"):
-        if key in params and params[key] is not None:
-            params[key] = int(params[key])
-
-    for key in ("sistema_32mm", "fori_ripiani", "spinatura", "con_zoccolo"):
-        if key in params:
-            params[key] = bool(params[key])
 
+def _apply_derived(params: Dict[str, Any]) -> Dict[str, Any]:
     if params.get("num_ante", 0) > 0 and params.get("num_cerniere", 0) == 0:
         params["num_cerniere"] = params["num_ante"] * 2
-
     return params
+
+
+def normalize_many(
+    batch: Union[Iterable[Mapping[str, Any]], Mapping[str, Sequence[Any]]],
+) -> List[Dict[str, Any]]:
+    """
+    Normalizza un lotto di parametri.
+
+    Accetta una lista di dict oppure una tabella colonnare
+    ``{chiave: sequenza}`` (una riga per mobile, colonne di pari lunghezza).
+    """
+    if not isinstance(batch, Mapping):
+        return [normalize_params(row) for row in batch]
+
+    keys = list(batch)
+    lengths = {len(batch[key]) for key in keys}
+    if len(lengths) > 1:
+        raise ValueError("Colonne di lunghezza diversa: {}".format(sorted(lengths)))
+    n = lengths.pop() if lengths else 0
+    # Le colonne sono le stesse per ogni riga: chiavi da convertire calcolate una volta
+    coerce_keys = [key for key in keys if key in _COERCION_PLAN]
+    default_tipo = _BASE_DEFAULTS["tipo_mobile"]
+    # Niente test di verità sulla colonna: un array NumPy lo rifiuta
+    tipi = batch.get("tipo_mobile")
+    if tipi is None:
+        tipi = [default_tipo] * n
+
+    out: List[Dict[str, Any]] = []
+    for tipo, values in zip(tipi, zip(*batch.values())):
+        params = _type_defaults(tipo).copy()
+        params.update(zip(keys, values))
+        params["tipo_mobile"] = tipo
+        _coerce(params, coerce_keys)
+        out.append(_apply_derived(params))
+    return out
+
+
+def params_digest(params: Mapping[str, Any]) -> str:
+    """SHA-1 della forma JSON canonica (chiavi ordinate) di parametri già normalizzati."""
+    payload = json.dumps(dict(params), sort_keys=True, separators=(",", ":"), default=repr)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class CabinetParams(Mapping):
+    """
+    Parametri mobile normalizzati una sola volta, immutabili e hashable.
+
+    Configurazioni identiche condividono la stessa istanza (interning), quindi
+    sono chiavi di cache economiche. Si comporta come un dict in sola lettura:
+    le funzioni a valle (panel_specs, validation, xilog_export …) la usano
+    senza rinormalizzare.
+    """
+
+    __slots__ = ("_data", "_key", "_hash", "_fingerprint", "__weakref__")
+
+    _interned: "WeakValueDictionary[Tuple[Tuple[str, Any], ...], CabinetParams]" = WeakValueDictionary()
+
+    def __new__(cls, raw: Optional[Mapping[str, Any]] = None, **overrides: Any) -> "CabinetParams":
+        if isinstance(raw, CabinetParams) and not overrides:
+            return raw
+        data = normalize_params({**(raw or {}), **overrides})
+        key = tuple(sorted(data.items()))
+        try:
+            key_hash = hash(key)
+        except TypeError as exc:
+            raise TypeError("CabinetParams richiede valori hashable: {}".format(exc)) from None
+        existing = cls._interned.get(key)
+        if existing is not None:
+            return existing
+        self = super().__new__(cls)
+        object.__setattr__(self, "_data", MappingProxyType(data))
+        object.__setattr__(self, "_key", key)
+        object.__setattr__(self, "_hash", key_hash)
+        object.__setattr__(self, "_fingerprint", None)
+        cls._interned[key] = self
+        return self
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("CabinetParams è immutabile")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("CabinetParams è immutabile")
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (CabinetParams, (dict(self._data),))
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: Any) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, CabinetParams):
+            return self._hash == other._hash and self._key == other._key
+        if isinstance(other, Mapping):
+            return dict(self._data) == dict(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return "CabinetParams({!r})".format(dict(self._data))
+
+    @property
+    def fingerprint(self) -> str:
+        """Impronta SHA-1 canonica (stessa di spec_cache.params_fingerprint)."""
+        if self._fingerprint is None:
+            object.__setattr__(self, "_fingerprint", params_digest(self._data))
+        return self._fingerprint
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Copia modificabile."""
+        return dict(self._data)
+
+    def replace(self, **changes: Any) -> "CabinetParams":
+        """Nuova istanza (internata) con i parametri cambiati."""
+        return CabinetParams(self._data, **changes)
+
+
+def ensure_params(raw: Mapping[str, Any]) -> Mapping[str, Any]:
+    """Parametri normalizzati: CabinetParams passa invariato, i dict vengono normalizzati."""
+    if isinstance(raw, CabinetParams):
+        return raw
+    return normalize_params(raw)
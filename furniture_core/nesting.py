@@ -0,0 +1,303 @@
+"""
+Nesting lista taglio su lastre (MaxRects, Best Short Side Fit).
+
+Lavora in mm (come il post-processore): le righe di ``panels_to_cutlist``
+(cm) vengono espanse per quantità e convertite. Gestisce lama (kerf),
+rifilo perimetrale e blocco rotazione per i pezzi con venatura. Gruppi
+materiale/spessore indipendenti possono essere annidati in parallelo in un
+pool di processi. Con un magazzino sfridi (``remnants.RemnantStore``) i
+pezzi che entrano in un ritaglio vengono prelevati prima di aprire lastre.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from .remnants import RemnantClaim, RemnantStore
+
+# Lastra standard truciolare/MDF (mm)
+DEFAULT_SHEET_LENGTH_MM = 2800.0
+DEFAULT_SHEET_WIDTH_MM = 2070.0
+DEFAULT_KERF_MM = 4.0
+DEFAULT_TRIM_MM = 10.0
+
+# Sotto questa soglia di pezzi il pool di processi costa più di quanto rende
+PARALLEL_MIN_PARTS = 400
+
+
+class SheetSpec(NamedTuple):
+    """Lastra grezza (mm): dimensioni, spessore lama e rifilo su ogni bordo."""
+
+    length: float = DEFAULT_SHEET_LENGTH_MM
+    width: float = DEFAULT_SHEET_WIDTH_MM
+    kerf: float = DEFAULT_KERF_MM
+    trim: float = DEFAULT_TRIM_MM
+
+    @property
+    def area(self) -> float:
+        return self.length * self.width
+
+    def usable(self) -> Tuple[float, float]:
+        """Area utile per il packing: rifilo tolto, un kerf recuperato sul bordo."""
+        return (self.length - 2 * self.trim + self.kerf, self.width - 2 * self.trim + self.kerf)
+
+
+class Part(NamedTuple):
+    """Pezzo da annidare (mm); ``rotatable`` False = venatura lungo X lastra."""
+
+    name: str
+    length: float
+    width: float
+    rotatable: bool = True
+
+
+class Placement(NamedTuple):
+    """Pezzo posizionato: origine (mm, dal bordo lastra) e misure come piazzato."""
+
+    name: str
+    x: float
+    y: float
+    length: float
+    width: float
+    rotated: bool
+
+
+class SheetLayout(NamedTuple):
+    index: int
+    sheet: SheetSpec
+    placements: List[Placement]
+
+    @property
+    def used_area(self) -> float:
+        return sum(p.length * p.width for p in self.placements)
+
+    @property
+    def yield_ratio(self) -> float:
+        """Resa lastra: area pezzi / area lastra grezza."""
+        return self.used_area / self.sheet.area
+
+
+class NestingResult(NamedTuple):
+    materiale: str
+    spessore: float
+    sheets: List[SheetLayout]
+    unplaced: List[Part]
+    remnant_claims: Tuple["RemnantClaim", ...] = ()  # pezzi tagliati da sfridi
+
+    @property
+    def yield_ratio(self) -> float:
+        if not self.sheets:
+            return 0.0
+        return sum(s.used_area for s in self.sheets) / sum(s.sheet.area for s in self.sheets)
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Righe riepilogo per lastra (indice, pezzi, resa %)."""
+        return [
+            {
+                "materiale": self.materiale,
+                "spessore": self.spessore,
+                "lastra": s.index,
+                "pezzi": len(s.placements),
+                "area_pezzi_m2": round(s.used_area / 1e6, 3),
+                "resa_pct": round(100.0 * s.yield_ratio, 1),
+            }
+            for s in self.sheets
+        ]
+
+
+class MaxRectsBin:
+    """Contenitore MaxRects: elenco dei rettangoli liberi massimali."""
+
+    __slots__ = ("width", "height", "free", "max_long", "max_short")
+
+    def __init__(self, width: float, height: float):
+        self.width = width
+        self.height = height
+        self.free: List[Tuple[float, float, float, float]] = [(0.0, 0.0, width, height)]
+        self._update_bounds()
+
+    def _update_bounds(self) -> None:
+        # Scarto rapido: nessun pezzo con lato più grande di questi può entrare
+        self.max_long = max((max(r[2], r[3]) for r in self.free), default=0.0)
+        self.max_short = max((min(r[2], r[3]) for r in self.free), default=0.0)
+
+    def find(self, w: float, h: float, rotatable: bool) -> Optional[Tuple[float, float, float, float, bool, Tuple[float, float]]]:
+        """Miglior posizione (x, y, w, h, ruotato, punteggio) o None."""
+        best = None
+        best_score = (float("inf"), float("inf"))
+        for fx, fy, fw, fh in self.free:
+            if w <= fw and h <= fh:
+                dw, dh = fw - w, fh - h
+                score = (min(dw, dh), max(dw, dh))
+                if score < best_score:
+                    best, best_score = (fx, fy, w, h, False), score
+            if rotatable and h <= fw and w <= fh:
+                dw, dh = fw - h, fh - w
+                score = (min(dw, dh), max(dw, dh))
+                if score < best_score:
+                    best, best_score = (fx, fy, h, w, True), score
+        if best is None:
+            return None
+        return best + (best_score,)
+
+    def place(self, x: float, y: float, w: float, h: float) -> None:
+        right, top = x + w, y + h
+        result: List[Tuple[float, float, float, float]] = []
+        for free in self.free:
+            fx, fy, fw, fh = free
+            if x >= fx + fw or right <= fx or y >= fy + fh or top <= fy:
+                result.append(free)
+                continue
+            if x > fx:
+                result.append((fx, fy, x - fx, fh))
+            if right < fx + fw:
+                result.append((right, fy, fx + fw - right, fh))
+            if y > fy:
+                result.append((fx, fy, fw, y - fy))
+            if top < fy + fh:
+                result.append((fx, top, fw, fy + fh - top))
+        self.free = _prune(result)
+        self._update_bounds()
+
+
+def _prune(rects: List[Tuple[float, float, float, float]]) -> List[Tuple[float, float, float, float]]:
+    """Elimina i rettangoli liberi contenuti in altri."""
+    rects.sort(key=lambda r: r[2] * r[3], reverse=True)
+    kept: List[Tuple[float, float, float, float]] = []
+    for r in rects:
+        rx, ry, rw, rh = r
+        for kx, ky, kw, kh in kept:
+            if rx >= kx and ry >= ky and rx + rw <= kx + kw and ry + rh <= ky + kh:
+                break
+        else:
+            kept.append(r)
+    return kept
+
+
+def parts_from_cutlist(cutlist: Iterable[Mapping[str, Any]], allow_rotation: bool = True) -> List[Part]:
+    """
+    Pezzi (mm) dalle righe lista taglio (cm), espansi per ``quantita``.
+
+    Le righe con ``venatura`` valorizzata non vengono ruotate (lunghezza
+    lungo la lunghezza lastra).
+    """
+    parts: List[Part] = []
+    for row in cutlist:
+        rotatable = allow_rotation and not row.get("venatura")
+        part = Part(row["nome"], row["lunghezza"] * 10.0, row["larghezza"] * 10.0, rotatable)
+        parts.extend([part] * int(row.get("quantita", 1)))
+    return parts
+
+
+def nest_parts(parts: Sequence[Part], sheet: SheetSpec = SheetSpec()) -> Tuple[List[SheetLayout], List[Part]]:
+    """
+    Annida i pezzi sul minor numero di lastre uguali.
+
+    Pezzi ordinati per lato lungo decrescente; ciascuno va nella posizione
+    migliore tra tutte le lastre aperte, altrimenti apre una lastra nuova.
+
+    Returns:
+        (lastre, pezzi che non entrano nemmeno in una lastra vuota)
+    """
+    usable_w, usable_h = sheet.usable()
+    kerf = sheet.kerf
+    order = sorted(parts, key=lambda p: (max(p.length, p.width), p.length * p.width), reverse=True)
+    # Lato corto minimo dei pezzi ancora da piazzare (da i in poi): le lastre
+    # che non lo contengono più escono dalla ricerca
+    min_short = [0.0] * (len(order) + 1)
+    min_short[len(order)] = float("inf")
+    for i in range(len(order) - 1, -1, -1):
+        min_short[i] = min(min_short[i + 1], min(order[i].length, order[i].width) + kerf)
+
+    bins: List[MaxRectsBin] = []
+    open_bins: List[int] = []
+    placements: List[List[Placement]] = []
+    unplaced: List[Part] = []
+    for n, part in enumerate(order):
+        w, h = part.length + kerf, part.width + kerf
+        long_side, short_side = (w, h) if w >= h else (h, w)
+        best = None
+        for i in open_bins:
+            bin_ = bins[i]
+            if long_side > bin_.max_long or short_side > bin_.max_short:
+                continue
+            found = bin_.find(w, h, part.rotatable)
+            if found is not None and (best is None or found[5] < best[1][5]):
+                best = (i, found)
+        if best is None:
+            bin_ = MaxRectsBin(usable_w, usable_h)
+            found = bin_.find(w, h, part.rotatable)
+            if found is None:
+                unplaced.append(part)
+                continue
+            bins.append(bin_)
+            open_bins.append(len(bins) - 1)
+            placements.append([])
+            best = (len(bins) - 1, found)
+        i, (x, y, pw, ph, rotated, _) = best
+        bins[i].place(x, y, pw, ph)
+        placements[i].append(Placement(part.name, x + sheet.trim, y + sheet.trim, pw - kerf, ph - kerf, rotated))
+        if bins[i].max_short < min_short[n + 1]:
+            open_bins.remove(i)
+    layouts = [SheetLayout(i + 1, sheet, placed) for i, placed in enumerate(placements)]
+    return layouts, unplaced
+
+
+def _nest_group(args: Tuple[str, float, List[Part], SheetSpec]) -> NestingResult:
+    materiale, spessore, parts, sheet = args
+    sheets, unplaced = nest_parts(parts, sheet)
+    return NestingResult(materiale, spessore, sheets, unplaced)
+
+
+def nest_cutlist(
+    cutlist: Iterable[Mapping[str, Any]],
+    sheet: SheetSpec = SheetSpec(),
+    sheets_by_material: Optional[Mapping[str, SheetSpec]] = None,
+    allow_rotation: bool = True,
+    processes: Optional[int] = None,
+    remnants: Optional["RemnantStore"] = None,
+) -> List[NestingResult]:
+    """
+    Nesting di una lista taglio, un gruppo per (materiale, spessore).
+
+    Args:
+        cutlist: righe ``panels_to_cutlist`` / ``iter_project_cutlist`` (cm)
+        sheet: lastra di default
+        sheets_by_material: lastra specifica per materiale
+        allow_rotation: False blocca la rotazione di tutti i pezzi
+        processes: processi del pool; None = automatico (un processo per
+            gruppo fino al numero di CPU, solo da ``PARALLEL_MIN_PARTS``
+            pezzi in su), 1 = sequenziale.
+            Dentro FreeCAD usare 1: il pool rilancerebbe l'eseguibile ospite.
+        remnants: magazzino sfridi da cui prelevare prima delle lastre
+            (viene aggiornato: sfridi usati tolti, ritagli nuovi aggiunti)
+
+    Returns:
+        un ``NestingResult`` per gruppo, nell'ordine di prima comparsa
+    """
+    groups: Dict[Tuple[str, float], List[Mapping[str, Any]]] = {}
+    for row in cutlist:
+        groups.setdefault((row["materiale"], row["spessore"]), []).append(row)
+    sheets_by_material = sheets_by_material or {}
+    jobs = []
+    claims: List[Tuple["RemnantClaim", ...]] = []
+    for (materiale, spessore), rows in groups.items():
+        group_sheet = sheets_by_material.get(materiale, sheet)
+        parts = parts_from_cutlist(rows, allow_rotation)
+        claimed: List["RemnantClaim"] = []
+        if remnants is not None:
+            claimed, parts = remnants.claim_parts(materiale, round(spessore * 10.0, 1), parts, group_sheet.kerf)
+        jobs.append((materiale, spessore, parts, group_sheet))
+        claims.append(tuple(claimed))
+    total = sum(len(job[2]) for job in jobs)
+    if processes is None:
+        processes = min(len(jobs), os.cpu_count() or 1) if total >= PARALLEL_MIN_PARTS else 1
+    if processes <= 1 or len(jobs) <= 1:
+        results = [_nest_group(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processes, len(jobs))) as pool:
+            results = list(pool.map(_nest_group, jobs))
+    return [r._replace(remnant_claims=c) if c else r for r, c in zip(results, claims)]
@@ -0,0 +1,332 @@
+"""
+Calcolo pannelli in batch (colonnare) per molti mobili in un solo passaggio.
+
+Input: tabella colonnare ``{nome_parametro: sequenza}`` con una riga per mobile
+(stesse chiavi di ``normalize_params``; le colonne mancanti prendono i default
+del ``tipo_mobile`` di ogni riga).
+
+Output: dizionario di colonne, una riga per pannello, nello stesso ordine e con
+la stessa geometria di ``build_panel_specs`` applicato riga per riga:
+
+- ``cabinet``: indice riga mobile di provenienza
+- ``kind``: codice famiglia pannello (indice in ``PANEL_KINDS``)
+- ``index``: numero progressivo (Ripiano_N / Anta_N), 0 per gli altri
+- ``size_x`` … ``pos_z``: dimensioni e posizione (cm)
+- ``offsets``: inizio pannelli di ogni mobile (lunghezza n + 1)
+
+Con NumPy il calcolo è vettoriale; senza NumPy si ripiega sul percorso
+scalare (stesso formato, colonne ``array('d')``).
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, List, Mapping, Sequence
+
+from .constants import (
+    DOOR_GAP_BETWEEN_CM,
+    DOOR_GAP_BOTTOM_CM,
+    DOOR_GAP_SIDE_CM,
+    DOOR_GAP_TOP_CM,
+)
+from .models import default_params_for_type
+from .panel_specs import build_panels
+from .panel_table import Panel
+
+try:
+    import numpy as np
+except ImportError:  # NumPy opzionale
+    np = None
+
+# Ordine famiglie = ordine di emissione in build_panel_specs
+PANEL_KINDS = (
+    "Fianco_SX",
+    "Fianco_DX",
+    "Fondo",
+    "Cielo",
+    "Ripiano",
+    "Schienale",
+    "Zoccolo",
+    "Anta",
+)
+_NUMBERED_KINDS = ("Ripiano", "Anta")
+_KIND_CODE = {name: code for code, name in enumerate(PANEL_KINDS)}
+
+_FLOAT_FIELDS = (
+    "larghezza",
+    "altezza",
+    "profondita",
+    "spessore_pannello",
+    "spessore_schienale",
+    "altezza_zoccolo",
+    "arretramento_schienale",
+    "groove_offset_cm",
+    "shelf_front_setback",
+    "spessore_anta",
+)
+_INT_FIELDS = ("num_ripiani", "num_ante")
+_BOOL_FIELDS = ("con_zoccolo",)
+
+PANEL_COLUMNS = ("size_x", "size_y", "size_z", "pos_x", "pos_y", "pos_z")
+
+# Codici montaggio schienale (vedi panel_specs._back_inset_cm)
+_BACK_FLUSH = 0
+_BACK_GROOVE = 1
+_BACK_CUSTOM = 2
+
+
+def _back_code(tipo: Any) -> int:
+    if "Incastrato" in str(tipo):
+        return _BACK_GROOVE
+    if tipo == "Arretrato custom":
+        return _BACK_CUSTOM
+    return _BACK_FLUSH
+
+
+def rows_to_columns(rows: Sequence[Mapping[str, Any]]) -> Dict[str, List[Any]]:
+    """Converte una lista di dict parametri in tabella colonnare (chiavi unite)."""
+    keys: Dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            keys.setdefault(key, None)
+    columns: Dict[str, List[Any]] = {key: [] for key in keys}
+    for row in rows:
+        tipo = row.get("tipo_mobile", "Mobile Base")
+        defaults = None
+        for key, col in columns.items():
+            if key in row:
+                col.append(row[key])
+            else:
+                if defaults is None:
+                    defaults = default_params_for_type(tipo)
+                col.append(defaults.get(key))
+    return columns
+
+
+def _table_length(columns: Mapping[str, Sequence[Any]]) -> int:
+    lengths = {len(col) for col in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("Colonne di lunghezza diversa: {}".format(sorted(lengths)))
+    return lengths.pop() if lengths else 0
+
+
+def prepare_columns(columns: Mapping[str, Sequence[Any]]) -> Dict[str, Any]:
+    """
+    Normalizza la tabella colonnare in array NumPy tipizzati.
+
+    Le colonne assenti sono riempite con i default del tipo di ogni riga;
+    ``tipo_schienale`` diventa il codice intero ``back_code``.
+    """
+    n = _table_length(columns)
+    tipo = list(columns.get("tipo_mobile", ["Mobile Base"] * n))
+    tipi = sorted(set(tipo))
+    lookup = {t: i for i, t in enumerate(tipi)}
+    tipo_idx = np.fromiter((lookup[t] for t in tipo), dtype=np.intp, count=n)
+    defaults = [default_params_for_type(t) for t in tipi]
+
+    def column(key: str, dtype: Any) -> Any:
+        if key in columns:
+            return np.asarray(columns[key], dtype=dtype)
+        return np.asarray([d[key] for d in defaults], dtype=dtype)[tipo_idx]
+
+    out: Dict[str, Any] = {"n": n, "tipo_mobile": tipo}
+    for key in _FLOAT_FIELDS:
+        out[key] = column(key, np.float64)
+    for key in _INT_FIELDS:
+        out[key] = column(key, np.int64)
+    for key in _BOOL_FIELDS:
+        out[key] = column(key, bool)
+
+    back = column("tipo_schienale", object)
+    codes = {t: _back_code(t) for t in set(back)}
+    out["back_code"] = np.fromiter((codes[t] for t in back), dtype=np.int8, count=n)
+    return out
+
+
+def shelf_zone_arrays(cols: Mapping[str, Any]) -> Any:
+    """Versione vettoriale di ``panel_specs._shelf_zone``: (y_fronte, profondità_utile)."""
+    P = cols["profondita"]
+    Ss = cols["spessore_schienale"]
+    code = cols["back_code"]
+    inset = np.where(
+        code == _BACK_GROOVE,
+        cols["groove_offset_cm"],
+        np.where(code == _BACK_CUSTOM, cols["arretramento_schienale"], 0.0),
+    )
+    y_front = cols["shelf_front_setback"]
+    depth = (P - inset - Ss) - y_front
+    return y_front, np.maximum(0.0, depth)
+
+
+def door_width_array(cols: Mapping[str, Any]) -> Any:
+    """Larghezza anta per riga (come ``_door_panels``); NaN se num_ante <= 0."""
+    L = cols["larghezza"]
+    S = cols["spessore_pannello"]
+    na = cols["num_ante"]
+    total_gaps = 2 * DOOR_GAP_SIDE_CM + np.maximum(0, na - 1) * DOOR_GAP_BETWEEN_CM
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(na > 0, ((L - 2 * S) - total_gaps) / np.where(na > 0, na, 1), np.nan)
+
+
+def _zoccolo_height(cols: Mapping[str, Any]) -> Any:
+    return np.where(cols["con_zoccolo"], cols["altezza_zoccolo"], 0.0)
+
+
+def _family(kind: int, rows: Any, index: Any, sx: Any, sy: Any, sz: Any, x: Any, y: Any, z: Any) -> Dict[str, Any]:
+    m = len(rows)
+
+    def fit(v: Any) -> Any:
+        return np.broadcast_to(np.asarray(v, dtype=np.float64), (m,))
+
+    return {
+        "cabinet": rows,
+        "kind": np.full(m, kind, dtype=np.int8),
+        "index": np.broadcast_to(np.asarray(index, dtype=np.int64), (m,)),
+        "size_x": fit(sx),
+        "size_y": fit(sy),
+        "size_z": fit(sz),
+        "pos_x": fit(x),
+        "pos_y": fit(y),
+        "pos_z": fit(z),
+    }
+
+
+def _expand(counts: Any) -> Any:
+    """Per conteggi per riga: (indice_riga, numero_progressivo 1-based)."""
+    rows = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    number = np.arange(len(rows)) - np.repeat(starts, counts) + 1
+    return rows, number
+
+
+def _build_vectorized(columns: Mapping[str, Sequence[Any]]) -> Dict[str, Any]:
+    cols = prepare_columns(columns)
+    n = cols["n"]
+    L = cols["larghezza"]
+    H = cols["altezza"]
+    P = cols["profondita"]
+    S = cols["spessore_pannello"]
+    Ss = cols["spessore_schienale"]
+    Hz = _zoccolo_height(cols)
+    inner_L = L - 2 * S
+    all_rows = np.arange(n)
+
+    families = [
+        _family(0, all_rows, 0, S, P, H, 0.0, 0.0, 0.0),
+        _family(1, all_rows, 0, S, P, H, L - S, 0.0, 0.0),
+        _family(2, all_rows, 0, inner_L, P, S, S, 0.0, Hz),
+        _family(3, all_rows, 0, inner_L, P, S, S, 0.0, H - S),
+    ]
+
+    # Ripiani: interasse uniforme nell'altezza interna
+    nr = cols["num_ripiani"]
+    y_front, shelf_depth = shelf_zone_arrays(cols)
+    counts = np.where((nr > 0) & (shelf_depth > 0.1), nr, 0)
+    rows, number = _expand(counts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        interasse = ((H - 2 * S) - Hz) / (nr + 1)
+    families.append(
+        _family(
+            4,
+            rows,
+            number,
+            inner_L[rows],
+            shelf_depth[rows],
+            S[rows],
+            S[rows],
+            y_front[rows],
+            (Hz + S)[rows] + interasse[rows] * number,
+        )
+    )
+
+    # Schienale
+    code = cols["back_code"]
+    y_sch = np.where(
+        code == _BACK_GROOVE,
+        P - cols["groove_offset_cm"] - Ss,
+        np.where(code == _BACK_CUSTOM, P - Ss - cols["arretramento_schienale"], P - Ss),
+    )
+    families.append(_family(5, all_rows, 0, inner_L, Ss, H - 2 * S, S, y_sch, S))
+
+    # Zoccolo
+    rows = np.nonzero(cols["con_zoccolo"] & (Hz > 0))[0]
+    families.append(_family(6, rows, 0, inner_L[rows], Hz[rows], S[rows], S[rows], 5.0, -Hz[rows]))
+
+    # Ante davanti alla carcassa
+    na = cols["num_ante"]
+    rows, number = _expand(np.maximum(na, 0))
+    door_w = door_width_array(cols)[rows]
+    door_t = cols["spessore_anta"][rows]
+    carcass_h = ((H - Hz) - 2 * S)[rows]
+    door_h = np.maximum(0.1, carcass_h - DOOR_GAP_TOP_CM - DOOR_GAP_BOTTOM_CM)
+    z0 = (Hz + S)[rows] + DOOR_GAP_BOTTOM_CM
+    x = S[rows] + DOOR_GAP_SIDE_CM + (number - 1) * (door_w + DOOR_GAP_BETWEEN_CM)
+    families.append(_family(7, rows, number, door_w, door_t, door_h, x, -door_t, z0))
+
+    out = {key: np.concatenate([f[key] for f in families]) for key in families[0]}
+    order = np.lexsort((out["index"], out["kind"], out["cabinet"]))
+    out = {key: col[order] for key, col in out.items()}
+    out["offsets"] = np.concatenate(([0], np.cumsum(np.bincount(out["cabinet"], minlength=n))))
+    return out
+
+
+def _split_name(name: str) -> Any:
+    kind, _, number = name.rpartition("_")
+    if kind in _NUMBERED_KINDS:
+        return _KIND_CODE[kind], int(number)
+    return _KIND_CODE[name], 0
+
+
+def _build_scalar(columns: Mapping[str, Sequence[Any]]) -> Dict[str, Any]:
+    n = _table_length(columns)
+    keys = list(columns)
+    out: Dict[str, Any] = {
+        "cabinet": array("l"),
+        "kind": array("b"),
+        "index": array("l"),
+        "offsets": array("l", [0]),
+    }
+    for key in PANEL_COLUMNS:
+        out[key] = array("d")
+    for row in range(n):
+        panels = build_panels({key: columns[key][row] for key in keys})
+        for panel in panels:
+            kind, number = _split_name(panel["name"])
+            out["cabinet"].append(row)
+            out["kind"].append(kind)
+            out["index"].append(number)
+            for key in PANEL_COLUMNS:
+                out[key].append(panel[key])
+        out["offsets"].append(len(out["cabinet"]))
+    return out
+
+
+def build_panel_specs_batch(columns: Mapping[str, Sequence[Any]]) -> Dict[str, Any]:
+    """
+    Calcola i pannelli di tutti i mobili della tabella in un solo passaggio.
+
+    Stessa geometria di ``build_panel_specs`` riga per riga (interasse ripiani,
+    posizione schienale, giochi ante); vedi docstring del modulo per il formato.
+    """
+    if np is None:
+        return _build_scalar(columns)
+    return _build_vectorized(columns)
+
+
+def batch_panel_names(batch: Mapping[str, Any]) -> List[str]:
+    """Nomi pannello (Fianco_SX, Ripiano_1, …) per ogni riga del batch."""
+    names: List[str] = []
+    for kind, number in zip(batch["kind"], batch["index"]):
+        label = PANEL_KINDS[kind]
+        names.append("{}_{}".format(label, number) if label in _NUMBERED_KINDS else label)
+    return names
+
+
+def batch_cabinet_specs(batch: Mapping[str, Any], cabinet: int) -> List[Panel]:
+    """Ricostruisce i pannelli (come build_panels) di un mobile del batch."""
+    start, stop = int(batch["offsets"][cabinet]), int(batch["offsets"][cabinet + 1])
+    sub = {"kind": batch["kind"][start:stop], "index": batch["index"][start:stop]}
+    return [
+        Panel(name, *(float(batch[key][start + i]) for key in PANEL_COLUMNS))
+        for i, name in enumerate(batch_panel_names(sub))
+    ]
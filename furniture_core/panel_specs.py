@@ -9,11 +9,14 @@ Regole allineate a FurnitureAI-Professional (cabinet_generator):
 - Fondo/Cielo: larghezza interna (L - 2S), tra i fianchi, profondità piena.
 - Ripiani: stessa larghezza, arretrati dal fronte, accorciati sul retro (schienale + scanalatura).
 - Ante: generate davanti alla carcassa se num_ante > 0.
+
+``build_panel_specs`` restituisce dict (formato storico); ``build_panels``
+restituisce ``Panel`` (record immutabile, più compatto) per i percorsi interni.
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Tuple
 
 from .constants import (
     DEFAULT_DOOR_THICKNESS_CM,
@@ -24,19 +27,12 @@ from .constants import (
     GROOVE_OFFSET_CM,
     SHELF_FRONT_SETBACK_CM,
 )
-from .models import normalize_params
+from .models import ensure_params
+from .panel_table import Panel
 
 
-def _box(name: str, sx: float, sy: float, sz: float, x: float, y: float, z: float) -> Dict[str, Any]:
-    return {
-        "name": name,
-        "size_x": sx,
-        "size_y": sy,
-        "size_z": sz,
-        "pos_x": x,
-        "pos_y": y,
-        "pos_z": z,
-    }
+def _box(name: str, sx: float, sy: float, sz: float, x: float, y: float, z: float) -> Panel:
+    return Panel(name, sx, sy, sz, x, y, z)
 
 
 def _back_inset_cm(params: Dict[str, Any]) -> float:
@@ -74,84 +70,167 @@ def _shelf_zone(params: Dict[str, Any], P: float, S: float, Ss: float) -> Tuple[
     return y_front, max(0.0, depth)
 
 
+def _door_width(L: float, S: float, num_ante: int) -> float:
+    """Larghezza di ogni anta (cm) ripartendo la luce interna con i giochi standard."""
+    total_gaps = 2 * DOOR_GAP_SIDE_CM + max(0, num_ante - 1) * DOOR_GAP_BETWEEN_CM
+    return ((L - 2 * S) - total_gaps) / num_ante
+
+
 def _door_panels(
     params: Dict[str, Any],
     L: float,
     H: float,
     S: float,
     Hz: float,
-) -> List[Dict[str, Any]]:
+) -> List[Panel]:
     """Genera specifiche ante davanti alla carcassa."""
     num_ante = int(params.get("num_ante", 0))
     if num_ante <= 0:
         return []
 
     door_t = float(params.get("spessore_anta", DEFAULT_DOOR_THICKNESS_CM))
-    inner_w = L - 2 * S
     carcass_h = H - Hz - 2 * S
     gap_s = DOOR_GAP_SIDE_CM
     gap_t = DOOR_GAP_TOP_CM
     gap_b = DOOR_GAP_BOTTOM_CM
     gap_mid = DOOR_GAP_BETWEEN_CM
 
-    total_gaps = 2 * gap_s + max(0, num_ante - 1) * gap_mid
-    door_w = (inner_w - total_gaps) / num_ante
+    door_w = _door_width(L, S, num_ante)
     door_h = max(0.1, carcass_h - gap_t - gap_b)
     z0 = Hz + S + gap_b
 
-    panels: List[Dict[str, Any]] = []
+    panels: List[Panel] = []
     for i in range(num_ante):
         x = S + gap_s + i * (door_w + gap_mid)
         panels.append(_box(f"Anta_{i + 1}", door_w, door_t, door_h, x, -door_t, z0))
     return panels
 
 
-def build_panel_specs(raw_params: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """
-    Calcola elenco pannelli per mobile base / pensile / armadio.
-    """
-    params = normalize_params(raw_params)
-    panels: List[Dict[str, Any]] = []
+def _zoccolo_cm(params: Dict[str, Any]) -> float:
+    """Altezza zoccolo effettiva (0 se assente), cm."""
+    return float(params.get("altezza_zoccolo", 0.0)) if params.get("con_zoccolo") else 0.0
 
-    L = params["larghezza"]
-    H = params["altezza"]
-    P = params["profondita"]
-    S = params["spessore_pannello"]
-    Ss = params["spessore_schienale"]
-    Hz = float(params.get("altezza_zoccolo", 0.0)) if params.get("con_zoccolo") else 0.0
 
-    inner_L = L - 2 * S
+def _side_panels(params: Dict[str, Any]) -> List[Panel]:
+    """Fianchi (profondità piena)."""
+    L, H, P, S = params["larghezza"], params["altezza"], params["profondita"], params["spessore_pannello"]
+    return [
+        _box("Fianco_SX", S, P, H, 0, 0, 0),
+        _box("Fianco_DX", S, P, H, L - S, 0, 0),
+    ]
 
-    # Fianchi (profondità piena)
-    panels.append(_box("Fianco_SX", S, P, H, 0, 0, 0))
-    panels.append(_box("Fianco_DX", S, P, H, L - S, 0, 0))
 
-    # Fondo e cielo — tra i fianchi (non larghezza piena)
-    panels.append(_box("Fondo", inner_L, P, S, S, 0, Hz))
-    panels.append(_box("Cielo", inner_L, P, S, S, 0, H - S))
+def _bottom_top_panels(params: Dict[str, Any]) -> List[Panel]:
+    """Fondo e cielo — tra i fianchi (non larghezza piena)."""
+    L, H, P, S = params["larghezza"], params["altezza"], params["profondita"], params["spessore_pannello"]
+    inner_L = L - 2 * S
+    return [
+        _box("Fondo", inner_L, P, S, S, 0, _zoccolo_cm(params)),
+        _box("Cielo", inner_L, P, S, S, 0, H - S),
+    ]
+
 
-    # Ripiani intermedi
+def _shelf_panels(params: Dict[str, Any]) -> List[Panel]:
+    """Ripiani intermedi a interasse uniforme."""
     num_ripiani = int(params.get("num_ripiani", 0))
-    if num_ripiani > 0:
-        y_front, shelf_depth = _shelf_zone(params, P, S, Ss)
-        if shelf_depth > 0.1:
-            altezza_interna = H - 2 * S - Hz
-            interasse = altezza_interna / (num_ripiani + 1)
-            for i in range(num_ripiani):
-                z_pos = Hz + S + interasse * (i + 1)
-                panels.append(
-                    _box(f"Ripiano_{i + 1}", inner_L, shelf_depth, S, S, y_front, z_pos)
-                )
-
-    # Schienale
+    if num_ripiani <= 0:
+        return []
+    L, H, P, S = params["larghezza"], params["altezza"], params["profondita"], params["spessore_pannello"]
+    Ss = params["spessore_schienale"]
+    Hz = _zoccolo_cm(params)
+    y_front, shelf_depth = _shelf_zone(params, P, S, Ss)
+    if shelf_depth <= 0.1:
+        return []
+    inner_L = L - 2 * S
+    altezza_interna = H - 2 * S - Hz
+    interasse = altezza_interna / (num_ripiani + 1)
+    panels: List[Panel] = []
+    for i in range(num_ripiani):
+        z_pos = Hz + S + interasse * (i + 1)
+        panels.append(_box(f"Ripiano_{i + 1}", inner_L, shelf_depth, S, S, y_front, z_pos))
+    return panels
+
+
+def _back_panels(params: Dict[str, Any]) -> List[Panel]:
+    """Schienale."""
+    L, H, P, S = params["larghezza"], params["altezza"], params["profondita"], params["spessore_pannello"]
+    Ss = params["spessore_schienale"]
     y_sch = _schienale_position_y(params, P, S, Ss)
-    panels.append(_box("Schienale", inner_L, Ss, H - 2 * S, S, y_sch, S))
+    return [_box("Schienale", L - 2 * S, Ss, H - 2 * S, S, y_sch, S)]
+
+
+def _plinth_panels(params: Dict[str, Any]) -> List[Panel]:
+    """Zoccolo."""
+    Hz = _zoccolo_cm(params)
+    if not (params.get("con_zoccolo") and Hz > 0):
+        return []
+    L, S = params["larghezza"], params["spessore_pannello"]
+    return [_box("Zoccolo", L - 2 * S, Hz, S, S, 5, -Hz)]
+
+
+def _front_panels(params: Dict[str, Any]) -> List[Panel]:
+    """Ante."""
+    return _door_panels(
+        params,
+        params["larghezza"],
+        params["altezza"],
+        params["spessore_pannello"],
+        _zoccolo_cm(params),
+    )
+
+
+_CARCASS = frozenset({"larghezza", "altezza", "profondita", "spessore_pannello"})
+_PLINTH = frozenset({"con_zoccolo", "altezza_zoccolo"})
+_BACK = frozenset({"tipo_schienale", "groove_offset_cm", "arretramento_schienale", "spessore_schienale"})
+
+# (famiglia, prefisso nomi, costruttore, parametri da cui dipende), in ordine di emissione
+PANEL_FAMILIES: Tuple[Tuple[str, Tuple[str, ...], Callable[[Dict[str, Any]], List[Panel]], FrozenSet[str]], ...] = (
+    ("fianchi", ("Fianco",), _side_panels, _CARCASS),
+    ("fondo_cielo", ("Fondo", "Cielo"), _bottom_top_panels, _CARCASS | _PLINTH),
+    (
+        "ripiani",
+        ("Ripiano",),
+        _shelf_panels,
+        _CARCASS | _PLINTH | _BACK | {"num_ripiani", "shelf_front_setback"},
+    ),
+    ("schienale", ("Schienale",), _back_panels, _CARCASS | _BACK),
+    ("zoccolo", ("Zoccolo",), _plinth_panels, frozenset({"larghezza", "spessore_pannello"}) | _PLINTH),
+    (
+        "ante",
+        ("Anta",),
+        _front_panels,
+        frozenset({"larghezza", "altezza", "spessore_pannello", "num_ante", "spessore_anta"}) | _PLINTH,
+    ),
+)
+
+
+def panel_family(name: str) -> str:
+    """Famiglia di un pannello dal nome (Fianco_SX → fianchi, Ripiano_2 → ripiani …)."""
+    prefix = name.split("_", 1)[0]
+    for family, prefixes, _, _ in PANEL_FAMILIES:
+        if prefix in prefixes:
+            return family
+    raise KeyError(name)
 
-    # Zoccolo
-    if params.get("con_zoccolo") and Hz > 0:
-        panels.append(_box("Zoccolo", inner_L, Hz, S, S, 5, -Hz))
 
-    # Ante
-    panels.extend(_door_panels(params, L, H, S, Hz))
+def build_panels(raw_params: Mapping[str, Any]) -> List[Panel]:
+    """
+    Calcola elenco pannelli come record ``Panel`` (immutabili, compatti).
 
+    Accetta dict grezzi o ``CabinetParams`` (già normalizzati, non rielaborati).
+    """
+    params = ensure_params(raw_params)
+    panels: List[Panel] = []
+    for _, _, builder, _ in PANEL_FAMILIES:
+        panels.extend(builder(params))
     return panels
+
+
+def build_panel_specs(raw_params: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Calcola elenco pannelli per mobile base / pensile / armadio.
+
+    Un dict per pannello (name, size_x/y/z, pos_x/y/z); per i record
+    compatti usare ``build_panels``.
+    """
+    return [panel.as_dict() for panel in build_panels(raw_params)]
@@ -0,0 +1,178 @@
+"""
+Rappresentazione compatta dei pannelli.
+
+- ``Panel``: record immutabile (NamedTuple) al posto del dict a 7 chiavi
+  (``build_panels``); si legge anche per chiave (``panel["size_x"]``,
+  ``dict(panel)``) ma resta una tupla: ``in``, iterazione e JSON vedono i
+  valori. Dove serve un dict vero: ``as_dict()`` o ``build_panel_specs``.
+- ``PanelTable``: tabella colonnare (``array('d')``) con dimensioni di taglio
+  (lunghezza ≥ larghezza ≥ spessore) calcolate una sola volta all'inserimento.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Tuple, Union
+
+PANEL_FIELDS = ("name", "size_x", "size_y", "size_z", "pos_x", "pos_y", "pos_z")
+_GEOMETRY_FIELDS = PANEL_FIELDS[1:]
+_CUT_FIELDS = ("lunghezza", "larghezza", "spessore")
+
+
+class Panel(NamedTuple):
+    """Pannello (cm): dimensioni lungo X/Y/Z e posizione origine."""
+
+    name: str
+    size_x: float
+    size_y: float
+    size_z: float
+    pos_x: float
+    pos_y: float
+    pos_z: float
+
+    def __getitem__(self, key: Any) -> Any:
+        # Accesso per chiave come il vecchio dict; indici interi come tupla
+        if isinstance(key, str):
+            if key in PANEL_FIELDS:
+                return getattr(self, key)
+            raise KeyError(key)
+        return tuple.__getitem__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in PANEL_FIELDS else default
+
+    def keys(self) -> Tuple[str, ...]:
+        return PANEL_FIELDS
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        return zip(PANEL_FIELDS, self)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Copia dict (formato di build_panel_specs)."""
+        return dict(zip(PANEL_FIELDS, self))
+
+    def cut_dimensions(self) -> Tuple[float, float, float]:
+        """(lunghezza, larghezza, spessore) in cm, in ordine decrescente."""
+        return _sorted3(self.size_x, self.size_y, self.size_z)
+
+
+PanelLike = Union[Panel, Mapping[str, Any]]
+
+
+def _sorted3(a: float, b: float, c: float) -> Tuple[float, float, float]:
+    if a < b:
+        a, b = b, a
+    if b < c:
+        b, c = c, b
+        if a < b:
+            a, b = b, a
+    return a, b, c
+
+
+def as_panel(spec: PanelLike) -> Panel:
+    """Converte dict pannello (o Panel) in Panel."""
+    if isinstance(spec, Panel):
+        return spec
+    return Panel(*(spec[key] for key in PANEL_FIELDS))
+
+
+class PanelTable:
+    """Tabella pannelli colonnare: un ``array('d')`` per campo numerico."""
+
+    __slots__ = ("names",) + _GEOMETRY_FIELDS + _CUT_FIELDS
+
+    def __init__(self, panels: Iterable[PanelLike] = ()):
+        self.names: List[str] = []
+        for key in _GEOMETRY_FIELDS + _CUT_FIELDS:
+            setattr(self, key, array("d"))
+        self.extend(panels)
+
+    def append(self, spec: PanelLike) -> None:
+        panel = as_panel(spec)
+        self.names.append(panel.name)
+        self.size_x.append(panel.size_x)
+        self.size_y.append(panel.size_y)
+        self.size_z.append(panel.size_z)
+        self.pos_x.append(panel.pos_x)
+        self.pos_y.append(panel.pos_y)
+        self.pos_z.append(panel.pos_z)
+        length, width, thickness = _sorted3(panel.size_x, panel.size_y, panel.size_z)
+        self.lunghezza.append(length)
+        self.larghezza.append(width)
+        self.spessore.append(thickness)
+
+    def extend(self, panels: Iterable[PanelLike]) -> None:
+        for spec in panels:
+            self.append(spec)
+
+    @classmethod
+    def from_batch(cls, batch: Mapping[str, Any]) -> "PanelTable":
+        """Tabella da risultato ``build_panel_specs_batch`` (senza passare per Panel)."""
+        from .panel_batch import batch_panel_names
+
+        table = cls()
+        table.names = batch_panel_names(batch)
+        for key in _GEOMETRY_FIELDS:
+            getattr(table, key).extend(float(v) for v in batch[key])
+        for i in range(len(table.names)):
+            length, width, thickness = _sorted3(table.size_x[i], table.size_y[i], table.size_z[i])
+            table.lunghezza.append(length)
+            table.larghezza.append(width)
+            table.spessore.append(thickness)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, i: int) -> Panel:
+        return Panel(
+            self.names[i],
+            self.size_x[i],
+            self.size_y[i],
+            self.size_z[i],
+            self.pos_x[i],
+            self.pos_y[i],
+            self.pos_z[i],
+        )
+
+    def __iter__(self) -> Iterator[Panel]:
+        return map(
+            Panel,
+            self.names,
+            self.size_x,
+            self.size_y,
+            self.size_z,
+            self.pos_x,
+            self.pos_y,
+            self.pos_z,
+        )
+
+    def iter_cut_dimensions(self) -> Iterator[Tuple[str, float, float, float]]:
+        """(nome, lunghezza, larghezza, spessore) già ordinati, senza ricalcolo."""
+        return zip(self.names, self.lunghezza, self.larghezza, self.spessore)
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        """Adattatore compatibilità: lista di dict come build_panel_specs."""
+        return [panel.as_dict() for panel in self]
+
+    def nbytes(self) -> int:
+        """Memoria occupata dalle colonne numeriche (byte)."""
+        return sum(
+            getattr(self, key).itemsize * len(getattr(self, key))
+            for key in _GEOMETRY_FIELDS + _CUT_FIELDS
+        )
+
+
+def iter_cut_dimensions(
+    panels: Union[PanelTable, Iterable[PanelLike]],
+) -> Iterator[Tuple[str, float, float, float]]:
+    """
+    (nome, lunghezza, larghezza, spessore) in cm per ogni pannello.
+
+    Accetta PanelTable (dimensioni precalcolate), Panel o dict storici.
+    """
+    if isinstance(panels, PanelTable):
+        yield from panels.iter_cut_dimensions()
+        return
+    for spec in panels:
+        yield (spec["name"],) + _sorted3(spec["size_x"], spec["size_y"], spec["size_z"])
@@ -1,34 +1,69 @@
 """
 Parser descrizioni in linguaggio naturale (senza IA).
+
+I pattern sono compilati una volta in un'unica espressione: una sola
+scansione del testo raccoglie misure e quantità. Le
+descrizioni ripetute (fogli ordine importati) escono da una cache LRU.
+
+``iter_project_description`` legge ordini multi-modulo ("cucina 4 moduli
+base 60 cm con 2 ante, 3 pensili 80 cm") e li dispone in pianta.
 """
 
 from __future__ import annotations
 
 import re
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-from .models import default_params_for_type, normalize_params
+from .assembly_spec import suggest_module_name
+from .constants import WALL_UNIT_BOTTOM_CM
+from .models import CabinetParams, _type_defaults, normalize_params
+from .spec_cache import LRUCache
 
+# Un solo pattern per tutte le misure: prefisso opzionale (larghezza /
+# altezza / profondità), numero, suffisso opzionale (ripiani / ante /
+# cassetti). Lo stesso numero può valere per entrambi ("l=3 ante"), come
+# con le ricerche separate di prima.
+_TOKEN_RE = re.compile(
+    r"(?:(?P<pre>larg|alt|prof)|(?P<pre1>[lhp])[=:]?\s*)?"
+    r"(?P<num>\d+(?:\.\d+)?)"
+    r"(?:\s*(?P<suf>ripian|ant|cassett))?"
+)
+_PREFIX_KEYS = {
+    "larg": "larghezza",
+    "l": "larghezza",
+    "alt": "altezza",
+    "h": "altezza",
+    "prof": "profondita",
+    "p": "profondita",
+}
+_SUFFIX_KEYS = {"ripian": "num_ripiani", "ant": "num_ante", "cassett": "num_cassetti"}
+
+DEFAULT_PARSE_CACHE_SIZE = 4096
+_PARSED = LRUCache(DEFAULT_PARSE_CACHE_SIZE)
 
-def parse_description(description: str, tipo_mobile: str = "Mobile Base") -> Dict[str, Any]:
-    """
-    Estrae parametri da testo libero (regex).
-    Compatibile con i formati supportati dall'add-in Fusion.
-    """
-    desc_lower = description.lower()
-    params = default_params_for_type(tipo_mobile)
 
-    width_match = re.search(r"(?:larg|l[=:]?\s*)(\d+(?:\.\d+)?)\s*(?:cm)?", desc_lower)
-    if width_match:
-        params["larghezza"] = float(width_match.group(1))
+def _scan(desc_lower: str) -> Dict[str, Any]:
+    """Una passata sul testo: prima occorrenza di ogni misura / quantità."""
+    values: Dict[str, Any] = {}
+    for pre, pre1, num, suf in _TOKEN_RE.findall(desc_lower):
+        prefix = pre or pre1
+        if prefix:
+            key = _PREFIX_KEYS[prefix]
+            if key not in values:
+                values[key] = float(num)
+        if suf:
+            key = _SUFFIX_KEYS[suf]
+            if key not in values:
+                # "(\d+)\s*ant": conta solo le cifre subito prima del suffisso
+                values[key] = int(num.rpartition(".")[2])
+    return values
 
-    height_match = re.search(r"(?:alt|h[=:]?\s*)(\d+(?:\.\d+)?)\s*(?:cm)?", desc_lower)
-    if height_match:
-        params["altezza"] = float(height_match.group(1))
 
-    depth_match = re.search(r"(?:prof|p[=:]?\s*)(\d+(?:\.\d+)?)\s*(?:cm)?", desc_lower)
-    if depth_match:
-        params["profondita"] = float(depth_match.group(1))
+def _parse(description: str, tipo_mobile: str) -> Dict[str, Any]:
+    desc_lower = description.lower()
+    values = _scan(desc_lower)
+    params = _type_defaults(tipo_mobile).copy()
+    params.update(values)
 
     if "pensile" in desc_lower or "sospeso" in desc_lower:
         params["tipo_mobile"] = "Pensile"
@@ -40,29 +75,149 @@ def parse_description(description: str, tipo_mobile: str = "Mobile Base") -> Dic
     elif "anta" in desc_lower and "ante" not in desc_lower:
         params["tipo_mobile"] = "Anta"
 
-    if "pensile" in desc_lower:
-        params.setdefault("altezza", 70.0)
-        params.setdefault("profondita", 35.0)
-    elif "cucina" in desc_lower or "base" in desc_lower:
-        params.setdefault("altezza", 90.0)
-        params.setdefault("profondita", 60.0)
-    elif "armadio" in desc_lower:
-        params.setdefault("altezza", 220.0)
+    if "num_ante" in values:
+        params["num_cerniere"] = values["num_ante"] * 2
+    if "incastr" in desc_lower:
+        params["tipo_schienale"] = "Incastrato (scanalatura 10mm)"
 
-    shelves_match = re.search(r"(\d+)\s*ripian", desc_lower)
-    if shelves_match:
-        params["num_ripiani"] = int(shelves_match.group(1))
+    return normalize_params(params)
 
-    doors_match = re.search(r"(\d+)\s*ant", desc_lower)
-    if doors_match:
-        params["num_ante"] = int(doors_match.group(1))
-        params["num_cerniere"] = params["num_ante"] * 2
 
-    drawers_match = re.search(r"(\d+)\s*cassett", desc_lower)
-    if drawers_match:
-        params["num_cassetti"] = int(drawers_match.group(1))
+def parse_description(description: str, tipo_mobile: str = "Mobile Base") -> Dict[str, Any]:
+    """
+    Estrae parametri da testo libero (regex).
+    Compatibile con i formati supportati dall'add-in Fusion.
+    """
+    parsed = _PARSED.get_or_compute((description, tipo_mobile), lambda: _parse(description, tipo_mobile))
+    return parsed.copy()
 
-    if "incastr" in desc_lower:
-        params["tipo_schienale"] = "Incastrato (scanalatura 10mm)"
 
-    return normalize_params(params)
+def parse_many(lines: Iterable[str], tipo_mobile: str = "Mobile Base") -> Iterator[Dict[str, Any]]:
+    """
+    Parametri per ogni riga di un foglio ordine (generatore, una riga alla volta).
+
+    Le righe vuote vengono saltate; le righe ripetute usano la cache.
+    """
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield parse_description(line, tipo_mobile)
+
+
+# --- Progetti multi-modulo -------------------------------------------------
+
+# "4 moduli", "3 pensili", "2x armadio": quantità opzionale + sostantivo
+_GROUP_RE = re.compile(
+    r"(?:(?P<qty>\d+)\s*(?:x\s*)?)?\b(?P<noun>modul[oi]|mobil[ei]|bas[ei]|cassettier[ae]|pensil[ei]|armad(?:io|i)|colonn[ae])\b"
+)
+_NOUN_TYPES = (("pensil", "Pensile"), ("armad", "Armadio"), ("colonn", "Armadio"))
+# "60 cm" senza prefisso = larghezza; "alto 90 cm", "profondo 35 cm" ammessi
+_WORD_MEASURE_RE = re.compile(r"(?:(?P<word>[^\W\d_]+)\s+)?(?P<num>\d+(?:\.\d+)?)\s*cm\b")
+_WORD_KEYS = (("alt", "altezza"), ("prof", "profondita"), ("larg", "larghezza"))
+_SEGMENT_SPLIT_RE = re.compile(r"[,;\n]")
+
+_ROW_PREFIX = {"base": "Modulo", "pensili": "Pensile"}
+
+
+def _word_measures(desc_lower: str) -> Dict[str, float]:
+    """Misure scritte a parole ("alto 90 cm") o nude ("60 cm" = larghezza)."""
+    values: Dict[str, float] = {}
+    for match in _WORD_MEASURE_RE.finditer(desc_lower):
+        word = match.group("word") or ""
+        key = next((k for stem, k in _WORD_KEYS if word.startswith(stem)), "larghezza")
+        values.setdefault(key, float(match.group("num")))
+    return values
+
+
+def _group_params(text: str, tipo_mobile: str) -> Dict[str, Any]:
+    params = parse_description(text, tipo_mobile)
+    explicit = _scan(text.lower())
+    for key, value in _word_measures(text.lower()).items():
+        if key not in explicit:
+            params[key] = value
+    return params
+
+
+def _iter_groups(paragraph: str) -> Iterator[Tuple[int, str, str]]:
+    """(quantità, tipo, testo) per ogni gruppo di moduli di un paragrafo."""
+    current: Optional[List[Any]] = None
+    for segment in _SEGMENT_SPLIT_RE.split(paragraph):
+        segment = segment.strip()
+        if not segment:
+            continue
+        match = _GROUP_RE.search(segment.lower())
+        if match is None and current is not None:
+            # "2 ripiani", "con 2 ante": completa il gruppo precedente
+            current[2] += " " + segment
+            continue
+        if current is not None:
+            yield tuple(current)  # type: ignore[misc]
+        qty, tipo = 1, "Mobile Base"
+        if match is not None:
+            qty = int(match.group("qty") or 1)
+            noun = match.group("noun")
+            tipo = next((t for stem, t in _NOUN_TYPES if noun.startswith(stem)), tipo)
+            # La quantità non deve finire tra le misure ("2 cassettiere")
+            segment = segment[: match.start()] + noun + segment[match.end():]
+        current = [qty, tipo, segment]
+    if current is not None:
+        yield tuple(current)  # type: ignore[misc]
+
+
+def _iter_paragraphs(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    lines = source.splitlines() if isinstance(source, str) else source
+    block: List[str] = []
+    for line in lines:
+        if line.strip():
+            block.append(line.rstrip("\n"))
+        elif block:
+            yield "\n".join(block)
+            block = []
+    if block:
+        yield "\n".join(block)
+
+
+def iter_project_description(
+    source: Union[str, Iterable[str]],
+    wall_unit_bottom_cm: float = WALL_UNIT_BOTTOM_CM,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Moduli di un ordine multi-mobile, un paragrafo alla volta.
+
+    Ogni paragrafo (righe separate da riga vuota) è diviso in segmenti su
+    ``,`` ``;`` e a capo; un segmento con quantità e/o sostantivo ("4 moduli
+    base", "3 pensili") apre un gruppo, gli altri ne completano la descrizione.
+
+    Disposizione: basi e colonne affiancate lungo X da 0, pensili su una
+    seconda fila a ``wall_unit_bottom_cm``; schienali tutti sul filo parete
+    (y = 0, fronte verso -Y).
+
+    Restituisce dict nel formato di ``assembly_spec.iter_project_modules``
+    (``params``, ``assembly_name``, ``position_cm``).
+    """
+    cursor = {"base": 0.0, "pensili": 0.0}
+    used = {"base": set(), "pensili": set()}
+    next_n = {"base": 1, "pensili": 1}
+    for paragraph in _iter_paragraphs(source):
+        for qty, tipo, text in _iter_groups(paragraph):
+            params = CabinetParams(_group_params(text, tipo))
+            row = "pensili" if params["tipo_mobile"] == "Pensile" else "base"
+            z = wall_unit_bottom_cm if row == "pensili" else 0.0
+            for _ in range(qty):
+                name = suggest_module_name(used[row], prefix=_ROW_PREFIX[row], start=next_n[row])
+                used[row].add(name)
+                next_n[row] += 1
+                yield {
+                    "params": params,
+                    "assembly_name": name,
+                    "position_cm": (cursor[row], -params["profondita"], z),
+                }
+                cursor[row] += params["larghezza"]
+
+
+def parse_project_description(
+    source: Union[str, Iterable[str]],
+    wall_unit_bottom_cm: float = WALL_UNIT_BOTTOM_CM,
+) -> List[Dict[str, Any]]:
+    """Lista completa dei moduli (vedi ``iter_project_description``)."""
+    return list(iter_project_description(source, wall_unit_bottom_cm))
@@ -0,0 +1,184 @@
+"""
+Export progetto: un programma Xilog per pannello o per ciclo piano.
+
+È il modo in cui l'operatore carica i programmi in macchina: un file per
+pezzo (``modo="pannello"``) oppure uno per carico del piano
+(``modo="ciclo"``, vedi ``bed_layout``). I programmi sono indipendenti e
+vengono scritti in parallelo da un pool di processi (in sequenza dentro
+FreeCAD); ogni processo carica la libreria utensili una sola volta. Nomi
+file e ordine dipendono solo dal progetto (non dal numero di processi) e
+``manifest.json`` li elenca con i pezzi contenuti.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .assembly_spec import ProjectItem, iter_panel_specs, safe_object_name
+from .bed_layout import BedCycle, BedSpec
+from .xilog_export import (
+    TLGLibrary,
+    XilogGenerator,
+    _bed_cycles,
+    _cabinet_description,
+    _emit_panel,
+    _program_intro,
+    _render_bed_cycle,
+    atomic_write,
+)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+EXPORT_MODES = ("pannello", "ciclo")
+
+# Sotto questa soglia di programmi il pool di processi costa più di quanto rende
+PARALLEL_MIN_PROGRAMS = 64
+
+# Stato per processo: libreria utensili caricata una volta da _init_worker
+_WORKER: Dict[str, Any] = {}
+
+
+class ExportedProgram(NamedTuple):
+    """Programma scritto: file, nome, pezzi contenuti, spessore (mm), dimensione (byte)."""
+
+    path: str
+    programma: str
+    pezzi: Tuple[str, ...]
+    spessore: float
+    byte: int
+
+
+class _Options(NamedTuple):
+    directory: str
+    modal: bool
+    optimize_path: bool
+    sequence: bool
+
+
+def _inside_freecad() -> bool:
+    return "FreeCAD" in sys.modules
+
+
+def _init_worker(tlg_path: Optional[str]) -> None:
+    _WORKER["tlg"] = TLGLibrary(tlg_path) if tlg_path else TLGLibrary()
+
+
+def _panel_job(job: Tuple[str, str, str, Tuple[float, float, float], Any, _Options]) -> ExportedProgram:
+    name, label, panel_name, dims_mm, params, options = job
+    path = os.path.join(options.directory, name + ".xilog")
+    with atomic_write(path) as f:
+        gen = XilogGenerator(_WORKER["tlg"], optimize_path=options.optimize_path, modal=options.modal, sink=f)
+        gen.program_lines.extend(_program_intro("programma pannello", _cabinet_description(params)))
+        _emit_panel(gen, panel_name, dims_mm, params, label)
+        gen.add_safety_notes()
+        gen.add_footer()
+    return ExportedProgram(path, name, (label,), dims_mm[2], os.path.getsize(path))
+
+
+def _cycle_job(job: Tuple[str, BedCycle, int, bool, _Options]) -> ExportedProgram:
+    name, cycle, total, oversize, options = job
+    path = os.path.join(options.directory, name + ".xilog")
+    gen = XilogGenerator(_WORKER["tlg"], optimize_path=options.optimize_path, modal=options.modal)
+    text = _render_bed_cycle(gen, cycle, total, oversize, options.sequence)
+    with atomic_write(path) as f:
+        f.write(text)
+    pezzi = tuple(p.part.label for p in cycle.placements)
+    return ExportedProgram(path, name, pezzi, cycle.thickness, os.path.getsize(path))
+
+
+def _panel_jobs(project: Iterable[ProjectItem], options: _Options) -> List[Tuple[Any, ...]]:
+    jobs = []
+    for n, item in enumerate(iter_panel_specs(project), start=1):
+        l_cm, w_cm, t_cm = item.panel.cut_dimensions()
+        label = "{}_{}".format(item.module.name, item.panel.name)
+        name = "{:04d}_{}".format(n, safe_object_name(label))
+        dims = (l_cm * 10.0, w_cm * 10.0, t_cm * 10.0)
+        jobs.append((name, label, item.panel.name, dims, item.module.params, options))
+    return jobs
+
+
+def write_manifest(directory: str, modo: str, programs: Iterable[ExportedProgram]) -> str:
+    """Indice dei programmi esportati (JSON, scrittura atomica); restituisce il percorso."""
+    data = {
+        "versione": MANIFEST_VERSION,
+        "modo": modo,
+        "programmi": [
+            {
+                "file": os.path.basename(p.path),
+                "programma": p.programma,
+                "pezzi": list(p.pezzi),
+                "spessore_mm": p.spessore,
+                "byte": p.byte,
+            }
+            for p in programs
+        ],
+    }
+    path = os.path.join(directory, MANIFEST_NAME)
+    with atomic_write(path) as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    return path
+
+
+def export_project_programs(
+    project: Iterable[ProjectItem],
+    directory: str,
+    modo: str = "pannello",
+    tlg_path: Optional[str] = None,
+    bed: BedSpec = BedSpec(),
+    modal: bool = False,
+    optimize_path: bool = False,
+    sequence: bool = False,
+    processes: Optional[int] = None,
+) -> List[ExportedProgram]:
+    """
+    Scrive un programma ``.xilog`` per pannello o per ciclo piano e il manifest.
+
+    Args:
+        project: moduli del progetto (vedi ``iter_project_modules``)
+        directory: cartella di destinazione (creata se manca)
+        modo: ``"pannello"`` (``0001_Modulo_1_Fianco_SX.xilog``, ...) o
+            ``"ciclo"`` (``ciclo_01_t18.xilog``, ...)
+        tlg_path: file TLG; caricato una volta per processo
+        bed: campo di lavoro per ``modo="ciclo"``
+        modal, optimize_path, sequence: come ``iter_bed_programs``
+            (``sequence`` solo per ``modo="ciclo"``)
+        processes: processi del pool; None = automatico (fino al numero di
+            CPU, solo da ``PARALLEL_MIN_PROGRAMS`` programmi in su),
+            1 = sequenziale. Con FreeCAD caricato si esegue sempre in
+            sequenza: ``sys.executable`` è l'eseguibile FreeCAD e non può
+            avviare i processi del pool.
+
+    Returns:
+        programmi scritti, nello stesso ordine del manifest
+    """
+    if modo not in EXPORT_MODES:
+        raise ValueError("Modo export non valido: {} (ammessi: {})".format(modo, ", ".join(EXPORT_MODES)))
+    os.makedirs(directory, exist_ok=True)
+    options = _Options(directory, modal, optimize_path, sequence)
+    if modo == "pannello":
+        worker = _panel_job
+        jobs = _panel_jobs(project, options)
+    else:
+        worker = _cycle_job
+        cycles = _bed_cycles(project, bed)
+        jobs = [(name, cycle, len(cycles), oversize, options) for name, cycle, oversize in cycles]
+
+    if _inside_freecad():
+        processes = 1
+    elif processes is None:
+        processes = min(len(jobs), os.cpu_count() or 1) if len(jobs) >= PARALLEL_MIN_PROGRAMS else 1
+    if processes <= 1 or len(jobs) <= 1:
+        _init_worker(tlg_path)
+        programs = [worker(job) for job in jobs]
+    else:
+        processes = min(processes, len(jobs))
+        # Blocchi di lavori per processo: pochi messaggi, carico ancora bilanciato
+        chunksize = max(1, len(jobs) // (processes * 4))
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(tlg_path,)) as pool:
+            programs = list(pool.map(worker, jobs, chunksize=chunksize))
+    write_manifest(directory, modo, programs)
+    return programs
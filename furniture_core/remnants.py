@@ -0,0 +1,354 @@
+"""
+Magazzino sfridi: ritagli di lastra riutilizzabili nel nesting.
+
+Ogni sfrido è un rettangolo (mm) per materiale e spessore. Per gruppo due
+indici ordinati (treap con il massimo del lato lungo nel sottoalbero)
+trovano in tempo logaritmico lo sfrido più piccolo che contiene un pezzo:
+lato corto minimo, a parità lato lungo minimo. Un indice ignora
+l'orientamento (pezzi ruotabili), l'altro tiene la lunghezza lungo la
+venatura.
+
+Il magazzino si salva in JSON; ``nesting.nest_cutlist`` e
+``guillotine.optimize_cutting`` prelevano gli sfridi prima di aprire
+lastre nuove e rimettono in magazzino i ritagli che avanzano.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .nesting import Part
+
+DEFAULT_MIN_REMNANT_MM = 100.0  # sotto questo lato il ritaglio è scarto
+REMNANT_FILE_VERSION = 1
+
+# Chiave indice: (lato ordinato, lato massimizzato, id sfrido)
+_Key = Tuple[float, float, int]
+
+
+class Remnant(NamedTuple):
+    """Sfrido in magazzino (mm); ``length`` è lungo la venatura."""
+
+    id: int
+    materiale: str
+    spessore: float  # mm
+    length: float
+    width: float
+    origine: str = ""
+
+    @property
+    def area(self) -> float:
+        return self.length * self.width
+
+
+class RemnantClaim(NamedTuple):
+    """Pezzo assegnato a uno sfrido (posizionato nell'angolo, ``rotated`` = lunghezza lungo Y)."""
+
+    remnant: Remnant
+    part: Part
+    rotated: bool
+
+
+class _Node:
+    __slots__ = ("key", "prio", "left", "right", "top")
+
+    def __init__(self, key: _Key, prio: float):
+        self.key = key
+        self.prio = prio
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+        self.top = key[1]
+
+
+def _pull(node: _Node) -> None:
+    top = node.key[1]
+    if node.left is not None and node.left.top > top:
+        top = node.left.top
+    if node.right is not None and node.right.top > top:
+        top = node.right.top
+    node.top = top
+
+
+def _split(node: Optional[_Node], key: _Key) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """(chiavi < key, chiavi >= key)."""
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        _pull(node)
+        return node, right
+    left, right = _split(node.left, key)
+    node.left = right
+    _pull(node)
+    return left, node
+
+
+def _merge(a: Optional[_Node], b: Optional[_Node]) -> Optional[_Node]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.prio > b.prio:
+        a.right = _merge(a.right, b)
+        _pull(a)
+        return a
+    b.left = _merge(a, b.left)
+    _pull(b)
+    return b
+
+
+def _first_fit(node: Optional[_Node], a: float, b: float) -> Optional[_Key]:
+    """Prima chiave in ordine con key[0] >= a e key[1] >= b."""
+    if node is None or node.top < b:
+        return None
+    if node.key[0] < a:
+        return _first_fit(node.right, a, b)
+    found = _first_fit(node.left, a, b)
+    if found is not None:
+        return found
+    if node.key[1] >= b:
+        return node.key
+    return _first_fit(node.right, a, b)
+
+
+class _FitIndex:
+    """Treap ordinato per chiave con il massimo di ``key[1]`` nel sottoalbero."""
+
+    __slots__ = ("_root", "_rnd")
+
+    def __init__(self, keys: Iterable[_Key] = (), seed: int = 0):
+        self._rnd = random.Random(seed)
+        self._root: Optional[_Node] = None
+        self._build(sorted(keys))
+
+    def _build(self, keys: Sequence[_Key]) -> None:
+        # Albero cartesiano in O(n) sulle chiavi già ordinate
+        stack: List[_Node] = []
+        for key in keys:
+            node = _Node(key, self._rnd.random())
+            last = None
+            while stack and stack[-1].prio < node.prio:
+                last = stack.pop()
+            node.left = last
+            if stack:
+                stack[-1].right = node
+            stack.append(node)
+        self._root = stack[0] if stack else None
+        # Massimi dei sottoalberi in post-ordine (senza ricorsione)
+        order: List[_Node] = []
+        todo = [self._root] if self._root is not None else []
+        while todo:
+            node = todo.pop()
+            order.append(node)
+            if node.left is not None:
+                todo.append(node.left)
+            if node.right is not None:
+                todo.append(node.right)
+        for node in reversed(order):
+            _pull(node)
+
+    def insert(self, key: _Key) -> None:
+        left, right = _split(self._root, key)
+        self._root = _merge(_merge(left, _Node(key, self._rnd.random())), right)
+
+    def remove(self, key: _Key) -> None:
+        left, rest = _split(self._root, key)
+        _, right = _split(rest, (key[0], key[1], key[2] + 1))
+        self._root = _merge(left, right)
+
+    def first_fit(self, a: float, b: float) -> Optional[_Key]:
+        return _first_fit(self._root, a, b)
+
+
+def _free_key(r: Remnant) -> _Key:
+    return (min(r.length, r.width), max(r.length, r.width), r.id)
+
+
+def _grain_key(r: Remnant) -> _Key:
+    return (r.width, r.length, r.id)
+
+
+class RemnantStore:
+    """
+    Magazzino sfridi per (materiale, spessore mm).
+
+    Uso::
+
+        store = RemnantStore.load("sfridi.json")
+        results = nest_cutlist(cutlist, remnants=store)
+        store.save("sfridi.json")
+    """
+
+    def __init__(self, remnants: Iterable[Remnant] = (), min_side_mm: float = DEFAULT_MIN_REMNANT_MM):
+        self.min_side_mm = min_side_mm
+        self._items: Dict[int, Remnant] = {}
+        self._groups: Dict[Tuple[str, float], Tuple[_FitIndex, _FitIndex]] = {}
+        by_group: Dict[Tuple[str, float], List[Remnant]] = {}
+        for r in remnants:
+            if r.id in self._items:
+                raise ValueError("id sfrido duplicato: {}".format(r.id))
+            self._items[r.id] = r
+            by_group.setdefault((r.materiale, r.spessore), []).append(r)
+        for group, items in by_group.items():
+            self._groups[group] = (
+                _FitIndex(map(_free_key, items)),
+                _FitIndex(map(_grain_key, items), seed=1),
+            )
+        self._next_id = max(self._items, default=0) + 1
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[Remnant]:
+        return iter(sorted(self._items.values()))
+
+    def __contains__(self, remnant_id: object) -> bool:
+        return remnant_id in self._items
+
+    def _indexes(self, materiale: str, spessore: float) -> Tuple[_FitIndex, _FitIndex]:
+        group = (materiale, spessore)
+        if group not in self._groups:
+            self._groups[group] = (_FitIndex(), _FitIndex(seed=1))
+        return self._groups[group]
+
+    def add(self, materiale: str, spessore: float, length: float, width: float, origine: str = "") -> Remnant:
+        """Mette a magazzino un ritaglio (mm) e lo restituisce con il suo id."""
+        if length <= 0 or width <= 0:
+            raise ValueError("Misure sfrido non valide: {} x {}".format(length, width))
+        r = Remnant(self._next_id, materiale, spessore, length, width, origine)
+        self._next_id += 1
+        self._items[r.id] = r
+        free, grain = self._indexes(materiale, spessore)
+        free.insert(_free_key(r))
+        grain.insert(_grain_key(r))
+        return r
+
+    def remove(self, remnant_id: int) -> Remnant:
+        r = self._items.pop(remnant_id)
+        free, grain = self._groups[(r.materiale, r.spessore)]
+        free.remove(_free_key(r))
+        grain.remove(_grain_key(r))
+        return r
+
+    def find(
+        self, materiale: str, spessore: float, length: float, width: float, rotatable: bool = True
+    ) -> Optional[Tuple[Remnant, bool]]:
+        """
+        Sfrido più piccolo che contiene un pezzo ``length`` x ``width`` (mm).
+
+        Returns:
+            (sfrido, ruotato) oppure None; ruotato = lunghezza pezzo lungo
+            la larghezza dello sfrido (mai per ``rotatable`` False)
+        """
+        group = self._groups.get((materiale, spessore))
+        if group is None:
+            return None
+        if rotatable:
+            key = group[0].first_fit(min(length, width), max(length, width))
+            if key is None:
+                return None
+            r = self._items[key[2]]
+            return r, not (length <= r.length and width <= r.width)
+        key = group[1].first_fit(width, length)
+        return None if key is None else (self._items[key[2]], False)
+
+    def claim(self, materiale: str, spessore: float, part: Part, kerf: float = 0.0) -> Optional[RemnantClaim]:
+        """
+        Preleva lo sfrido più piccolo per ``part``; i ritagli che avanzano
+        (lato minimo ≥ ``min_side_mm``) tornano a magazzino.
+        """
+        found = self.find(materiale, spessore, part.length, part.width, part.rotatable)
+        if found is None:
+            return None
+        r, rotated = found
+        self.remove(r.id)
+        pl, pw = (part.width, part.length) if rotated else (part.length, part.width)
+        rest_l = r.length - pl - kerf
+        rest_w = r.width - pw - kerf
+        # Due tagli possibili: si tiene quello con il ritaglio più grande
+        across = ((rest_l, r.width), (pl, rest_w))
+        along = ((r.length, rest_w), (rest_l, pw))
+        best = max(across, along, key=lambda pieces: max(l * w for l, w in pieces))
+        origine = "sfrido {}".format(r.id)
+        for l, w in best:
+            if min(l, w) >= self.min_side_mm:
+                self.add(materiale, spessore, round(l, 1), round(w, 1), origine)
+        return RemnantClaim(r, part, rotated)
+
+    def claim_parts(
+        self, materiale: str, spessore: float, parts: Iterable[Part], kerf: float = 0.0
+    ) -> Tuple[List[RemnantClaim], List[Part]]:
+        """
+        Assegna agli sfridi quanti più pezzi possibile, dai più grandi.
+
+        Returns:
+            (assegnazioni, pezzi rimasti per le lastre nuove)
+        """
+        claims: List[RemnantClaim] = []
+        rest: List[Part] = []
+        if (materiale, spessore) not in self._groups:
+            return claims, list(parts)
+        for part in sorted(parts, key=lambda p: p.length * p.width, reverse=True):
+            claim = self.claim(materiale, spessore, part, kerf)
+            if claim is None:
+                rest.append(part)
+            else:
+                claims.append(claim)
+        return claims, rest
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "versione": REMNANT_FILE_VERSION,
+            "lato_minimo_mm": self.min_side_mm,
+            "sfridi": [
+                {
+                    "id": r.id,
+                    "materiale": r.materiale,
+                    "spessore_mm": r.spessore,
+                    "lunghezza_mm": r.length,
+                    "larghezza_mm": r.width,
+                    "origine": r.origine,
+                }
+                for r in self
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RemnantStore":
+        remnants = (
+            Remnant(
+                int(item["id"]),
+                item["materiale"],
+                float(item["spessore_mm"]),
+                float(item["lunghezza_mm"]),
+                float(item["larghezza_mm"]),
+                item.get("origine", ""),
+            )
+            for item in data.get("sfridi", [])
+        )
+        return cls(remnants, float(data.get("lato_minimo_mm", DEFAULT_MIN_REMNANT_MM)))
+
+    def save(self, filepath: str) -> None:
+        """Salva in JSON (file temporaneo + rename: mai un magazzino a metà)."""
+        directory = os.path.dirname(os.path.abspath(filepath))
+        fd, tmp = tempfile.mkstemp(prefix=".sfridi-", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+            os.replace(tmp, filepath)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, filepath: str) -> "RemnantStore":
+        """Carica da JSON; file assente = magazzino vuoto."""
+        if not os.path.exists(filepath):
+            return cls()
+        with open(filepath, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,157 @@
+"""
+Cache LRU per la catena normalize → panel specs → lista taglio / Xilog.
+
+Le configurazioni ricorrenti (basi 60/80, pensili 35 …) sono identificate da
+un'impronta canonica dei parametri normalizzati, indipendente dall'ordine
+delle chiavi e dalla forma dell'input (``{"larghezza": 60}`` e
+``{"larghezza": 60.0, "tipo_mobile": "Mobile Base"}`` coincidono).
+
+Dopo modifiche ai valori di ``constants.py`` le cache vanno svuotate con
+``invalidate_caches()``.
+"""
+
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Tuple
+
+from .models import CabinetParams, normalize_params, params_digest
+from .panel_specs import build_panels
+from .panel_table import Panel
+
+DEFAULT_SPEC_CACHE_SIZE = 512
+DEFAULT_ARTIFACT_CACHE_SIZE = 128
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Cache LRU limitata con contatori hit/miss/eviction."""
+
+    def __init__(self, maxsize: int = DEFAULT_SPEC_CACHE_SIZE):
+        if maxsize <= 0:
+            raise ValueError("maxsize deve essere > 0")
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._data.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Svuota la cache (i contatori restano)."""
+        self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _raw_key(raw: Mapping[str, Any]) -> Optional[Tuple[Tuple[str, Any], ...]]:
+    """Chiave hashable dell'input grezzo; None se contiene valori non hashable."""
+    try:
+        key = tuple(sorted(raw.items()))
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+_FINGERPRINTS = LRUCache(4 * DEFAULT_SPEC_CACHE_SIZE)
+_SPECS = LRUCache(DEFAULT_SPEC_CACHE_SIZE)
+_ARTIFACTS = LRUCache(DEFAULT_ARTIFACT_CACHE_SIZE)
+
+
+def invalidate_caches() -> None:
+    """Svuota tutte le cache (da chiamare dopo modifiche a constants.py)."""
+    _FINGERPRINTS.clear()
+    _SPECS.clear()
+    _ARTIFACTS.clear()
+
+
+def params_fingerprint(raw: Mapping[str, Any]) -> str:
+    """Impronta SHA-1 canonica dei parametri normalizzati."""
+    if isinstance(raw, CabinetParams):
+        return raw.fingerprint
+    key = _raw_key(raw)
+    if key is None:
+        return params_digest(normalize_params(raw))
+    return _FINGERPRINTS.get_or_compute(key, lambda: params_digest(normalize_params(raw)))
+
+
+def cached_panel_specs(raw: Mapping[str, Any]) -> List[Panel]:
+    """``build_panels`` con cache (lista nuova, pannelli immutabili condivisi)."""
+    fp = params_fingerprint(raw)
+    panels = _SPECS.get_or_compute(fp, lambda: tuple(build_panels(raw)))
+    return list(panels)
+
+
+def cached_artifact(kind: str, raw: Mapping[str, Any], extra: Hashable, compute: Callable[[], Any]) -> Any:
+    """
+    Artefatto derivato (lista taglio, programma Xilog …) in cache.
+
+    La chiave è (kind, impronta parametri, extra); ``extra`` raccoglie le
+    opzioni che cambiano il risultato (materiale, libreria utensili …).
+    """
+    key = (kind, params_fingerprint(raw), extra)
+    return _ARTIFACTS.get_or_compute(key, compute)
+
+
+def file_cache_key(path: Optional[str]) -> Hashable:
+    """Chiave per file esterni (es. libreria TLG): percorso + mtime."""
+    if path and os.path.exists(path):
+        return (os.path.abspath(path), os.path.getmtime(path))
+    return path
+
+
+def cached_cutlist(raw: Mapping[str, Any], materiale: str = "Legno") -> List[Dict[str, Any]]:
+    """Lista taglio del mobile con cache (righe copiate: il chiamante può modificarle)."""
+    from .cutlist import panels_to_cutlist
+
+    rows = cached_artifact(
+        "cutlist", raw, materiale, lambda: tuple(panels_to_cutlist(cached_panel_specs(raw), materiale))
+    )
+    return [dict(row) for row in rows]
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Contatori delle cache (per diagnostica / benchmark)."""
+    return {
+        "fingerprints": _FINGERPRINTS.stats(),
+        "specs": _SPECS.stats(),
+        "artifacts": _ARTIFACTS.stats(),
+    }
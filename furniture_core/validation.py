@@ -1,36 +1,183 @@
 """
 Validazione parametri mobili (logica conmotione, senza dipendenze CAD).
+
+Ogni regola ha un codice macchina (``E_…``) e il messaggio storico in
+italiano; ``validate_many`` controlla un'intera tabella di mobili in un colpo
+(vettoriale con NumPy) e aggiunge le regole incrociate sulla geometria.
 """
 
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Sequence, Tuple, Union
+
+from .models import normalize_params
+from .panel_batch import door_width_array, np, prepare_columns, rows_to_columns, shelf_zone_arrays
+from .panel_specs import _door_width, _shelf_zone, _zoccolo_cm
+
+# (codice, campo, minimo, massimo, messaggio) — ordine = ordine dei messaggi
+RANGE_RULES: Tuple[Tuple[str, str, float, float, str], ...] = (
+    ("E_LARGHEZZA_RANGE", "larghezza", 20.0, 300.0, "Larghezza deve essere tra 20 e 300 cm"),
+    ("E_ALTEZZA_RANGE", "altezza", 20.0, 300.0, "Altezza deve essere tra 20 e 300 cm"),
+    ("E_PROFONDITA_RANGE", "profondita", 20.0, 100.0, "Profondità deve essere tra 20 e 100 cm"),
+    (
+        "E_SPESSORE_PANNELLO_RANGE",
+        "spessore_pannello",
+        1.0,
+        5.0,
+        "Spessore pannello deve essere tra 1.0 e 5.0 cm",
+    ),
+    (
+        "E_SPESSORE_SCHIENALE_RANGE",
+        "spessore_schienale",
+        0.3,
+        2.0,
+        "Spessore schienale deve essere tra 0.3 e 2.0 cm",
+    ),
+    ("E_NUM_RIPIANI_RANGE", "num_ripiani", 0, 10, "Numero ripiani deve essere tra 0 e 10"),
+)
+
+# Regole incrociate (geometria che collasserebbe in panel_specs)
+CROSS_RULES: Dict[str, str] = {
+    "E_RIPIANO_PROFONDITA": "Profondità utile ripiani ≤ 0.1 cm: i ripiani non verrebbero generati",
+    "E_ANTA_LARGHEZZA": "Larghezza anta ≤ 0: troppe ante per la larghezza del mobile",
+    "E_ALTEZZA_INTERNA": "Altezza interna ≤ 0: spessori e zoccolo superano l'altezza",
+}
+
+
+class ValidationIssue(NamedTuple):
+    """Errore di validazione di una riga (mobile) del lotto."""
+
+    row: int
+    code: str
+    message: str
 
 
-def validate_cabinet_params(params: Dict[str, Any]) -> List[str]:
+def _range_value(params: Mapping[str, Any], field: str) -> float:
+    value = params.get(field, 0)
+    return int(value) if field == "num_ripiani" else float(value)
+
+
+def validate_cabinet_params(params: Mapping[str, Any]) -> List[str]:
     """Restituisce lista errori; lista vuota se tutto ok."""
     errors: List[str] = []
+    for _, field, lo, hi, message in RANGE_RULES:
+        value = _range_value(params, field)
+        if value < lo or value > hi:
+            errors.append(message)
+    return errors
 
-    larghezza = float(params.get("larghezza", 0))
-    altezza = float(params.get("altezza", 0))
-    profondita = float(params.get("profondita", 0))
 
-    if larghezza < 20.0 or larghezza > 300.0:
-        errors.append("Larghezza deve essere tra 20 e 300 cm")
-    if altezza < 20.0 or altezza > 300.0:
-        errors.append("Altezza deve essere tra 20 e 300 cm")
-    if profondita < 20.0 or profondita > 100.0:
-        errors.append("Profondità deve essere tra 20 e 100 cm")
+def _cross_issues(params: Mapping[str, Any]) -> List[str]:
+    """Codici delle regole incrociate violate (parametri normalizzati)."""
+    codes: List[str] = []
+    S = params["spessore_pannello"]
+    if params.get("num_ripiani", 0) > 0:
+        _, depth = _shelf_zone(params, params["profondita"], S, params["spessore_schienale"])
+        if depth <= 0.1:
+            codes.append("E_RIPIANO_PROFONDITA")
+    num_ante = int(params.get("num_ante", 0))
+    if num_ante > 0 and _door_width(params["larghezza"], S, num_ante) <= 0:
+        codes.append("E_ANTA_LARGHEZZA")
+    if params["altezza"] - 2 * S - _zoccolo_cm(params) <= 0:
+        codes.append("E_ALTEZZA_INTERNA")
+    return codes
 
-    sp_p = float(params.get("spessore_pannello", 0))
-    sp_s = float(params.get("spessore_schienale", 0))
-    if sp_p < 1.0 or sp_p > 5.0:
-        errors.append("Spessore pannello deve essere tra 1.0 e 5.0 cm")
-    if sp_s < 0.3 or sp_s > 2.0:
-        errors.append("Spessore schienale deve essere tra 0.3 e 2.0 cm")
 
-    num_ripiani = int(params.get("num_ripiani", 0))
-    if num_ripiani < 0 or num_ripiani > 10:
-        errors.append("Numero ripiani deve essere tra 0 e 10")
+def validation_issues(params: Mapping[str, Any], row: int = 0) -> List[ValidationIssue]:
+    """Versione scalare di ``validate_many`` per un mobile (parametri normalizzati)."""
+    issues: List[ValidationIssue] = []
+    for code, field, lo, hi, message in RANGE_RULES:
+        value = _range_value(params, field)
+        if value < lo or value > hi:
+            issues.append(ValidationIssue(row, code, message))
+    for code in _cross_issues(params):
+        issues.append(ValidationIssue(row, code, CROSS_RULES[code]))
+    return issues
 
-    return errors
+
+class BatchValidationResult(NamedTuple):
+    """Esito di ``validate_many``: errori ordinati per riga e regola."""
+
+    rows: int
+    issues: List[ValidationIssue]
+
+    def by_row(self) -> Dict[int, List[ValidationIssue]]:
+        out: Dict[int, List[ValidationIssue]] = {}
+        for issue in self.issues:
+            out.setdefault(issue.row, []).append(issue)
+        return out
+
+    def by_code(self) -> Dict[str, List[int]]:
+        """Righe che violano ciascun codice (per filtrare gli ordini)."""
+        out: Dict[str, List[int]] = {}
+        for issue in self.issues:
+            out.setdefault(issue.code, []).append(issue.row)
+        return out
+
+    def codes(self, row: int) -> List[str]:
+        return [i.code for i in self.issues if i.row == row]
+
+    def messages(self, row: int) -> List[str]:
+        return [i.message for i in self.issues if i.row == row]
+
+    def valid_rows(self) -> List[int]:
+        bad = {issue.row for issue in self.issues}
+        return [row for row in range(self.rows) if row not in bad]
+
+
+def _validate_vectorized(columns: Mapping[str, Sequence[Any]]) -> BatchValidationResult:
+    cols = prepare_columns(columns)
+    masks: List[Tuple[str, str, Any]] = []
+    for code, field, lo, hi, message in RANGE_RULES:
+        values = cols[field]
+        masks.append((code, message, (values < lo) | (values > hi)))
+
+    S = cols["spessore_pannello"]
+    _, shelf_depth = shelf_zone_arrays(cols)
+    door_w = door_width_array(cols)
+    Hz = np.where(cols["con_zoccolo"], cols["altezza_zoccolo"], 0.0)
+    cross = {
+        "E_RIPIANO_PROFONDITA": (cols["num_ripiani"] > 0) & (shelf_depth <= 0.1),
+        "E_ANTA_LARGHEZZA": (cols["num_ante"] > 0) & (door_w <= 0),
+        "E_ALTEZZA_INTERNA": (cols["altezza"] - 2 * S - Hz) <= 0,
+    }
+    for code, message in CROSS_RULES.items():
+        masks.append((code, message, cross[code]))
+
+    rows_parts = []
+    rule_parts = []
+    for rule, (_, _, mask) in enumerate(masks):
+        hit = np.nonzero(mask)[0]
+        rows_parts.append(hit)
+        rule_parts.append(np.full(len(hit), rule))
+    rows = np.concatenate(rows_parts)
+    rules = np.concatenate(rule_parts)
+    order = np.lexsort((rules, rows))
+    issues = [
+        ValidationIssue(int(row), masks[rule][0], masks[rule][1])
+        for row, rule in zip(rows[order].tolist(), rules[order].tolist())
+    ]
+    return BatchValidationResult(cols["n"], issues)
+
+
+def validate_many(
+    batch: Union[Mapping[str, Sequence[Any]], Iterable[Mapping[str, Any]]],
+) -> BatchValidationResult:
+    """
+    Valida un lotto di mobili (tabella colonnare o lista di dict).
+
+    Le colonne mancanti prendono i default del tipo (come ``normalize_params``).
+    Oltre ai controlli di ``validate_cabinet_params`` verifica profondità utile
+    dei ripiani, larghezza ante e altezza interna.
+    """
+    if not isinstance(batch, Mapping):
+        batch = rows_to_columns(list(batch))
+    if np is not None:
+        return _validate_vectorized(batch)
+
+    keys = list(batch)
+    issues: List[ValidationIssue] = []
+    n = 0
+    for n, values in enumerate(zip(*(batch[k] for k in keys)), start=1):
+        issues.extend(validation_issues(normalize_params(dict(zip(keys, values))), row=n - 1))
+    return BatchValidationResult(n, issues)
@@ -6,33 +6,33 @@ from __future__ import annotations
 
 import os
 import sys
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from .models import normalize_params
-from .panel_specs import build_panel_specs
+from .assembly_spec import ProjectItem, iter_panel_specs
+from .bed_layout import BedCycle, BedPart, BedPlacement, BedSpec, layout_bed
+from .models import ensure_params
+from .panel_table import iter_cut_dimensions
+from .spec_cache import cached_artifact, cached_panel_specs, file_cache_key
 
 # Permette import postprocessor dalla root repository
 _REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if _REPO_ROOT not in sys.path:
     sys.path.insert(0, _REPO_ROOT)
 
+from postprocessor.modal_output import ModalCompressor, compress_program  # noqa: E402
+from postprocessor.operation_plan import (  # noqa: E402
+    OperationRecorder,
+    SequencingReport,
+    emit_operations,
+    plan_report,
+    sequence_operations,
+)
+from postprocessor.program_sink import atomic_write  # noqa: E402
+from postprocessor.subprograms import extract_subprograms  # noqa: E402
 from postprocessor.xilog_generator import XilogGenerator  # noqa: E402
 from tlg_parser.tlg_library import TLGLibrary  # noqa: E402
 
 
-def _panel_dimensions_mm(spec: Dict[str, Any]) -> Tuple[float, float, float]:
-    """Restituisce (L, W, T) in mm dal box pannello (cm → mm)."""
-    dims_mm = sorted(
-        [
-            spec["size_x"] * 10.0,
-            spec["size_y"] * 10.0,
-            spec["size_z"] * 10.0,
-        ],
-        reverse=True,
-    )
-    return dims_mm[0], dims_mm[1], dims_mm[2]
-
-
 def _corner_dowel_positions(l_mm: float, w_mm: float, margin: float = 50.0) -> List[Tuple[float, float]]:
     """Posizioni spinatura agli angoli del pannello (faccia superiore)."""
     return [
@@ -57,70 +57,377 @@ def _shelf_hole_rows(l_mm: float, w_mm: float, step_mm: float = 32.0) -> List[Di
 def generate_xilog_for_cabinet(
     raw_params: Dict[str, Any],
     tlg_path: Optional[str] = None,
+    sequence: bool = False,
+    modal: bool = False,
+    subprograms: bool = False,
 ) -> str:
     """
     Genera codice Xilog per tutti i pannelli del mobile.
+
+    Con ``sequence`` le lavorazioni di ogni pannello vengono riordinate per
+    ridurre cambi utensile e faccia (vedi ``postprocessor.operation_plan``),
+    con il confronto prima/dopo in testa al programma. Con ``modal`` il
+    programma è scritto in forma compatta (``postprocessor.modal_output``),
+    con ``subprograms`` i blocchi di fori ripetuti diventano sottoprogrammi
+    (``postprocessor.subprograms``).
+    Configurazioni ripetute sono servite dalla cache (vedi spec_cache).
     """
-    params = normalize_params(raw_params)
-    panels = build_panel_specs(params)
+    kind = "xilog" + ("_seq" if sequence else "") + ("_modal" if modal else "") + ("_sub" if subprograms else "")
+    return cached_artifact(
+        kind,
+        raw_params,
+        file_cache_key(tlg_path),
+        lambda: _render_xilog(raw_params, tlg_path, sequence, modal, subprograms),
+    )
 
-    tlg = TLGLibrary(tlg_path) if tlg_path else TLGLibrary()
-    gen = XilogGenerator(tlg)
 
-    gen.program_lines.extend([
+def _program_intro(title: str, description: str) -> List[str]:
+    return [
         "; ================================================================",
-        "; FurnitureAI — programma multi-pannello",
-        "; Mobile: {} — L={} H={} P={} cm".format(
-            params.get("tipo_mobile", "Mobile"),
-            params["larghezza"],
-            params["altezza"],
-            params["profondita"],
-        ),
+        "; FurnitureAI — {}".format(title),
+        "; {}".format(description),
         "; ================================================================",
         "",
         "G90",
         "G71",
         "",
+    ]
+
+
+def _cabinet_description(params: Dict[str, Any]) -> str:
+    return "Mobile: {} — L={} H={} P={} cm".format(
+        params.get("tipo_mobile", "Mobile"),
+        params["larghezza"],
+        params["altezza"],
+        params["profondita"],
+    )
+
+
+def _emit_panel(
+    gen: XilogGenerator,
+    name: str,
+    dims_mm: Tuple[float, float, float],
+    params: Dict[str, Any],
+    label: Optional[str] = None,
+) -> None:
+    """Intestazione + lavorazioni (spine, fori 32 mm, cerniere) di un pannello."""
+    _panel_banner(gen, label or name, dims_mm)
+    _panel_operations(gen, name, dims_mm, params)
+
+
+def _panel_banner(gen: XilogGenerator, label: str, dims_mm: Tuple[float, float, float]) -> None:
+    gen.program_lines.extend([
+        "",
+        "; ----------------------------------------------------------------",
+        "; PANNELLO: {}".format(label),
+        "; ----------------------------------------------------------------",
     ])
+    gen.add_header(label, dims_mm)
+
 
+def _panel_operations(
+    gen: XilogGenerator,
+    name: str,
+    dims_mm: Tuple[float, float, float],
+    params: Dict[str, Any],
+) -> None:
+    """Lavorazioni di un pannello in coordinate pezzo (origine: ``gen.set_origin``)."""
+    l_mm, w_mm, t_mm = dims_mm
     use_dowel = bool(params.get("spinatura", False))
     use_shelf = bool(params.get("fori_ripiani", False)) and bool(params.get("sistema_32mm", False))
 
-    for spec in panels:
-        name = spec["name"]
-        l_mm, w_mm, t_mm = _panel_dimensions_mm(spec)
+    if use_dowel and t_mm >= 15.0:
+        gen.add_dowel_holes(_corner_dowel_positions(l_mm, w_mm))
+
+    if use_shelf and name.startswith("Fianco"):
+        gen.add_drilling(_shelf_hole_rows(l_mm, w_mm), face=1, optimized=True)
+
+    if params.get("num_cerniere", 0) > 0 and name.startswith("Anta"):
+        gen.add_hinge_holes([(50.0, 150.0), (50.0, w_mm - 150.0)])
+
+
+def _record_cabinet(params: Dict[str, Any], tlg: TLGLibrary) -> Tuple[OperationRecorder, List[Tuple[str, Tuple[float, float, float]]]]:
+    """Lavorazioni del mobile come rappresentazione intermedia, con i pannelli."""
+    recorder = OperationRecorder(tlg)
+    panels: List[Tuple[str, Tuple[float, float, float]]] = []
+    for i, (name, l_cm, w_cm, t_cm) in enumerate(iter_cut_dimensions(cached_panel_specs(params))):
+        dims = (l_cm * 10.0, w_cm * 10.0, t_cm * 10.0)
+        recorder.begin_panel(i)
+        _panel_operations(recorder, name, dims, params)
+        panels.append((name, dims))
+    return recorder, panels
+
+
+def xilog_sequencing_report(raw_params: Dict[str, Any], tlg_path: Optional[str] = None) -> SequencingReport:
+    """Cambi utensile / faccia del programma mobile prima e dopo ``sequence``."""
+    tlg = TLGLibrary(tlg_path) if tlg_path else TLGLibrary()
+    recorder, _ = _record_cabinet(ensure_params(raw_params), tlg)
+    return plan_report(recorder.operations, sequence_operations(recorder.operations))
+
+
+def _render_xilog(
+    raw_params: Dict[str, Any],
+    tlg_path: Optional[str],
+    sequence: bool = False,
+    modal: bool = False,
+    subprograms: bool = False,
+) -> str:
+    params = ensure_params(raw_params)
+    panels = cached_panel_specs(params)
+
+    tlg = TLGLibrary(tlg_path) if tlg_path else TLGLibrary()
+    gen = XilogGenerator(tlg, modal=modal, subprograms=subprograms)
+    gen.program_lines.extend(_program_intro("programma multi-pannello", _cabinet_description(params)))
+
+    if sequence:
+        recorder, blocks = _record_cabinet(params, tlg)
+        planned = sequence_operations(recorder.operations)
+        gen.program_lines.extend(plan_report(recorder.operations, planned).lines())
+        by_panel: Dict[int, List[Any]] = {}
+        for op in planned:
+            by_panel.setdefault(op.panel, []).append(op)
+        for i, (name, dims) in enumerate(blocks):
+            _panel_banner(gen, name, dims)
+            emit_operations(gen, by_panel.get(i, []))
+    else:
+        for name, l_cm, w_cm, t_cm in iter_cut_dimensions(panels):
+            _emit_panel(gen, name, (l_cm * 10.0, w_cm * 10.0, t_cm * 10.0), params)
+
+    gen.add_safety_notes()
+    gen.add_footer()
+    return gen.generate()
+
+
+def _emit_project(gen: XilogGenerator, project: Iterable[ProjectItem]) -> Iterator[None]:
+    """Scrive il programma di progetto su ``gen``; si ferma dopo ogni pannello."""
+    gen.program_lines.extend(_program_intro("programma progetto", "Moduli: vedi intestazioni pannello"))
+    for item in iter_panel_specs(project):
+        l_cm, w_cm, t_cm = item.panel.cut_dimensions()
+        label = "{}_{}".format(item.module.name, item.panel.name)
+        _emit_panel(gen, item.panel.name, (l_cm * 10.0, w_cm * 10.0, t_cm * 10.0), item.module.params, label)
+        yield
+    gen.add_safety_notes()
+    gen.add_footer()
+    yield
+
+
+def iter_project_xilog_chunks(
+    project: Iterable[ProjectItem],
+    tlg_path: Optional[str] = None,
+    modal: bool = False,
+) -> Iterator[str]:
+    """
+    Programma Xilog di un intero progetto, un blocco di testo per pannello.
+
+    Consuma ``iter_panel_specs``: in memoria resta solo il pannello corrente.
+    Concatenare i blocchi con ``"\\n"`` dà il programma completo; con
+    ``modal`` lo stato modale prosegue da un blocco al successivo.
+    """
+    tlg = TLGLibrary(tlg_path) if tlg_path else TLGLibrary()
+    gen = XilogGenerator(tlg)
+    compressor = ModalCompressor() if modal else None
+    for _ in _emit_project(gen, project):
+        lines = compressor.compress(gen.program_lines) if compressor else gen.program_lines
+        yield "\n".join(lines)
+        gen.program_lines.clear()
+
+
+def generate_xilog_for_project(
+    project: Iterable[ProjectItem],
+    tlg_path: Optional[str] = None,
+    modal: bool = False,
+    subprograms: bool = False,
+) -> str:
+    """
+    Programma Xilog unico per tutti i moduli del progetto.
+
+    I sottoprogrammi richiedono il programma intero: con ``subprograms`` il
+    testo viene composto in memoria prima della compressione modale.
+    """
+    if not subprograms:
+        return "\n".join(iter_project_xilog_chunks(project, tlg_path=tlg_path, modal=modal))
+    text = extract_subprograms("\n".join(iter_project_xilog_chunks(project, tlg_path=tlg_path)))
+    return compress_program(text) if modal else text
+
+
+def save_xilog_for_project(
+    project: Iterable[ProjectItem],
+    filepath: str,
+    tlg_path: Optional[str] = None,
+    modal: bool = False,
+    subprograms: bool = False,
+) -> bool:
+    """
+    Salva il programma di progetto riga per riga, senza tenerlo in memoria.
+
+    Scrittura atomica (temporaneo + rename): la cartella della macchina non
+    vede mai un programma a metà. Con ``subprograms`` il programma viene
+    prima composto in memoria.
+    """
+    try:
+        with atomic_write(filepath) as f:
+            if subprograms:
+                f.write(generate_xilog_for_project(project, tlg_path, modal, subprograms))
+            else:
+                tlg = TLGLibrary(tlg_path) if tlg_path else TLGLibrary()
+                gen = XilogGenerator(tlg, modal=modal, sink=f)
+                for _ in _emit_project(gen, project):
+                    pass
+        return True
+    except OSError:
+        return False
+
+
+def _bed_parts(project: Iterable[ProjectItem]) -> Iterator[BedPart]:
+    for item in iter_panel_specs(project):
+        l_cm, w_cm, t_cm = item.panel.cut_dimensions()
+        label = "{}_{}".format(item.module.name, item.panel.name)
+        yield BedPart(
+            label,
+            round(l_cm * 10.0, 2),
+            round(w_cm * 10.0, 2),
+            round(t_cm * 10.0, 2),
+            (item.panel.name, item.module.params),
+        )
 
+
+def _bed_cycles(project: Iterable[ProjectItem], bed: BedSpec) -> List[Tuple[str, BedCycle, bool]]:
+    """(nome programma, ciclo, fuori campo) in ordine; i pezzi fuori campo da soli in coda."""
+    cycles, oversize = layout_bed(_bed_parts(project), bed)
+    cycles.extend(
+        BedCycle(len(cycles) + n, part.thickness, [BedPlacement(part, bed.margin, bed.margin)])
+        for n, part in enumerate(oversize, start=1)
+    )
+    first_oversize = len(cycles) - len(oversize) + 1
+    return [
+        ("ciclo_{:02d}_t{:g}".format(c.index, c.thickness), c, c.index >= first_oversize)
+        for c in cycles
+    ]
+
+
+def _render_bed_cycle(
+    gen: XilogGenerator,
+    cycle: BedCycle,
+    total: int,
+    oversize: bool = False,
+    sequence: bool = False,
+) -> str:
+    """Testo del programma di un ciclo; ``gen`` è un generatore nuovo, uno per ciclo."""
+    l_mm, w_mm = cycle.extent
+    title = "CICLO {}/{}".format(cycle.index, total)
+    gen.program_lines.extend(_program_intro(
+        "carico piano " + title,
+        "{} pezzi, spessore {:g} mm".format(len(cycle.placements), cycle.thickness),
+    ))
+    gen.add_header(title, (l_mm, w_mm, cycle.thickness))
+    if oversize:
+        gen.program_lines.append("; ATTENZIONE: pezzo oltre il campo di lavoro libero")
+    recorder = OperationRecorder(gen.tlg_library) if sequence else None
+    for k, placed in enumerate(cycle.placements):
+        part = placed.part
+        name, params = part.data
         gen.program_lines.extend([
             "",
             "; ----------------------------------------------------------------",
-            "; PANNELLO: {}".format(name),
+            "; PEZZO: {}  ORIGINE X={:.2f} Y={:.2f}  (L={:.1f} W={:.1f})".format(
+                part.label, placed.x, placed.y, part.length, part.width
+            ),
             "; ----------------------------------------------------------------",
         ])
-        gen.add_header(name, (l_mm, w_mm, t_mm))
+        target = recorder or gen
+        if recorder is not None:
+            recorder.begin_panel(k)
+        target.set_origin(placed.x, placed.y)
+        _panel_operations(target, name, (part.length, part.width, part.thickness), params)
+    if recorder is not None:
+        # Pezzi sullo stesso piano: lavorazioni alternabili tra pannelli
+        planned = sequence_operations(recorder.operations, cross_panel=True)
+        gen.program_lines.append("")
+        gen.program_lines.extend(plan_report(recorder.operations, planned).lines())
+        emit_operations(gen, planned)
+    gen.set_origin(0.0, 0.0)
+    gen.add_safety_notes()
+    gen.add_footer()
+    return gen.generate()
 
-        if use_dowel and t_mm >= 15.0:
-            gen.add_dowel_holes(_corner_dowel_positions(l_mm, w_mm))
 
-        if use_shelf and name.startswith("Fianco"):
-            gen.add_drilling(_shelf_hole_rows(l_mm, w_mm), face=1, optimized=True)
+def iter_bed_programs(
+    project: Iterable[ProjectItem],
+    tlg_path: Optional[str] = None,
+    bed: BedSpec = BedSpec(),
+    optimize_path: bool = False,
+    sequence: bool = False,
+    modal: bool = False,
+    subprograms: bool = False,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Un programma Xilog per ciclo macchina, con più pannelli per carico.
 
-        if params.get("num_cerniere", 0) > 0 and name.startswith("Anta"):
-            gen.add_hinge_holes([(50.0, 150.0), (50.0, w_mm - 150.0)])
+    I pannelli del progetto vengono disposti sul campo (``bed_layout``) e
+    ogni foratura è traslata dell'origine del suo pezzo. I pezzi che non
+    entrano nel campo libero escono da soli, con un avviso in testa.
+    ``optimize_path`` riordina i fori per ridurre il percorso in rapido;
+    ``sequence`` raggruppa le lavorazioni di tutti i pezzi del ciclo per
+    utensile e faccia (elenco pezzi in testa, poi le lavorazioni);
+    ``modal`` scrive i programmi in forma compatta, ``subprograms`` con i
+    blocchi di fori ripetuti come sottoprogrammi.
 
-    gen.add_safety_notes()
-    gen.add_footer()
-    return gen.generate()
+    Yields:
+        (nome programma, testo) — es. ``("ciclo_01_t18", ...)``
+    """
+    tlg = TLGLibrary(tlg_path) if tlg_path else TLGLibrary()
+    cycles = _bed_cycles(project, bed)
+    for name, cycle, oversize in cycles:
+        # Generatore nuovo per ciclo: nessuno stato passa da un programma all'altro
+        gen = XilogGenerator(tlg, optimize_path=optimize_path, modal=modal, subprograms=subprograms)
+        yield name, _render_bed_cycle(gen, cycle, len(cycles), oversize, sequence)
+
+
+def generate_xilog_bed_programs(
+    project: Iterable[ProjectItem],
+    tlg_path: Optional[str] = None,
+    bed: BedSpec = BedSpec(),
+    optimize_path: bool = False,
+    sequence: bool = False,
+    modal: bool = False,
+    subprograms: bool = False,
+) -> List[Tuple[str, str]]:
+    """Tutti i programmi per ciclo macchina (vedi ``iter_bed_programs``)."""
+    return list(iter_bed_programs(project, tlg_path, bed, optimize_path, sequence, modal, subprograms))
+
+
+def save_xilog_bed_programs(
+    project: Iterable[ProjectItem],
+    directory: str,
+    tlg_path: Optional[str] = None,
+    bed: BedSpec = BedSpec(),
+    optimize_path: bool = False,
+    sequence: bool = False,
+    modal: bool = False,
+    subprograms: bool = False,
+) -> List[str]:
+    """Salva un file ``.xilog`` per ciclo in ``directory``; restituisce i percorsi."""
+    os.makedirs(directory, exist_ok=True)
+    paths: List[str] = []
+    for name, text in iter_bed_programs(project, tlg_path, bed, optimize_path, sequence, modal, subprograms):
+        path = os.path.join(directory, name + ".xilog")
+        with atomic_write(path) as f:
+            f.write(text)
+        paths.append(path)
+    return paths
 
 
 def save_xilog_for_cabinet(
     raw_params: Dict[str, Any],
     filepath: str,
     tlg_path: Optional[str] = None,
+    modal: bool = False,
+    subprograms: bool = False,
 ) -> bool:
     """Salva file .xilog per il mobile."""
     try:
-        content = generate_xilog_for_cabinet(raw_params, tlg_path=tlg_path)
-        with open(filepath, "w", encoding="utf-8") as f:
+        content = generate_xilog_for_cabinet(raw_params, tlg_path=tlg_path, modal=modal, subprograms=subprograms)
+        with atomic_write(filepath) as f:
             f.write(content)
         return True
     except OSError:
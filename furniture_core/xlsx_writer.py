@@ -0,0 +1,246 @@
+"""
+Writer XLSX minimale in streaming (solo libreria standard: zipfile + XML).
+
+Le righe di ogni foglio finiscono in un file temporaneo man mano che
+arrivano (anche alternando i fogli); alla chiusura i file vengono copiati a
+blocchi nelle parti del pacchetto. La memoria resta costante qualunque sia
+il numero di righe. Solo valori (stringhe inline, numeri, booleani): niente
+stili, formule o larghezze colonna.
+"""
+
+from __future__ import annotations
+
+import math
+import numbers
+import re
+import shutil
+import tempfile
+import zipfile
+from typing import IO, Any, Dict, Iterable, List, Optional, Sequence
+from xml.sax.saxutils import escape, quoteattr
+
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+MAX_SHEET_NAME = 31
+
+_CONTENT_TYPES_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    "</Relationships>"
+)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    "</styleSheet>"
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = "</sheetData></worksheet>"
+
+
+def safe_sheet_name(name: str, used: Iterable[str] = ()) -> str:
+    """Nome foglio valido per Excel (≤ 31 caratteri, senza []:*?/\\, univoco)."""
+    base = _INVALID_SHEET_CHARS.sub("_", name).strip("'") or "Foglio"
+    base = base[:MAX_SHEET_NAME]
+    taken = {n.lower() for n in used}
+    candidate = base
+    n = 2
+    while candidate.lower() in taken:
+        suffix = " ({})".format(n)
+        candidate = base[: MAX_SHEET_NAME - len(suffix)] + suffix
+        n += 1
+    return candidate
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return '<c t="b"><v>{}</v></c>'.format(int(value))
+    if isinstance(value, numbers.Integral):
+        return "<c><v>{}</v></c>".format(int(value))
+    if isinstance(value, numbers.Real):
+        # Anche numpy.float64 & co.; NaN e infiniti non sono numeri validi in XLSX
+        value = float(value)
+        if not math.isfinite(value):
+            return "<c/>"
+        return "<c><v>{!r}</v></c>".format(value)
+    text = escape(_INVALID_XML.sub("", str(value)))
+    return '<c t="inlineStr"><is><t xml:space="preserve">{}</t></is></c>'.format(text)
+
+
+class XlsxWriter:
+    """
+    Cartella di lavoro XLSX scritta in streaming.
+
+    Uso::
+
+        with XlsxWriter("lista.xlsx") as book:
+            book.add_sheet("Legno 1.8")
+            book.append("Legno 1.8", ["Fianco_SX", 90.0, 60.0])
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._order: List[str] = []
+        self._parts: Dict[str, IO[str]] = {}
+        self._closed = False
+
+    def add_sheet(self, name: str) -> str:
+        """Crea un foglio; restituisce il nome effettivo (reso valido e univoco)."""
+        title = safe_sheet_name(name, self._order)
+        self._order.append(title)
+        self._parts[title] = tempfile.TemporaryFile("w+", encoding="utf-8")
+        return title
+
+    def append(self, sheet: str, row: Sequence[Any]) -> None:
+        self._parts[sheet].write("<row>" + "".join(map(_cell, row)) + "</row>")
+
+    def append_rows(self, sheet: str, rows: Iterable[Sequence[Any]]) -> None:
+        part = self._parts[sheet]
+        part.writelines("<row>" + "".join(map(_cell, row)) + "</row>" for row in rows)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            with zipfile.ZipFile(self.filepath, "w", zipfile.ZIP_DEFLATED) as zf:
+                self._write_package(zf)
+        finally:
+            for part in self._parts.values():
+                part.close()
+
+    def _write_package(self, zf: zipfile.ZipFile) -> None:
+        overrides = "".join(
+            '<Override PartName="/xl/worksheets/sheet{}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'.format(i)
+            for i in range(1, len(self._order) + 1)
+        )
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES_HEAD + overrides + "</Types>")
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/styles.xml", _STYLES)
+        sheets = "".join(
+            '<sheet name={} sheetId="{}" r:id="rId{}"/>'.format(quoteattr(name), i, i)
+            for i, name in enumerate(self._order, start=1)
+        )
+        zf.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            "<sheets>" + sheets + "</sheets></workbook>",
+        )
+        rels = "".join(
+            '<Relationship Id="rId{}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            'Target="worksheets/sheet{}.xml"/>'.format(i, i)
+            for i in range(1, len(self._order) + 1)
+        )
+        styles_id = len(self._order) + 1
+        rels += (
+            '<Relationship Id="rId{}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            'Target="styles.xml"/>'.format(styles_id)
+        )
+        zf.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + rels
+            + "</Relationships>",
+        )
+        for i, name in enumerate(self._order, start=1):
+            part = self._parts[name]
+            part.flush()
+            part.buffer.seek(0)
+            with zf.open("xl/worksheets/sheet{}.xml".format(i), "w", force_zip64=True) as dest:
+                dest.write(_SHEET_HEAD.encode("utf-8"))
+                shutil.copyfileobj(part.buffer, dest, 1 << 20)
+                dest.write(_SHEET_TAIL.encode("utf-8"))
+
+    def __enter__(self) -> "XlsxWriter":
+        return self
+
+    def __exit__(self, exc_type: Optional[type], exc: Optional[BaseException], tb: Any) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._closed = True
+            for part in self._parts.values():
+                part.close()
+
+
+class _OpenpyxlWriter:
+    """Stessa interfaccia di ``XlsxWriter`` sopra openpyxl in modalità write-only."""
+
+    def __init__(self, filepath: str, openpyxl: Any):
+        self.filepath = filepath
+        self._wb = openpyxl.Workbook(write_only=True)
+        self._sheets: Dict[str, Any] = {}
+
+    def add_sheet(self, name: str) -> str:
+        title = safe_sheet_name(name, self._sheets)
+        self._sheets[title] = self._wb.create_sheet(title)
+        return title
+
+    def append(self, sheet: str, row: Sequence[Any]) -> None:
+        self._sheets[sheet].append(list(row))
+
+    def append_rows(self, sheet: str, rows: Iterable[Sequence[Any]]) -> None:
+        ws = self._sheets[sheet]
+        for row in rows:
+            ws.append(list(row))
+
+    def close(self) -> None:
+        self._wb.save(self.filepath)
+
+    def __enter__(self) -> "_OpenpyxlWriter":
+        return self
+
+    def __exit__(self, exc_type: Optional[type], exc: Optional[BaseException], tb: Any) -> None:
+        if exc_type is None:
+            self.close()
+
+
+def open_workbook(filepath: str, engine: str = "auto") -> Any:
+    """
+    Cartella di lavoro in streaming.
+
+    Args:
+        filepath: file .xlsx di destinazione
+        engine: 'openpyxl' (write-only), 'stdlib' (``XlsxWriter``) o 'auto'
+            (openpyxl se installato, altrimenti stdlib)
+    """
+    if engine not in ("auto", "openpyxl", "stdlib"):
+        raise ValueError("engine non valido: {}".format(engine))
+    if engine != "stdlib":
+        try:
+            import openpyxl
+        except ImportError:
+            if engine == "openpyxl":
+                raise
+        else:
+            return _OpenpyxlWriter(filepath, openpyxl)
+    return XlsxWriter(filepath)
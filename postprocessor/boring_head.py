@@ -0,0 +1,183 @@
+"""
+Testa a forare multipla (gruppo 18 mandrini verticali, passo 32 mm)
+
+Fori allineati sul passo 32 mm, con stesso diametro e profondità, vengono
+forati insieme in un'unica affondata da mandrini adiacenti della testa.
+La mappa mandrini (posizione rispetto al mandrino 1 e utensile TLG
+montato) è configurabile; diametro e profondità massima arrivano dalla
+TLGLibrary.
+"""
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+PITCH_MM = 32.0
+_TOL = 0.01
+
+
+class Spindle(NamedTuple):
+    """Mandrino: numero, posizione rispetto al mandrino 1 (mm), utensile montato"""
+    number: int
+    dx: float
+    dy: float
+    tool: int
+
+
+class Plunge(NamedTuple):
+    """Affondata: fori forati insieme, il primo sotto ``spindles[0]``"""
+    holes: Tuple[Dict[str, Any], ...]
+    spindles: Tuple[int, ...]
+    axis: Optional[str]  # 'X', 'Y' o None (foro singolo)
+
+
+def default_spindles() -> List[Spindle]:
+    """
+    Mappa di default Record 130TV: 12 mandrini lungo X e 6 lungo Y,
+    passo 32 mm, punte Ø5 (T=1 / T=8 della libreria TLG)
+    """
+    spindles = [Spindle(n, PITCH_MM * (n - 1), 0.0, 1 if n % 2 else 8) for n in range(1, 13)]
+    spindles += [Spindle(12 + k, 0.0, PITCH_MM * k, 8 if k % 2 else 1) for k in range(1, 7)]
+    return spindles
+
+
+class SpindleMap:
+    """Mappa mandrini della testa a forare"""
+
+    def __init__(self, spindles: Optional[Iterable[Spindle]] = None,
+                 tlg_library=None, pitch: float = PITCH_MM):
+        """
+        Args:
+            spindles: Mandrini (default ``default_spindles()``)
+            tlg_library: TLGLibrary per diametro e profondità massima
+                degli utensili montati
+            pitch: Passo della testa in mm
+        """
+        self.spindles = list(spindles) if spindles is not None else default_spindles()
+        self.tlg_library = tlg_library
+        self.pitch = pitch
+        self._chains: Dict[Tuple[str, float, float], List[int]] = {}
+
+    def _tool(self, number: int) -> Optional[Dict[str, Any]]:
+        if self.tlg_library is None:
+            from tlg_parser.tlg_library import TLGLibrary
+            self.tlg_library = TLGLibrary()
+        return self.tlg_library.get_tool_by_number(number)
+
+    def _fits(self, spindle: Spindle, diameter: float, depth: float) -> bool:
+        tool = self._tool(spindle.tool)
+        return (tool is not None and abs(tool['diameter'] - diameter) < _TOL
+                and depth <= tool.get('max_depth', 0))
+
+    def chain(self, axis: str, diameter: float, depth: float) -> List[int]:
+        """
+        Mandrini adiacenti più lunghi lungo un asse per un diametro
+
+        Args:
+            axis: 'X' o 'Y'
+            diameter: Diametro foro
+            depth: Profondità foro (≤ profondità massima utensile)
+
+        Returns:
+            Numeri mandrino in ordine di coordinata crescente
+        """
+        key = (axis, diameter, depth)
+        if key in self._chains:
+            return self._chains[key]
+        usable = [s for s in self.spindles if self._fits(s, diameter, depth)]
+        # Per ogni fila (stessa coordinata sull'altro asse) cerca la serie più lunga a passo costante
+        rows: Dict[float, List[Tuple[float, int]]] = {}
+        for s in usable:
+            along, across = (s.dx, s.dy) if axis == 'X' else (s.dy, s.dx)
+            rows.setdefault(round(across, 2), []).append((along, s.number))
+        best: List[int] = []
+        for row in rows.values():
+            row.sort()
+            run = [row[0]]
+            for item in row[1:]:
+                if abs(item[0] - run[-1][0] - self.pitch) < _TOL:
+                    run.append(item)
+                else:
+                    if len(run) > len(best):
+                        best = [n for _, n in run]
+                    run = [item]
+            if len(run) > len(best):
+                best = [n for _, n in run]
+        self._chains[key] = best
+        return best
+
+
+def _runs(holes: Sequence[Dict[str, Any]], axis: str, pitch: float) -> List[List[int]]:
+    """Serie di fori (indici) allineati sull'asse a passo ``pitch``"""
+    along, across = ('x', 'y') if axis == 'X' else ('y', 'x')
+    lines: Dict[float, List[int]] = {}
+    for i, h in enumerate(holes):
+        lines.setdefault(round(h[across], 2), []).append(i)
+    runs: List[List[int]] = []
+    for idx in lines.values():
+        idx.sort(key=lambda i: holes[i][along])
+        run = [idx[0]]
+        for i in idx[1:]:
+            if abs(holes[i][along] - holes[run[-1]][along] - pitch) < _TOL:
+                run.append(i)
+            else:
+                runs.append(run)
+                run = [i]
+        runs.append(run)
+    return [r for r in runs if len(r) > 1]
+
+
+def compile_plunges(holes: Sequence[Dict[str, Any]], spindle_map: SpindleMap) -> List[Plunge]:
+    """
+    Raggruppa i fori in affondate multi-mandrino
+
+    I fori vanno divisi per diametro, profondità e quota Z; le serie più
+    lunghe vengono assegnate per prime, spezzate sulla lunghezza della
+    catena di mandrini disponibile.
+
+    Args:
+        holes: Fori con stessi 'diameter', 'depth' e 'z'
+        spindle_map: Mappa mandrini
+
+    Returns:
+        Affondate nell'ordine di scoperta; fori non allineati come
+        affondate singole (axis None) nel loro ordine originale
+    """
+    if not holes:
+        return []
+    diameter = holes[0]['diameter']
+    depth = holes[0]['depth']
+    chains = {axis: spindle_map.chain(axis, diameter, depth) for axis in ('X', 'Y')}
+    candidates = [
+        (axis, run)
+        for axis in ('X', 'Y') if len(chains[axis]) > 1
+        for run in _runs(holes, axis, spindle_map.pitch)
+    ]
+    candidates.sort(key=lambda c: -len(c[1]))
+
+    used = [False] * len(holes)
+    plunges: List[Plunge] = []
+    for axis, run in candidates:
+        chain = chains[axis]
+        free = []
+        # Solo tratti consecutivi di fori non ancora assegnati
+        for i in run + [None]:
+            if i is not None and not used[i]:
+                free.append(i)
+                continue
+            for start in range(0, len(free), len(chain)):
+                chunk = free[start:start + len(chain)]
+                if len(chunk) < 2:
+                    continue
+                for j in chunk:
+                    used[j] = True
+                plunges.append(Plunge(
+                    tuple(holes[j] for j in chunk),
+                    tuple(chain[:len(chunk)]),
+                    axis,
+                ))
+            free = []
+    single_spindle = (chains['X'] or chains['Y'] or [0])[0]
+    for i, h in enumerate(holes):
+        if not used[i]:
+            spindles = (single_spindle,) if single_spindle else ()
+            plunges.append(Plunge((h,), spindles, None))
+    return plunges
@@ -0,0 +1,271 @@
+"""
+Uscita modale Xilog: programmi più corti, stessa lavorazione
+
+Il NUM 1050 mantiene utensile, faccia, modi G e (dentro un blocco XBO o
+XGIN) le quote X/Y/Z/P dell'ultima istruzione. Il compressore tiene lo
+stesso stato e toglie le parole ridondanti:
+
+- righe T= / F= / G90 / G71 che non cambiano lo stato attivo
+- X= Y= Z= P= uguali all'istruzione precedente dello stesso blocco
+- zeri finali dei numeri (``60.00`` -> ``60``, valore identico)
+- commenti in coda alle istruzioni e righe vuote ripetute
+
+I commenti su riga propria (intestazioni pannello, note) restano, a meno
+di ``comment_lines=False``: allora restano solo le righe che identificano
+il pezzo (``LABEL_COMMENTS``). R=, DX=, DY= non sono modali e vengono
+sempre scritti. ``verify_compression`` interpreta i due programmi e
+conferma che danno la stessa sequenza di lavorazioni.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MODAL_AXES = ('X', 'Y', 'Z', 'P')
+BLOCK_OPEN = {'XBO': 'XBOE', 'XGIN': 'XGOUT'}
+BLOCK_CLOSE = {'XBOE', 'XGOUT'}
+# Gruppi di modi G: un codice annulla gli altri dello stesso gruppo
+G_GROUPS = {'G90': 'quote', 'G91': 'quote', 'G70': 'unita', 'G71': 'unita'}
+# Commenti tenuti anche senza righe di commento: l'operatore trova il pezzo
+LABEL_COMMENTS = ('; PANNELLO:', '; PEZZO:', '; ATTENZIONE')
+
+
+def short_number(value: str) -> str:
+    """
+    Forma più corta di un numero decimale con lo stesso valore
+
+    Args:
+        value: Testo del numero (es. '60.00', '-0.50')
+
+    Returns:
+        '60', '-0.5'; il testo invariato se non è un numero
+    """
+    if '.' not in value:
+        return value
+    try:
+        float(value)
+    except ValueError:
+        return value
+    text = value.rstrip('0').rstrip('.')
+    if text in ('', '-', '-0'):
+        return '0'
+    return text
+
+
+def _split(line: str) -> Tuple[Optional[str], List[Tuple[str, str]], str]:
+    """(comando, parole K=V, commento) di una riga"""
+    code, _, comment = line.partition(';')
+    command = None
+    words = []
+    for token in code.split():
+        key, sep, value = token.partition('=')
+        if sep:
+            words.append((key, value))
+        elif command is None and not words:
+            command = token
+        else:
+            words.append((token, ''))
+    return command, words, comment.strip()
+
+
+def _join(command: Optional[str], words: List[Tuple[str, str]], indent: str) -> str:
+    parts = [command] if command else []
+    parts.extend(f'{k}={v}' if v or k in MODAL_AXES else k for k, v in words)
+    return indent + ' '.join(parts)
+
+
+class ModalCompressor:
+    """
+    Compressore con stato: si può alimentare un blocco alla volta
+    (programmi scritti in streaming)
+    """
+
+    def __init__(self, strip_comments: bool = True, comment_lines: bool = True):
+        """
+        Args:
+            strip_comments: Toglie i commenti in coda alle istruzioni
+            comment_lines: Tiene i commenti su riga propria (False = solo
+                le righe ``LABEL_COMMENTS``)
+        """
+        self.strip_comments = strip_comments
+        self.comment_lines = comment_lines
+        self.modes: Dict[str, str] = {}
+        self.tool: Optional[str] = None
+        self.face = '1'
+        self.block: Optional[str] = None
+        self.axes: Dict[str, str] = {}
+        self._blank = False
+
+    def compress(self, lines: Iterable[str]) -> List[str]:
+        """
+        Comprime righe di programma
+
+        Args:
+            lines: Righe Xilog (senza a capo)
+
+        Returns:
+            Righe compresse
+        """
+        out: List[str] = []
+        for line in lines:
+            command, words, comment = _split(line)
+            if command is None and not words:
+                if comment and (self.comment_lines or line.startswith(LABEL_COMMENTS)):
+                    out.append(line)
+                    self._blank = False
+                elif comment:
+                    continue
+                elif not self._blank:
+                    out.append('')
+                    self._blank = True
+                continue
+            text = self._instruction(line, command, words)
+            if text is None:
+                continue
+            if comment and not self.strip_comments:
+                text += ' ; ' + comment
+            out.append(text)
+            self._blank = False
+        return out
+
+    def _instruction(self, line: str, command: Optional[str],
+                     words: List[Tuple[str, str]]) -> Optional[str]:
+        indent = line[:len(line) - len(line.lstrip())]
+        if command in G_GROUPS and not words:
+            group = G_GROUPS[command]
+            if self.modes.get(group) == command:
+                return None
+            self.modes[group] = command
+            return indent + command
+        if command is None and len(words) == 1 and words[0][0] in ('T', 'F'):
+            key, value = words[0]
+            value = short_number(value)
+            if key == 'T':
+                if value == self.tool:
+                    return None
+                self.tool = value
+            else:
+                if value == self.face:
+                    return None
+                self.face = value
+            return f'{indent}{key}={value}'
+        if command in BLOCK_OPEN:
+            self.block = command
+            self.axes = {}
+        elif command in BLOCK_CLOSE:
+            self.block = None
+            self.axes = {}
+
+        words = [(k, short_number(v)) for k, v in words]
+        if self.block is not None and command not in BLOCK_OPEN:
+            kept = []
+            for key, value in words:
+                if key in MODAL_AXES:
+                    if self.axes.get(key) == value:
+                        continue
+                    self.axes[key] = value
+                kept.append((key, value))
+            if not kept and words:
+                # Istruzione ripetuta identica (es. foro doppio): resta una quota
+                kept = [next(w for w in words if w[0] in MODAL_AXES)]
+            words = kept
+        return _join(command, words, indent)
+
+
+def compress_program(text: str, strip_comments: bool = True, comment_lines: bool = True) -> str:
+    """
+    Versione modale di un programma Xilog completo
+
+    Args:
+        text: Programma generato da XilogGenerator
+        strip_comments: Toglie i commenti in coda alle istruzioni
+        comment_lines: Tiene i commenti su riga propria
+
+    Returns:
+        Programma compresso
+    """
+    compressor = ModalCompressor(strip_comments, comment_lines)
+    return '\n'.join(compressor.compress(text.split('\n')))
+
+
+def program_actions(text: str) -> List[Tuple[Any, ...]]:
+    """
+    Sequenza di lavorazioni e cambi di stato descritta da un programma
+
+    Interpreta le regole modali del compressore: T=, F= e modi G contano
+    solo quando cambiano; dentro XBO/XGIN le quote mancanti sono quelle
+    dell'istruzione precedente.
+
+    Args:
+        text: Programma Xilog
+
+    Returns:
+        Lista di tuple confrontabili (valori numerici come float)
+    """
+    actions: List[Tuple[Any, ...]] = []
+    modes: Dict[str, str] = {}
+    tool = None
+    face = 1.0
+    block = None
+    axes: Dict[str, float] = {}
+    for line in text.split('\n'):
+        command, words, _ = _split(line)
+        if command is None and not words:
+            continue
+        if command in G_GROUPS and not words:
+            if modes.get(G_GROUPS[command]) != command:
+                modes[G_GROUPS[command]] = command
+                actions.append(('G', command))
+            continue
+        if command is None and len(words) == 1 and words[0][0] in ('T', 'F'):
+            key, value = words[0][0], float(words[0][1])
+            if key == 'T' and value != tool:
+                tool = value
+                actions.append(('T', value))
+            elif key == 'F' and value != face:
+                face = value
+                actions.append(('F', value))
+            continue
+        if command in BLOCK_OPEN or command in BLOCK_CLOSE:
+            block = command if command in BLOCK_OPEN else None
+            axes = {}
+            actions.append((command,))
+            continue
+        values = []
+        for key, value in words:
+            try:
+                number = float(value)
+            except ValueError:
+                values.append((key, value))
+                continue
+            if block is not None and key in MODAL_AXES:
+                axes[key] = number
+            else:
+                values.append((key, number))
+        if block is not None:
+            values.extend(axes.items())
+        actions.append((command, face, tool, tuple(sorted(values))))
+    return actions
+
+
+def verify_compression(original: str, compressed: str, limit: int = 10) -> List[str]:
+    """
+    Confronta un programma con la sua versione compressa
+
+    Args:
+        original: Programma completo
+        compressed: Programma modale
+        limit: Numero massimo di differenze riportate
+
+    Returns:
+        Differenze trovate (lista vuota = stessa lavorazione)
+    """
+    a = program_actions(original)
+    b = program_actions(compressed)
+    errors = []
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            errors.append(f'istruzione {i + 1}: {x} != {y}')
+            if len(errors) >= limit:
+                return errors
+    if len(a) != len(b):
+        errors.append(f'istruzioni: {len(a)} != {len(b)}')
+    return errors
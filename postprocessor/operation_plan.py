@@ -0,0 +1,217 @@
+"""
+Pianificazione lavorazioni: meno cambi utensile e cambi faccia
+
+Le lavorazioni di un lotto vengono prima registrate come rappresentazione
+intermedia (una Operation per gruppo utensile), poi riordinate e infine
+scritte da un XilogGenerator. Vincoli: nello stesso pannello le forature
+precedono fresature e scanalature; senza ``cross_panel`` ogni pannello
+resta un blocco a sé (programmi con intestazione per pannello), con
+``cross_panel`` (pezzi sullo stesso piano) le lavorazioni di pannelli
+diversi si possono alternare.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .xilog_generator import XilogGenerator, holes_from_arrays
+
+STAGE_DRILL = 0
+STAGE_ROUTE = 1
+
+
+class Operation(NamedTuple):
+    """Lavorazione registrata (coordinate già sul campo di lavoro)"""
+    panel: int
+    index: int  # ordine di registrazione
+    stage: int
+    kind: str  # 'drill', 'routing', 'groove'
+    face: int
+    tool: Optional[int]  # None = nessuna selezione utensile (scanalatura)
+    args: Tuple[Any, ...]
+
+
+class OperationRecorder(XilogGenerator):
+    """
+    XilogGenerator che registra le lavorazioni invece di scriverle
+
+    Stessa API di XilogGenerator: le funzioni che preparano un pannello
+    (spine, cerniere, fori 32 mm) funzionano senza modifiche.
+    """
+
+    def __init__(self, tlg_library=None):
+        super().__init__(tlg_library)
+        self.operations: List[Operation] = []
+        self.panel = 0
+
+    def begin_panel(self, panel: int):
+        """Le lavorazioni successive appartengono al pannello ``panel``"""
+        self.panel = panel
+
+    def _record(self, stage: int, kind: str, face: int, tool: Optional[int], args: Tuple[Any, ...]):
+        self.operations.append(Operation(
+            self.panel, len(self.operations), stage, kind, face, tool, args,
+        ))
+
+    def add_drilling(self, holes: List[Dict[str, Any]], face: int = 1, optimized: bool = True,
+                     optimize_path: Optional[bool] = None):
+        by_diameter: Dict[float, List[Dict[str, Any]]] = {}
+        for hole in holes:
+            by_diameter.setdefault(hole['diameter'], []).append(hole)
+        for diameter, group in by_diameter.items():
+            placed = []
+            for hole in group:
+                hole = dict(hole)
+                hole['x'], hole['y'] = self._at(hole['x'], hole['y'])
+                placed.append(hole)
+            tool = self._select_tool(diameter, face)
+            self.current_face = face
+            self._record(STAGE_DRILL, 'drill', face, tool, (tuple(placed), diameter, optimized))
+
+    def add_drilling_arrays(self, x, y, depth, diameter: float, z=0, face: int = 1,
+                            optimized: bool = True):
+        self.add_drilling(holes_from_arrays(x, y, depth, diameter, z), face, optimized)
+
+    def add_routing(self, path: List[Tuple[float, float]], depth: float,
+                    tool_diameter: float, face: int = 1):
+        if not path or len(path) < 2:
+            return
+        tool = self._select_routing_tool(tool_diameter, face)
+        self.current_face = face
+        placed = tuple(self._at(x, y) for x, y in path)
+        self._record(STAGE_ROUTE, 'routing', face, tool, (placed, depth, tool_diameter))
+
+    def add_groove(self, start_x: float, start_y: float, length: float,
+                   width: float, depth: float, orientation: str = 'X'):
+        x, y = self._at(start_x, start_y)
+        self._record(STAGE_ROUTE, 'groove', self.current_face, None,
+                     (x, y, length, width, depth, orientation))
+
+
+def count_changes(operations: Sequence[Operation], face: int = 1) -> Dict[str, int]:
+    """
+    Cambi utensile e faccia di una sequenza di lavorazioni
+
+    Args:
+        operations: Lavorazioni nell'ordine di esecuzione
+        face: Faccia attiva all'inizio
+
+    Returns:
+        Dict con 'cambi_utensile' (il primo carico conta), 'cambi_faccia'
+        e 'selezioni_utensile' (righe T= scritte)
+    """
+    tool = None
+    tool_changes = face_changes = selections = 0
+    for op in operations:
+        if op.face != face:
+            face_changes += 1
+            face = op.face
+        if op.tool is None:
+            continue
+        selections += 1
+        if op.tool != tool:
+            tool_changes += 1
+            tool = op.tool
+    return {
+        'cambi_utensile': tool_changes,
+        'cambi_faccia': face_changes,
+        'selezioni_utensile': selections,
+    }
+
+
+def _merge(operations: List[Operation], cross_panel: bool) -> List[Operation]:
+    """Unisce forature consecutive con stessa faccia, diametro e modalità"""
+    merged: List[Operation] = []
+    for op in operations:
+        prev = merged[-1] if merged else None
+        if (prev is not None and op.kind == 'drill' and prev.kind == 'drill'
+                and prev.face == op.face and prev.tool == op.tool
+                and prev.args[1:] == op.args[1:]
+                and (cross_panel or prev.panel == op.panel)):
+            merged[-1] = prev._replace(args=(prev.args[0] + op.args[0],) + prev.args[1:])
+        else:
+            merged.append(op)
+    return merged
+
+
+def sequence_operations(operations: Sequence[Operation], cross_panel: bool = False,
+                        face: int = 1) -> List[Operation]:
+    """
+    Riordina le lavorazioni per ridurre cambi faccia e cambi utensile
+
+    Scelta avida: tra le lavorazioni eseguibili (stadio minimo rimasto
+    del loro pannello) vince quella che non cambia faccia, poi quella che
+    non cambia utensile, poi l'ordine di registrazione. Le forature
+    consecutive con stesso utensile vengono unite in un solo blocco.
+
+    Args:
+        operations: Lavorazioni registrate
+        cross_panel: True se i pannelli sono sullo stesso piano (stesso
+            programma senza intestazioni intermedie)
+        face: Faccia attiva all'inizio
+
+    Returns:
+        Nuova sequenza
+    """
+    panels: Dict[int, List[Operation]] = {}
+    for op in operations:
+        panels.setdefault(op.panel, []).append(op)
+    groups = list(panels.values()) if not cross_panel else [list(operations)]
+
+    tool = None
+    result: List[Operation] = []
+    for group in groups:
+        pending = sorted(group, key=lambda op: op.index)
+        while pending:
+            # Stadio minimo rimasto per pannello
+            stage: Dict[int, int] = {}
+            for op in pending:
+                if op.stage < stage.get(op.panel, op.stage + 1):
+                    stage[op.panel] = op.stage
+            best = None
+            best_cost = None
+            for op in pending:
+                if op.stage != stage[op.panel]:
+                    continue
+                op_tool = tool if op.tool is None else op.tool
+                cost = (op.face != face, op_tool != tool, op.index)
+                if best_cost is None or cost < best_cost:
+                    best, best_cost = op, cost
+            pending.remove(best)
+            result.append(best)
+            face = best.face
+            if best.tool is not None:
+                tool = best.tool
+    return _merge(result, cross_panel)
+
+
+def emit_operations(gen: XilogGenerator, operations: Sequence[Operation]):
+    """Scrive le lavorazioni pianificate con un XilogGenerator (origine 0)"""
+    gen.set_origin(0.0, 0.0)
+    for op in operations:
+        if op.kind == 'drill':
+            holes, _, optimized = op.args
+            gen.add_drilling(list(holes), face=op.face, optimized=optimized)
+        elif op.kind == 'routing':
+            path, depth, tool_diameter = op.args
+            gen.add_routing(list(path), depth, tool_diameter, face=op.face)
+        else:
+            gen.add_face_change(op.face)
+            gen.add_groove(*op.args)
+
+
+class SequencingReport(NamedTuple):
+    """Confronto cambi prima / dopo la pianificazione"""
+    before: Dict[str, int]
+    after: Dict[str, int]
+
+    def lines(self) -> List[str]:
+        """Righe commento per il programma"""
+        return [
+            f'; Sequenza lavorazioni: {key.replace("_", " ")} '
+            f'{self.before[key]} -> {self.after[key]}'
+            for key in ('cambi_utensile', 'cambi_faccia', 'selezioni_utensile')
+        ]
+
+
+def plan_report(operations: Sequence[Operation], planned: Sequence[Operation]) -> SequencingReport:
+    """Report cambi utensile / faccia prima e dopo"""
+    return SequencingReport(count_changes(operations), count_changes(planned))
@@ -0,0 +1,210 @@
+"""
+Ottimizzazione ordine fori (percorso in rapido della testa)
+
+Problema del commesso viaggiatore a percorso aperto: partenza dalla
+posizione corrente della testa, nessun ritorno. Costruzione nearest
+neighbour, poi miglioramento 2-opt e Or-opt (spostamento di segmenti da 1
+a 3 fori, anche invertiti). Il lavoro è limitato da un numero massimo di
+mosse valutate, non dal tempo: stesso input, stesso ordine.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import math
+
+Point = Tuple[float, float]
+
+# Mosse valutate al massimo per gruppo di fori (~0.5 s in CPython)
+DEFAULT_MAX_EVALUATIONS = 400000
+
+
+def _euclidean(a: Point, b: Point) -> float:
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def _chebyshev(a: Point, b: Point) -> float:
+    # Assi X/Y indipendenti alla stessa velocità: conta l'asse più lungo
+    return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+
+METRICS: Dict[str, Callable[[Point, Point], float]] = {
+    'euclidean': _euclidean,
+    'chebyshev': _chebyshev,
+}
+
+
+def travel_distance(points: Sequence[Point], start: Point = (0.0, 0.0),
+                    metric: str = 'euclidean') -> float:
+    """
+    Lunghezza del percorso in rapido che visita i punti nell'ordine dato
+
+    Args:
+        points: Sequenza di punti (x, y)
+        start: Posizione iniziale della testa
+        metric: 'euclidean' o 'chebyshev'
+
+    Returns:
+        Distanza totale in mm
+    """
+    dist = METRICS[metric]
+    total = 0.0
+    prev = start
+    for p in points:
+        total += dist(prev, p)
+        prev = p
+    return total
+
+
+def _nearest_neighbour(points: Sequence[Point], start: Point,
+                       dist: Callable[[Point, Point], float]) -> List[int]:
+    remaining = list(range(len(points)))
+    order: List[int] = []
+    current = start
+    while remaining:
+        # A parità di distanza vince l'indice più basso (min è stabile)
+        k = min(range(len(remaining)), key=lambda k: dist(current, points[remaining[k]]))
+        i = remaining.pop(k)
+        order.append(i)
+        current = points[i]
+    return order
+
+
+def _two_opt(route: List[Point], dist: Callable[[Point, Point], float], budget: int) -> int:
+    """route[0] è la partenza (fissa). Restituisce le valutazioni rimaste."""
+    n = len(route)
+    improved = True
+    while improved and budget > 0:
+        improved = False
+        for i in range(1, n - 1):
+            a, b = route[i - 1], route[i]
+            d_ab = dist(a, b)
+            for j in range(i + 1, n):
+                budget -= 1
+                c = route[j]
+                if j + 1 < n:
+                    d = route[j + 1]
+                    delta = dist(a, c) + dist(b, d) - d_ab - dist(c, d)
+                else:
+                    # Ultimo tratto: il percorso è aperto, nessun arco dopo c
+                    delta = dist(a, c) - d_ab
+                if delta < -1e-9:
+                    route[i:j + 1] = route[i:j + 1][::-1]
+                    b = route[i]
+                    d_ab = dist(a, b)
+                    improved = True
+                if budget <= 0:
+                    return 0
+    return budget
+
+
+def _or_opt(route: List[Point], dist: Callable[[Point, Point], float], budget: int) -> int:
+    """Sposta segmenti di 1-3 punti (anche invertiti) tra due archi."""
+    n = len(route)
+    improved = True
+    while improved and budget > 0:
+        improved = False
+        for size in (1, 2, 3):
+            i = 1
+            while i + size <= n:
+                seg_first, seg_last = route[i], route[i + size - 1]
+                prev = route[i - 1]
+                nxt = route[i + size] if i + size < n else None
+                removed = dist(prev, seg_first)
+                if nxt is not None:
+                    removed += dist(seg_last, nxt) - dist(prev, nxt)
+                best = None
+                for j in range(0, n):
+                    # Inserimento tra route[j] e route[j + 1], fuori dal segmento
+                    if i - 1 <= j < i + size:
+                        continue
+                    budget -= 1
+                    p = route[j]
+                    q = route[j + 1] if j + 1 < n else None
+                    base = dist(p, q) if q is not None else 0.0
+                    fwd = dist(p, seg_first) + (dist(seg_last, q) if q is not None else 0.0) - base
+                    rev = dist(p, seg_last) + (dist(seg_first, q) if q is not None else 0.0) - base
+                    gain = removed - min(fwd, rev)
+                    if gain > 1e-9 and (best is None or gain > best[0]):
+                        best = (gain, j, rev < fwd)
+                if best is not None:
+                    _, j, reverse = best
+                    segment = route[i:i + size]
+                    if reverse:
+                        segment.reverse()
+                    del route[i:i + size]
+                    at = j + 1 if j < i else j + 1 - size
+                    route[at:at] = segment
+                    improved = True
+                if budget <= 0:
+                    return 0
+                i += 1
+    return budget
+
+
+def optimize_order(points: Sequence[Point], start: Point = (0.0, 0.0),
+                   metric: str = 'euclidean',
+                   max_evaluations: int = DEFAULT_MAX_EVALUATIONS) -> List[int]:
+    """
+    Ordine di visita che riduce il percorso in rapido
+
+    Args:
+        points: Punti da visitare (x, y)
+        start: Posizione iniziale della testa
+        metric: 'euclidean' o 'chebyshev'
+        max_evaluations: Limite mosse valutate (2-opt + Or-opt)
+
+    Returns:
+        Indici dei punti nell'ordine ottimizzato
+    """
+    if len(points) <= 2:
+        order = list(range(len(points)))
+        if len(points) == 2 and travel_distance([points[1], points[0]], start, metric) < \
+                travel_distance(points, start, metric):
+            order.reverse()
+        return order
+
+    dist = METRICS[metric]
+    order = _nearest_neighbour(points, start, dist)
+    # Lavora sui punti (con la partenza in testa) e rimappa agli indici alla fine;
+    # i duplicati esatti restano adiacenti e si rimappano in ordine
+    route: List[Point] = [start] + [points[i] for i in order]
+    budget = _two_opt(route, dist, max_evaluations)
+    while budget > 0:
+        before = travel_distance(route[1:], start, metric)
+        budget = _or_opt(route, dist, budget)
+        if budget > 0:
+            budget = _two_opt(route, dist, budget)
+        if travel_distance(route[1:], start, metric) >= before - 1e-9:
+            break
+
+    slots: Dict[Point, List[int]] = {}
+    for i in reversed(order):
+        slots.setdefault(points[i], []).append(i)
+    return [slots[p].pop() for p in route[1:]]
+
+
+def optimize_holes(holes: Sequence[Any], start: Point = (0.0, 0.0),
+                   metric: str = 'euclidean',
+                   max_evaluations: int = DEFAULT_MAX_EVALUATIONS,
+                   key: Optional[Callable[[Any], Point]] = None) -> Tuple[List[Any], float, float]:
+    """
+    Riordina un gruppo di fori
+
+    Args:
+        holes: Lista di dict con 'x', 'y' (o altri elementi con ``key``)
+        start: Posizione iniziale della testa
+        metric: 'euclidean' o 'chebyshev'
+        max_evaluations: Limite mosse valutate
+        key: Coordinate da usare per un elemento (default (x, y))
+
+    Returns:
+        (fori riordinati, percorso prima, percorso dopo) in mm
+    """
+    key = key or (lambda h: (h['x'], h['y']))
+    points = [key(h) for h in holes]
+    order = optimize_order(points, start, metric, max_evaluations)
+    before = travel_distance(points, start, metric)
+    after = travel_distance([points[i] for i in order], start, metric)
+    if after > before:
+        # Mai peggiorare l'ordine di partenza
+        return list(holes), before, before
+    return [holes[i] for i in order], before, after
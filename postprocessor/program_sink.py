@@ -0,0 +1,95 @@
+"""
+Scrittura in streaming dei programmi Xilog
+
+``ProgramSink`` prende il posto della lista ``program_lines`` di
+XilogGenerator: ogni riga va subito sullo stream (file bufferizzato,
+socket, io.StringIO...), così la memoria non cresce con il programma.
+``atomic_write`` scrive su un file temporaneo nella stessa cartella e lo
+rinomina solo a scrittura completata: chi legge la cartella condivisa
+della macchina vede il programma vecchio o quello nuovo, mai uno a metà.
+"""
+
+from contextlib import contextmanager
+from typing import IO, Iterable, Iterator, Optional
+import os
+import stat
+import tempfile
+
+from .modal_output import ModalCompressor
+
+WRITE_BUFFER = 1 << 16
+
+
+class ProgramSink:
+    """
+    Righe di programma scritte direttamente su uno stream
+
+    Offre i metodi di lista usati dal generatore (append, extend, clear).
+    Le righe sono separate da '\\n' come in ``XilogGenerator.generate()``:
+    il testo scritto è identico a quello generato in memoria.
+    """
+
+    def __init__(self, stream: IO[str], compressor: Optional[ModalCompressor] = None):
+        """
+        Args:
+            stream: Destinazione con metodo write(str)
+            compressor: Compressore modale applicato prima della scrittura
+        """
+        self.stream = stream
+        self.compressor = compressor
+        self.lines_written = 0
+
+    def append(self, line: str):
+        self.extend((line,))
+
+    def extend(self, lines: Iterable[str]):
+        if self.compressor is not None:
+            lines = self.compressor.compress(lines)
+        write = self.stream.write
+        for line in lines:
+            if self.lines_written:
+                write('\n')
+            write(line)
+            self.lines_written += 1
+
+    def clear(self):
+        """Le righe sono già sullo stream: niente da liberare"""
+
+    def __len__(self) -> int:
+        return self.lines_written
+
+
+@contextmanager
+def atomic_write(filepath: str, encoding: str = 'utf-8') -> Iterator[IO[str]]:
+    """
+    File di testo scritto in modo atomico (temporaneo + rename)
+
+    In caso di errore il temporaneo viene rimosso e il file di
+    destinazione resta com'era. Se il file esiste già ne mantiene i
+    permessi, altrimenti resta 0600 come lo crea mkstemp (la umask del
+    processo non viene toccata: os.umask() vale per tutti i thread).
+
+    Args:
+        filepath: File di destinazione
+        encoding: Codifica del testo
+
+    Yields:
+        File di testo bufferizzato aperto in scrittura
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(filepath) + '-',
+                               suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, buffering=WRITE_BUFFER) as f:
+            try:
+                os.chmod(tmp, stat.S_IMODE(os.stat(filepath).st_mode))
+            except FileNotFoundError:
+                pass
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, filepath)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
@@ -0,0 +1,210 @@
+"""
+Sottoprogrammi per gruppi di fori ripetuti
+
+Spinatura, fori reggi-ripiano e cerniere si ripetono identici su molti
+pannelli. Ogni blocco XBO ... XBOE viene ridotto a coordinate relative al
+primo foro; i blocchi con la stessa forma (stessi scostamenti, quote Z,
+profondità e parole R=/DX=/DY=) diventano un sottoprogramma scritto una
+volta dopo M30 e richiamato con l'offset del primo foro:
+
+    CALL 2 X=32.00 Y=100.00
+    ...
+    SUB 2
+    XBO
+      X=0.00 Y=0.00 Z=0.00 P=12.00
+      X=836.00 Y=0.00 Z=0.00 P=12.00
+    XBOE
+    ENDSUB
+
+Le parole di definizione, fine e chiamata sono configurabili
+(``SubprogramSyntax``) per adattarle alla sintassi macro del controllo.
+``expand_subprograms`` ricostruisce il programma in linea (per verifica
+con ``modal_output.verify_compression``).
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+SUBPROGRAM_BANNER = [
+    '',
+    '; ================================================================',
+    '; SOTTOPROGRAMMI',
+    '; ================================================================',
+]
+
+
+class SubprogramSyntax(NamedTuple):
+    """Parole per definizione, fine e chiamata di un sottoprogramma"""
+    define: str = 'SUB'
+    end: str = 'ENDSUB'
+    call: str = 'CALL'
+
+
+# Forma di un blocco: riga XBO + righe foro con X/Y relativi (centesimi di mm)
+_Shape = Tuple[str, Tuple[Tuple[Tuple[str, object], ...], ...]]
+
+
+def _centi(value: str) -> int:
+    return int(round(float(value) * 100))
+
+
+def _format(centi: int) -> str:
+    return f'{centi / 100:.2f}'
+
+
+def _hole_words(line: str) -> Optional[List[Tuple[str, str]]]:
+    code = line.partition(';')[0]
+    words = []
+    for token in code.split():
+        key, sep, value = token.partition('=')
+        if not sep:
+            return None
+        words.append((key, value))
+    return words
+
+
+def _shape(block: List[str]) -> Optional[Tuple[_Shape, Tuple[int, int]]]:
+    """(forma, origine) di un blocco XBO; None se non è riducibile"""
+    rows = []
+    origin = None
+    for line in block[1:-1]:
+        words = _hole_words(line)
+        if not words:
+            return None
+        values = dict(words)
+        if 'X' not in values or 'Y' not in values:
+            return None
+        x, y = _centi(values['X']), _centi(values['Y'])
+        if origin is None:
+            origin = (x, y)
+        row = []
+        for key, value in words:
+            if key == 'X':
+                row.append((key, x - origin[0]))
+            elif key == 'Y':
+                row.append((key, y - origin[1]))
+            else:
+                row.append((key, value))
+        rows.append(tuple(row))
+    if origin is None:
+        return None
+    return (block[0].partition(';')[0].strip(), tuple(rows)), origin
+
+
+def _blocks(lines: List[str]) -> List[Tuple[int, int]]:
+    """Intervalli [inizio, fine] dei blocchi XBO ... XBOE"""
+    spans = []
+    start = None
+    for i, line in enumerate(lines):
+        command = line.partition(';')[0].strip()
+        if command == 'XBO':
+            start = i
+        elif command == 'XBOE' and start is not None:
+            spans.append((start, i))
+            start = None
+    return spans
+
+
+def extract_subprograms(text: str, syntax: SubprogramSyntax = SubprogramSyntax(),
+                        min_holes: int = 2, min_uses: int = 2) -> str:
+    """
+    Sostituisce i blocchi di fori ripetuti con chiamate a sottoprogramma
+
+    Args:
+        text: Programma Xilog completo (quote assolute su ogni foro)
+        syntax: Parole di definizione / fine / chiamata
+        min_holes: Righe foro minime per un sottoprogramma
+        min_uses: Ripetizioni minime della stessa forma
+
+    Returns:
+        Programma con le chiamate e le definizioni dopo il corpo
+    """
+    lines = text.split('\n')
+    spans = _blocks(lines)
+    shapes = []
+    uses: Dict[_Shape, int] = {}
+    for start, end in spans:
+        found = _shape(lines[start:end + 1]) if end - start - 1 >= min_holes else None
+        shapes.append(found)
+        if found is not None:
+            uses[found[0]] = uses.get(found[0], 0) + 1
+
+    numbers: Dict[_Shape, int] = {}
+    out: List[str] = []
+    last = 0
+    for (start, end), found in zip(spans, shapes):
+        if found is None or uses[found[0]] < min_uses:
+            continue
+        shape, (x, y) = found
+        if shape not in numbers:
+            numbers[shape] = len(numbers) + 1
+        out.extend(lines[last:start])
+        out.append(f'{syntax.call} {numbers[shape]} X={_format(x)} Y={_format(y)}'
+                   f' ; {len(shape[1])} fori')
+        last = end + 1
+    if not numbers:
+        return text
+    out.extend(lines[last:])
+
+    out.extend(SUBPROGRAM_BANNER)
+    for shape, number in numbers.items():
+        xbo, rows = shape
+        out.append(f'{syntax.define} {number}')
+        out.append(xbo)
+        for row in rows:
+            words = [f'{k}={_format(v)}' if k in ('X', 'Y') else f'{k}={v}' for k, v in row]
+            out.append('  ' + ' '.join(words))
+        out.append('XBOE')
+        out.append(syntax.end)
+    out.append('')
+    return '\n'.join(out)
+
+
+def expand_subprograms(text: str, syntax: SubprogramSyntax = SubprogramSyntax()) -> str:
+    """
+    Programma con le chiamate sostituite dal corpo del sottoprogramma
+
+    Args:
+        text: Programma con definizioni e chiamate
+        syntax: Parole di definizione / fine / chiamata
+
+    Returns:
+        Programma in linea (senza definizioni)
+    """
+    bodies: Dict[str, List[str]] = {}
+    main: List[str] = []
+    current = None
+    for line in text.split('\n'):
+        tokens = line.partition(';')[0].split()
+        if tokens[:1] == [syntax.define] and len(tokens) == 2:
+            current = bodies.setdefault(tokens[1], [])
+        elif tokens == [syntax.end]:
+            current = None
+        elif current is not None:
+            current.append(line)
+        else:
+            main.append(line)
+
+    out: List[str] = []
+    for line in main:
+        tokens = line.partition(';')[0].split()
+        if tokens[:1] != [syntax.call]:
+            out.append(line)
+            continue
+        if len(tokens) < 2 or tokens[1] not in bodies:
+            raise ValueError(f'Sottoprogramma non definito: {line.strip()}')
+        offset = dict(t.split('=', 1) for t in tokens[2:])
+        dx, dy = _centi(offset.get('X', '0')), _centi(offset.get('Y', '0'))
+        for body_line in bodies[tokens[1]]:
+            words = _hole_words(body_line)
+            if not words:
+                out.append(body_line)
+                continue
+            shifted = []
+            for key, value in words:
+                if key == 'X':
+                    value = _format(_centi(value) + dx)
+                elif key == 'Y':
+                    value = _format(_centi(value) + dy)
+                shifted.append(f'{key}={value}')
+            out.append('  ' + ' '.join(shifted))
+    return '\n'.join(out)
@@ -9,23 +9,185 @@ Genera codice Xilog Plus per CNC SCM Record 130TV con:
 - Aggregato serratura 3kW Ø16
 """
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 import math
+import numbers
+
+try:
+    import numpy as np
+except ImportError:  # NumPy opzionale
+    np = None
+
+from .boring_head import SpindleMap, compile_plunges
+from .modal_output import ModalCompressor, compress_program
+from .path_optimizer import DEFAULT_MAX_EVALUATIONS, optimize_holes
+from .program_sink import ProgramSink, atomic_write
+from .subprograms import SubprogramSyntax, extract_subprograms
+
+_HOLE_WORDS = ('X', 'Y', 'Z', 'P')
+
+
+def _constant(column) -> Optional[str]:
+    """Valore formattato se la colonna (o lo scalare) è costante, altrimenti None"""
+    if isinstance(column, (int, float)):
+        return f'{column:.2f}'
+    first = column[0]
+    if column.count(first) != len(column):
+        return None
+    if first == 0 and len({math.copysign(1.0, v) for v in column}) > 1:
+        return None  # 0.00 e -0.00 nella stessa colonna
+    return f'{first:.2f}'
+
+
+def _hole_lines(prefix: str, suffix: str, columns: Sequence[Any]) -> List[str]:
+    """
+    Righe foro di un gruppo formattate in blocco
+    
+    Le colonne costanti (tipicamente Z e P) entrano già scritte nel
+    modello di riga; le colonne con pochi valori distinti (fori a passo
+    32 mm) formattano ogni valore una volta sola. Testo identico a
+    f'{v:.2f}' valore per valore.
+    
+    Args:
+        prefix, suffix: Testo prima di X= e dopo P=
+        columns: x, y, z, profondità (liste, o scalari per colonne costanti)
+    """
+    n = next(len(c) for c in columns if not isinstance(c, (int, float)))
+    fields = []
+    variable = []
+    for word, column in zip(_HOLE_WORDS, columns):
+        const = _constant(column)
+        if const is not None:
+            fields.append(f'{word}={const}')
+            continue
+        distinct = set(column)
+        # Zeri esclusi (0.0 e -0.0 sono la stessa chiave), NaN esclusi
+        if len(distinct) * 4 <= n and 0 not in distinct and all(v == v for v in distinct):
+            text = {v: f'{v:.2f}' for v in distinct}
+            variable.append(list(map(text.__getitem__, column)))
+            fields.append(word + '={}')
+        else:
+            variable.append(column)
+            fields.append(word + '={:.2f}')
+    template = prefix + ' '.join(fields) + suffix
+    if not variable:
+        return [template] * n
+    return list(map(template.format, *variable))
+
+
+def _as_list(values) -> Any:
+    """Colonna come lista di float Python (array NumPy, array('d'), sequenze) o scalare"""
+    if isinstance(values, (int, float)):
+        return values
+    if isinstance(values, numbers.Integral):
+        return int(values)  # numpy.int64 & co.
+    if isinstance(values, numbers.Real):
+        return float(values)
+    if np is not None and isinstance(values, np.ndarray):
+        return values.tolist()  # array 0-d: scalare
+    return list(values)
+
+
+def _hole_arrays(x, y, z, depth) -> List[Any]:
+    """
+    Colonne x, y, z, profondità con lunghezza comune
+    
+    x e y diventano sempre liste: uno scalare vale un foro, o viene
+    ripetuto sulla lunghezza delle altre colonne; z e profondità restano
+    scalari se lo sono.
+    """
+    columns = [_as_list(c) for c in (x, y, z, depth)]
+    sizes = {len(c) for c in columns if not isinstance(c, (int, float))}
+    if len(sizes) > 1:
+        raise ValueError(f'Colonne fori di lunghezza diversa: {sorted(sizes)}')
+    n = sizes.pop() if sizes else 1
+    for i in (0, 1):
+        if isinstance(columns[i], (int, float)):
+            columns[i] = [columns[i]] * n
+    return columns
+
+
+def holes_from_arrays(x, y, depth, diameter: float, z=0) -> List[Dict[str, Any]]:
+    """Fori come lista di dict (formato di add_drilling) da colonne x, y, z, depth"""
+    x, y, z, depth = _hole_arrays(x, y, z, depth)
+    n = len(x)
+    zs = [z] * n if isinstance(z, (int, float)) else z
+    ds = [depth] * n if isinstance(depth, (int, float)) else depth
+    return [
+        {'x': hx, 'y': hy, 'z': hz, 'diameter': diameter, 'depth': hd}
+        for hx, hy, hz, hd in zip(x, y, zs, ds)
+    ]
 
 
 class XilogGenerator:
     """Generatore codice Xilog Plus"""
     
-    def __init__(self, tlg_library=None):
+    def __init__(self, tlg_library=None, optimize_path: bool = False,
+                 path_metric: str = 'euclidean',
+                 max_path_evaluations: int = DEFAULT_MAX_EVALUATIONS,
+                 spindle_map: Optional[SpindleMap] = None,
+                 modal: bool = False, subprograms: bool = False,
+                 subprogram_syntax: SubprogramSyntax = SubprogramSyntax(),
+                 sink=None):
         """
         Inizializza generatore
         
         Args:
             tlg_library: Istanza TLGLibrary per selezione utensili
+            optimize_path: Se True riordina i fori di ogni gruppo per
+                ridurre il percorso in rapido (vedi path_optimizer)
+            path_metric: 'euclidean' o 'chebyshev' (assi indipendenti)
+            max_path_evaluations: Limite mosse valutate per gruppo
+            spindle_map: Mappa testa a forare; se presente i fori F=1
+                allineati a passo 32 mm vanno in affondate multi-mandrino
+            modal: Se True generate() toglie parole e righe ridondanti
+                (vedi modal_output)
+            subprograms: Se True generate() scrive una volta sola i blocchi
+                di fori ripetuti, come sottoprogrammi (vedi subprograms)
+            subprogram_syntax: Parole SUB / ENDSUB / CALL del controllo
+            sink: Stream su cui scrivere subito ogni riga (es. file aperto
+                con program_sink.atomic_write); il programma non resta in
+                memoria e generate() non è disponibile
         """
+        if sink is not None and subprograms:
+            raise ValueError('I sottoprogrammi richiedono il programma intero: niente sink')
         self.tlg_library = tlg_library
-        self.program_lines = []
+        if sink is not None:
+            self.program_lines = ProgramSink(sink, ModalCompressor() if modal else None)
+        else:
+            self.program_lines = []
         self.current_face = 1
+        self.origin = (0.0, 0.0)
+        self.optimize_path = optimize_path
+        self.path_metric = path_metric
+        self.max_path_evaluations = max_path_evaluations
+        self.head_position = (0.0, 0.0)
+        self.path_stats = []
+        self.spindle_map = spindle_map
+        self.plunge_stats = []
+        self.modal = modal
+        self.subprograms = subprograms
+        self.subprogram_syntax = subprogram_syntax
+        
+    def set_origin(self, x: float, y: float):
+        """
+        Imposta l'origine del pezzo sul piano di lavoro
+        
+        Le coordinate di forature, fresature e scanalature successive sono
+        relative al pezzo e vengono traslate di (x, y). Serve per lavorare
+        più pezzi nello stesso ciclo macchina.
+        
+        Args:
+            x, y: Posizione dell'angolo pezzo sul campo di lavoro (mm)
+        """
+        self.origin = (x, y)
+    
+    def _at(self, x: float, y: float) -> Tuple[float, float]:
+        """Coordinate pezzo -> coordinate campo di lavoro"""
+        ox, oy = self.origin
+        if ox or oy:
+            return x + ox, y + oy
+        return x, y
         
     def add_header(self, part_name: str, dimensions: Tuple[float, float, float]):
         """
@@ -72,7 +234,8 @@ class XilogGenerator:
             ])
             self.current_face = face
     
-    def add_drilling(self, holes: List[Dict[str, Any]], face: int = 1, optimized: bool = True):
+    def add_drilling(self, holes: List[Dict[str, Any]], face: int = 1, optimized: bool = True,
+                     optimize_path: Optional[bool] = None):
         """
         Aggiunge operazioni di foratura
         
@@ -80,9 +243,13 @@ class XilogGenerator:
             holes: Lista di dict con 'x', 'y', 'z', 'diameter', 'depth'
             face: Faccia di lavoro
             optimized: Se True usa XBO (ottimizzato), altrimenti XB
+            optimize_path: Riordina i fori di ogni diametro per percorso
+                minimo; None = impostazione del generatore
         """
         if not holes:
             return
+        if optimize_path is None:
+            optimize_path = self.optimize_path
         
         self.add_face_change(face)
         
@@ -105,27 +272,187 @@ class XilogGenerator:
                 '',
             ])
             
-            if optimized:
+            if optimized and face == 1 and self.spindle_map is not None:
+                self._add_plunges(hole_group, diameter, optimize_path)
+            elif optimized:
+                hole_group = self._order_group(hole_group, diameter, face, optimize_path)
                 # XBO - Foratura ottimizzata
                 self.program_lines.append(f'XBO ; Foratura ottimizzata Ø{diameter}')
-                for hole in hole_group:
-                    x, y, z = hole['x'], hole['y'], hole.get('z', 0)
-                    depth = hole['depth']
-                    self.program_lines.append(
-                        f'  X={x:.2f} Y={y:.2f} Z={z:.2f} P={depth:.2f}'
-                    )
+                self.program_lines.extend(_hole_lines('  ', '', self._hole_columns(hole_group)))
                 self.program_lines.append('XBOE ; Fine foratura ottimizzata')
             else:
+                hole_group = self._order_group(hole_group, diameter, face, optimize_path)
                 # XB - Foratura singola
-                for hole in hole_group:
-                    x, y, z = hole['x'], hole['y'], hole.get('z', 0)
-                    depth = hole['depth']
-                    self.program_lines.append(
-                        f'XB X={x:.2f} Y={y:.2f} Z={z:.2f} P={depth:.2f} ; Foro singolo'
-                    )
+                self.program_lines.extend(
+                    _hole_lines('XB ', ' ; Foro singolo', self._hole_columns(hole_group))
+                )
             
             self.program_lines.append('')
     
+    def _hole_columns(self, holes: List[Dict[str, Any]]) -> Tuple[List[Any], ...]:
+        """Colonne x, y (già traslate dell'origine), z, profondità"""
+        xs = [h['x'] for h in holes]
+        ys = [h['y'] for h in holes]
+        ox, oy = self.origin
+        if ox or oy:
+            xs = [x + ox for x in xs]
+            ys = [y + oy for y in ys]
+        return xs, ys, [h.get('z', 0) for h in holes], [h['depth'] for h in holes]
+    
+    def add_drilling_arrays(self, x, y, depth, diameter: float, z=0, face: int = 1,
+                            optimized: bool = True):
+        """
+        Foratura di un gruppo di fori (stesso diametro) da colonne di coordinate
+        
+        Percorso veloce per lavori con molti fori: niente dict per foro,
+        righe formattate in blocco. Testo identico ad add_drilling con gli
+        stessi fori. Con optimize_path o testa a forare (F=1) i fori passano
+        da add_drilling.
+        
+        Args:
+            x, y: Coordinate (array NumPy, array('d'), sequenze o valore
+                unico: un foro, o ripetuto sulla lunghezza dell'altra colonna)
+            depth: Profondità (colonna o valore unico)
+            diameter: Diametro foro
+            z: Quota Z (colonna o valore unico)
+            face: Faccia di lavoro
+            optimized: Se True usa XBO (ottimizzato), altrimenti XB
+        """
+        columns = _hole_arrays(x, y, z, depth)
+        if not columns[0]:
+            return
+        if self.optimize_path or (optimized and face == 1 and self.spindle_map is not None):
+            self.add_drilling(holes_from_arrays(*columns[:2], columns[3], diameter, columns[2]),
+                              face=face, optimized=optimized)
+            return
+        
+        self.add_face_change(face)
+        tool = self._select_tool(diameter, face)
+        self.program_lines.extend([
+            f'; Foratura Ø{diameter} mm (T={tool})',
+            f'T={tool} ; Seleziona utensile',
+            '',
+        ])
+        
+        ox, oy = self.origin
+        if ox or oy:
+            if (np is not None and isinstance(x, np.ndarray) and isinstance(y, np.ndarray)
+                    and x.ndim == 1 and y.ndim == 1):
+                columns[0] = (x + ox).tolist()
+                columns[1] = (y + oy).tolist()
+            else:
+                columns[0] = [v + ox for v in columns[0]]
+                columns[1] = [v + oy for v in columns[1]]
+        self.head_position = (columns[0][-1], columns[1][-1])
+        
+        if optimized:
+            self.program_lines.append(f'XBO ; Foratura ottimizzata Ø{diameter}')
+            self.program_lines.extend(_hole_lines('  ', '', columns))
+            self.program_lines.append('XBOE ; Fine foratura ottimizzata')
+        else:
+            self.program_lines.extend(_hole_lines('XB ', ' ; Foro singolo', columns))
+        self.program_lines.append('')
+    
+    def _order_group(self, items: List[Any], diameter: float, face: int,
+                     optimize_path: bool, point=None) -> List[Any]:
+        """
+        Ordine di lavoro di un gruppo (fori o affondate)
+        
+        Con optimize_path riordina dalla posizione corrente della testa;
+        in ogni caso aggiorna la posizione testa all'ultimo elemento.
+        """
+        point = point or (lambda h: self._at(h['x'], h['y']))
+        if optimize_path:
+            ordered, before, after = optimize_holes(
+                items,
+                start=self.head_position,
+                metric=self.path_metric,
+                max_evaluations=self.max_path_evaluations,
+                key=point,
+            )
+            self.path_stats.append({
+                'faccia': face,
+                'diametro': diameter,
+                'fori': len(items),
+                'percorso_prima': before,
+                'percorso_dopo': after,
+            })
+            self.program_lines.append(
+                f'; Percorso ottimizzato: {before:.1f} -> {after:.1f} mm'
+            )
+            items = ordered
+        self.head_position = point(items[-1])
+        return items
+    
+    def _add_plunges(self, holes: List[Dict[str, Any]], diameter: float,
+                     optimize_path: bool):
+        """Foratura XBO con testa a forare multi-mandrino (F=1)"""
+        # Affondate solo tra fori con stessa profondità e quota Z
+        by_depth = {}
+        for hole in holes:
+            by_depth.setdefault((hole['depth'], hole.get('z', 0)), []).append(hole)
+        plunges = []
+        for same_depth in by_depth.values():
+            plunges.extend(compile_plunges(same_depth, self.spindle_map))
+        
+        self.plunge_stats.append({
+            'diametro': diameter,
+            'fori': len(holes),
+            'affondate': len(plunges),
+        })
+        self.program_lines.append(
+            f'; Testa a forare: {len(holes)} fori in {len(plunges)} affondate'
+        )
+        plunges = self._order_group(
+            plunges, diameter, 1, optimize_path,
+            point=lambda p: self._at(p.holes[0]['x'], p.holes[0]['y']),
+        )
+        
+        self.program_lines.append(f'XBO ; Foratura ottimizzata Ø{diameter}')
+        pitch = self.spindle_map.pitch
+        for plunge in plunges:
+            first = plunge.holes[0]
+            x, y = self._at(first['x'], first['y'])
+            z = first.get('z', 0)
+            depth = first['depth']
+            line = f'  X={x:.2f} Y={y:.2f} Z={z:.2f} P={depth:.2f}'
+            if plunge.axis is not None:
+                spindles = ','.join(str(n) for n in plunge.spindles)
+                line += f' R={len(plunge.holes)} D{plunge.axis}={pitch:.2f} ; Mandrini {spindles}'
+            self.program_lines.append(line)
+        self.program_lines.append('XBOE ; Fine foratura ottimizzata')
+    
+    def boring_report(self) -> Dict[str, int]:
+        """
+        Riepilogo testa a forare
+        
+        Returns:
+            Dict con 'fori' e 'affondate' dei gruppi F=1 compilati
+        """
+        return {
+            'fori': sum(s['fori'] for s in self.plunge_stats),
+            'affondate': sum(s['affondate'] for s in self.plunge_stats),
+        }
+    
+    def travel_report(self) -> Dict[str, float]:
+        """
+        Riepilogo percorso in rapido dei gruppi ottimizzati
+        
+        Returns:
+            Dict con 'gruppi', 'fori', 'percorso_prima', 'percorso_dopo',
+            'risparmio' (mm) e 'risparmio_pct'
+        """
+        before = sum(s['percorso_prima'] for s in self.path_stats)
+        after = sum(s['percorso_dopo'] for s in self.path_stats)
+        return {
+            'gruppi': len(self.path_stats),
+            'fori': sum(s['fori'] for s in self.path_stats),
+            'percorso_prima': before,
+            'percorso_dopo': after,
+            'risparmio': before - after,
+            'risparmio_pct': 100.0 * (before - after) / before if before else 0.0,
+        }
+    
     def add_routing(self, path: List[Tuple[float, float]], depth: float, 
                    tool_diameter: float, face: int = 1):
         """
@@ -153,13 +480,14 @@ class XilogGenerator:
         ])
         
         # Primo punto - ingresso
-        x0, y0 = path[0]
+        x0, y0 = self._at(*path[0])
         self.program_lines.append(f'XG0 X={x0:.2f} Y={y0:.2f} ; Posizionamento')
         self.program_lines.append(f'XG1 Z={depth:.2f} ; Discesa')
         
         # Percorso
-        for x, y in path[1:]:
+        for x, y in (self._at(*p) for p in path[1:]):
             self.program_lines.append(f'XL2P X={x:.2f} Y={y:.2f} ; Linea')
+        self.head_position = self._at(*path[-1])
         
         # Uscita
         self.program_lines.extend([
@@ -180,6 +508,7 @@ class XilogGenerator:
             depth: Profondità
             orientation: 'X' o 'Y'
         """
+        start_x, start_y = self._at(start_x, start_y)
         self.program_lines.extend([
             f'; Scanalatura L={length:.1f} W={width:.1f} P={depth:.1f}',
             f'XG0 X={start_x:.2f} Y={start_y:.2f}',
@@ -257,7 +586,14 @@ class XilogGenerator:
         Returns:
             Stringa con codice Xilog Plus
         """
-        return '\n'.join(self.program_lines)
+        if isinstance(self.program_lines, ProgramSink):
+            raise ValueError('Programma già scritto sul sink')
+        text = '\n'.join(self.program_lines)
+        if self.subprograms:
+            text = extract_subprograms(text, self.subprogram_syntax)
+        if self.modal:
+            return compress_program(text)
+        return text
     
     def _select_tool(self, diameter: float, face: int) -> int:
         """
@@ -309,7 +645,7 @@ class XilogGenerator:
     
     def save_to_file(self, filename: str) -> bool:
         """
-        Salva programma su file
+        Salva programma su file (temporaneo + rename, mai un file a metà)
         
         Args:
             filename: Nome file output
@@ -318,7 +654,7 @@ class XilogGenerator:
             True se successo
         """
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
+            with atomic_write(filename) as f:
                 f.write(self.generate())
             return True
         except Exception as e:
@@ -0,0 +1,222 @@
+"""
+Test ottimizzazione taglio (nesting lastre, schemi sezionatrice, sfridi) da furniture_core.
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+from furniture_core.assembly_spec import iter_panel_specs
+from furniture_core.cutlist import aggregate_cutlist, iter_project_cutlist
+from furniture_core.guillotine import cutting_plan_text, export_cutting_plan_csv, optimize_cutting
+from furniture_core.nesting import Part, SheetSpec, nest_cutlist, nest_parts, parts_from_cutlist
+from furniture_core.remnants import Remnant, RemnantStore
+
+KITCHEN = [{"larghezza": w, "num_ante": 2, "num_ripiani": 2} for w in (40, 60, 60, 80, 90, 120)]
+
+
+def kitchen_cutlist():
+    rows = list(iter_project_cutlist(iter_panel_specs(KITCHEN)))
+    for row in rows:
+        if row["nome"].startswith("Anta"):
+            row["materiale"] = "Rovere"
+            row["venatura"] = "L"
+    return rows
+
+
+def assert_valid_layout(test, layout):
+    sheet = layout.sheet
+    placed = layout.placements
+    for p in placed:
+        test.assertGreaterEqual(p.x, sheet.trim - 1e-9)
+        test.assertGreaterEqual(p.y, sheet.trim - 1e-9)
+        test.assertLessEqual(p.x + p.length, sheet.length - sheet.trim + 1e-9)
+        test.assertLessEqual(p.y + p.width, sheet.width - sheet.trim + 1e-9)
+    for i, a in enumerate(placed):
+        for b in placed[i + 1:]:
+            apart = (
+                a.x + a.length + sheet.kerf <= b.x + 1e-9
+                or b.x + b.length + sheet.kerf <= a.x + 1e-9
+                or a.y + a.width + sheet.kerf <= b.y + 1e-9
+                or b.y + b.width + sheet.kerf <= a.y + 1e-9
+            )
+            test.assertTrue(apart, (a, b))
+
+
+class TestNesting(unittest.TestCase):
+    def test_kitchen_groups_and_yield(self):
+        rows = kitchen_cutlist()
+        results = nest_cutlist(rows, processes=1)
+        self.assertEqual(
+            [(r.materiale, r.spessore) for r in results], [("Legno", 1.8), ("Legno", 0.6), ("Rovere", 1.8)]
+        )
+        placed = sum(len(s.placements) for r in results for s in r.sheets)
+        self.assertEqual(placed, len(rows))
+        for result in results:
+            self.assertEqual(result.unplaced, [])
+            for layout in result.sheets:
+                assert_valid_layout(self, layout)
+                self.assertGreater(layout.yield_ratio, 0.0)
+                self.assertLessEqual(layout.yield_ratio, 1.0)
+        report = results[0].report()
+        self.assertEqual(report[0]["lastra"], 1)
+        self.assertIn("resa_pct", report[0])
+
+    def test_grain_locks_rotation(self):
+        doors = nest_cutlist(kitchen_cutlist(), processes=1)[2]
+        self.assertTrue(all(not p.rotated for s in doors.sheets for p in s.placements))
+        # Pezzo che entra solo ruotato: con venatura resta fuori
+        sheet = SheetSpec(1000.0, 500.0, kerf=0.0, trim=0.0)
+        layouts, unplaced = nest_parts([Part("Lungo", 400.0, 900.0, rotatable=False)], sheet)
+        self.assertEqual((layouts, len(unplaced)), ([], 1))
+        layouts, _ = nest_parts([Part("Lungo", 400.0, 900.0)], sheet)
+        self.assertTrue(layouts[0].placements[0].rotated)
+
+    def test_aggregated_rows_expand_quantities(self):
+        rows = aggregate_cutlist(kitchen_cutlist())
+        parts = parts_from_cutlist(rows)
+        self.assertEqual(len(parts), sum(r["quantita"] for r in rows))
+
+    def test_exact_fill_and_process_pool(self):
+        sheet = SheetSpec(1000.0, 1000.0, kerf=0.0, trim=0.0)
+        layouts, _ = nest_parts([Part("Q", 500.0, 500.0)] * 8, sheet)
+        self.assertEqual(len(layouts), 2)
+        self.assertAlmostEqual(layouts[0].yield_ratio, 1.0)
+        rows = kitchen_cutlist()
+        sequential = nest_cutlist(rows, processes=1)
+        parallel = nest_cutlist(rows, processes=2)
+        self.assertEqual(sequential, parallel)
+
+
+class TestGuillotine(unittest.TestCase):
+    def test_patterns_are_guillotine_and_cover_demand(self):
+        rows = kitchen_cutlist()
+        plans = optimize_cutting(rows)
+        produced = 0
+        for plan in plans:
+            self.assertEqual(plan.unplaced, [])
+            for pattern in plan.patterns:
+                usable_l, usable_w = pattern.sheet.usable()
+                kerf = pattern.sheet.kerf
+                self.assertLessEqual(sum(s.width + kerf for s in pattern.strips), usable_w + 1e-9)
+                for strip in pattern.strips:
+                    self.assertLessEqual(sum(p.length + kerf for p in strip.pieces), usable_l + 1e-9)
+                    self.assertTrue(all(p.width <= strip.width for p in strip.pieces))
+                    if plan.materiale == "Rovere":
+                        self.assertFalse(any(p.rotated for p in strip.pieces))
+                produced += pattern.sheets * sum(len(s.pieces) for s in pattern.strips)
+        self.assertEqual(produced, len(rows))
+
+    def test_identical_sheets_are_stacked(self):
+        rows = list(iter_project_cutlist(iter_panel_specs([{"larghezza": 60, "num_ripiani": 2}] * 24)))
+        plan = optimize_cutting(rows, book_height_mm=60.0)[0]
+        self.assertEqual(plan.patterns[0].sheets_per_book, 3)
+        self.assertLess(plan.books, plan.sheets)
+        self.assertLess(len(plan.patterns), plan.sheets)
+        self.assertEqual(plan.saw_cycles, sum(p.books * p.cuts for p in plan.patterns))
+
+    def test_text_and_csv_export(self):
+        plans = optimize_cutting(kitchen_cutlist())
+        text = cutting_plan_text(plans)
+        self.assertIn("PIANO DI TAGLIO — Rovere 18 mm", text)
+        self.assertIn("Striscia 1", text)
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, "piano.csv")
+        export_cutting_plan_csv(plans, path)
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines[0].startswith("Materiale,Spessore (mm),Schema"))
+        pieces = sum(len(s.pieces) for p in plans for pattern in p.patterns for s in pattern.strips)
+        self.assertEqual(len(lines) - 1, pieces)
+
+
+class TestRemnants(unittest.TestCase):
+    def test_find_returns_smallest_fitting_remnant(self):
+        store = RemnantStore()
+        store.add("Truciolare", 18.0, 1200.0, 300.0)
+        small = store.add("Truciolare", 18.0, 700.0, 400.0)
+        tall = store.add("Truciolare", 18.0, 450.0, 700.0)
+        store.add("Truciolare", 18.0, 900.0, 600.0)
+        store.add("Truciolare", 25.0, 700.0, 400.0)
+        self.assertEqual(store.find("Truciolare", 18.0, 650.0, 350.0), (small, False))
+        self.assertEqual(store.find("Truciolare", 18.0, 350.0, 650.0), (small, True))
+        # Venatura: niente rotazione, serve larghezza ≥ 650 sullo sfrido
+        self.assertEqual(store.find("Truciolare", 18.0, 350.0, 650.0, rotatable=False), (tall, False))
+        self.assertIsNone(store.find("Truciolare", 18.0, 1300.0, 100.0))
+        self.assertIsNone(store.find("MDF", 18.0, 10.0, 10.0))
+
+    def test_index_matches_linear_scan(self):
+        rnd = random.Random(3)
+        store = RemnantStore(
+            Remnant(i, "T", 18.0, float(rnd.randint(100, 2800)), float(rnd.randint(100, 2070))) for i in range(1, 600)
+        )
+        live = {r.id: r for r in store}
+        for _ in range(800):
+            if rnd.random() < 0.2:
+                r = store.add("T", 18.0, float(rnd.randint(100, 2800)), float(rnd.randint(100, 2070)))
+                live[r.id] = r
+            elif rnd.random() < 0.2:
+                live.pop(store.remove(rnd.choice(sorted(live))).id)
+            l, w = rnd.randint(50, 2800), rnd.randint(50, 2000)
+            fits = [r for r in live.values() if min(r.length, r.width) >= min(l, w) and max(r.length, r.width) >= max(l, w)]
+            best = min(fits, key=lambda r: (min(r.length, r.width), max(r.length, r.width), r.id), default=None)
+            found = store.find("T", 18.0, l, w)
+            self.assertEqual(found[0] if found else None, best)
+
+    def test_claim_keeps_usable_offcuts(self):
+        store = RemnantStore(min_side_mm=100.0)
+        r = store.add("Truciolare", 18.0, 1000.0, 600.0)
+        claim = store.claim("Truciolare", 18.0, Part("Ripiano", 500.0, 580.0), kerf=4.0)
+        self.assertEqual(claim.remnant, r)
+        self.assertNotIn(r.id, store)
+        # Taglio trasversale a 500: resta 496 x 600; la striscia 500 x 16 è scarto
+        self.assertEqual([(x.length, x.width, x.origine) for x in store], [(496.0, 600.0, "sfrido {}".format(r.id))])
+
+    def test_nesting_claims_remnants_before_sheets(self):
+        rows = kitchen_cutlist()
+        store = RemnantStore()
+        for _ in range(6):
+            store.add("Legno", 18.0, 1000.0, 650.0)
+        before = {(r.materiale, r.spessore): r for r in nest_cutlist(rows, processes=1)}[("Legno", 1.8)]
+        results = nest_cutlist(rows, processes=1, remnants=store)
+        result = {(r.materiale, r.spessore): r for r in results}[("Legno", 1.8)]
+        self.assertGreater(len(result.remnant_claims), 0)
+        placed = sum(len(s.placements) for s in result.sheets)
+        self.assertEqual(placed + len(result.remnant_claims), sum(len(s.placements) for s in before.sheets))
+        for claim in result.remnant_claims:
+            self.assertLessEqual(max(claim.part.length, claim.part.width), 1000.0)
+        self.assertTrue(all(not r.remnant_claims for r in results if r is not result))
+
+    def test_save_and_load_roundtrip(self):
+        store = RemnantStore(min_side_mm=150.0)
+        store.add("Rovere", 18.0, 800.0, 300.0, "lastra 3")
+        store.add("Truciolare", 25.0, 600.0, 600.0)
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, "sfridi.json")
+        store.save(path)
+        loaded = RemnantStore.load(path)
+        self.assertEqual(list(loaded), list(store))
+        self.assertEqual(loaded.min_side_mm, 150.0)
+        self.assertEqual(loaded.add("MDF", 18.0, 200.0, 200.0).id, 3)
+        self.assertEqual(len(RemnantStore.load(os.path.join(tmp, "assente.json"))), 0)
+
+    def test_cutting_plan_lists_remnant_claims(self):
+        store = RemnantStore()
+        store.add("Rovere", 18.0, 2000.0, 1000.0)
+        plans = optimize_cutting(kitchen_cutlist(), remnants=store)
+        rovere = {p.materiale: p for p in plans}["Rovere"]
+        self.assertTrue(rovere.remnant_claims)
+        self.assertIn("DA SFRIDO 1 (Rovere 18 mm", cutting_plan_text(plans))
+
+
+if __name__ == "__main__":
+    unittest.main()
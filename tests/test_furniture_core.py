@@ -2,21 +2,43 @@
 Test unitari furniture_core (senza FreeCAD).
 """
 
+import gzip
+import json
 import os
+import shutil
 import sys
 import tempfile
 import unittest
+import zipfile
+from xml.etree import ElementTree
 
 _REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if _REPO_ROOT not in sys.path:
     sys.path.insert(0, _REPO_ROOT)
 
-from furniture_core.models import default_params_for_type, normalize_params
-from furniture_core.validation import validate_cabinet_params
-from furniture_core.parser_nl import parse_description
-from furniture_core.panel_specs import build_panel_specs, _shelf_zone
-from furniture_core.cutlist import export_csv, panels_to_cutlist
-from furniture_core.assembly_spec import build_cabinet_assembly_spec
+from furniture_core.models import CabinetParams, default_params_for_type, normalize_many, normalize_params
+from furniture_core.validation import validate_cabinet_params, validate_many
+import furniture_core.validation as validation
+from furniture_core.parser_nl import iter_project_description, parse_description, parse_many, parse_project_description
+from furniture_core.panel_specs import build_panel_specs, build_panels, _shelf_zone
+from furniture_core.cutlist import (
+    aggregate_cutlist,
+    export_csv,
+    export_csv_stream,
+    export_excel_stream,
+    iter_project_cutlist,
+    panels_to_cutlist,
+)
+from furniture_core.assembly_spec import build_cabinet_assembly_spec, iter_panel_specs, iter_project_modules
+from furniture_core.panel_batch import (
+    batch_cabinet_specs,
+    build_panel_specs_batch,
+    rows_to_columns,
+)
+from furniture_core.panel_table import Panel, PanelTable
+from furniture_core.xlsx_writer import XlsxWriter
+from furniture_core import constants, spec_cache
+from furniture_core.incremental import panel_dependencies, respec
 
 
 class TestFurnitureCore(unittest.TestCase):
@@ -25,6 +47,39 @@ class TestFurnitureCore(unittest.TestCase):
         self.assertEqual(p["profondita"], 35.0)
         self.assertFalse(p["con_zoccolo"])
 
+    def test_defaults_not_shared(self):
+        p = default_params_for_type("Pensile")
+        p["larghezza"] = 1.0
+        self.assertEqual(default_params_for_type("Pensile")["larghezza"], 80.0)
+
+    def test_normalize_coercion(self):
+        p = normalize_params({"larghezza": "60", "num_ripiani": 2.0, "spinatura": 0, "altezza": None, "num_ante": 1})
+        self.assertEqual(p["larghezza"], 60.0)
+        self.assertIsInstance(p["num_ripiani"], int)
+        self.assertIs(p["spinatura"], False)
+        self.assertIsNone(p["altezza"])
+        self.assertEqual(p["num_cerniere"], 2)
+
+    def test_normalize_many(self):
+        rows = [{"larghezza": 60, "num_ante": 2}, {"tipo_mobile": "Pensile", "larghezza": 45, "num_ante": 0}]
+        expected = [normalize_params(r) for r in rows]
+        self.assertEqual(normalize_many(rows), expected)
+        columns = {"tipo_mobile": ["Mobile Base", "Pensile"], "larghezza": [60, 45], "num_ante": [2, 0]}
+        self.assertEqual(normalize_many(columns), expected)
+        with self.assertRaises(ValueError):
+            normalize_many({"larghezza": [60], "altezza": [90, 70]})
+
+    def test_normalize_many_numpy_columns(self):
+        try:
+            import numpy as np
+        except ImportError:
+            self.skipTest("numpy non installato")
+        columns = {"tipo_mobile": ["Mobile Base", "Pensile"], "larghezza": [60, 45], "num_ante": [2, 0]}
+        arrays = {key: np.array(values) for key, values in columns.items()}
+        self.assertEqual(normalize_many(arrays), normalize_many(columns))
+        del arrays["tipo_mobile"]
+        self.assertEqual(normalize_many(arrays)[1], normalize_params({"larghezza": 45, "num_ante": 0}))
+
     def test_validation_ok(self):
         p = normalize_params({"larghezza": 80, "altezza": 90, "profondita": 60})
         self.assertEqual(validate_cabinet_params(p), [])
@@ -45,6 +100,15 @@ class TestFurnitureCore(unittest.TestCase):
         panels = build_panel_specs(p)
         self.assertEqual(len(panels), 8)
 
+    def test_panel_specs_are_dicts(self):
+        panel = build_panel_specs(normalize_params({}))[0]
+        self.assertIn("size_x", panel)
+        self.assertEqual(list(panel), ["name", "size_x", "size_y", "size_z", "pos_x", "pos_y", "pos_z"])
+        self.assertEqual(json.loads(json.dumps(panel))["name"], "Fianco_SX")
+        panel["size_x"] = 1
+        self.assertEqual(build_panel_specs(normalize_params({}))[0]["size_x"], 1.8)
+        self.assertEqual([Panel(**p) for p in build_panel_specs({})], build_panels({}))
+
     def test_fondo_cielo_tra_fianchi(self):
         p = normalize_params({"larghezza": 80, "spessore_pannello": 1.8})
         panels = {x["name"]: x for x in build_panel_specs(p)}
@@ -104,5 +168,461 @@ class TestFurnitureCore(unittest.TestCase):
             os.unlink(path)
 
 
+class TestPanelBatch(unittest.TestCase):
+    ROWS = [
+        {"num_ripiani": 2, "num_ante": 2},
+        {"tipo_mobile": "Pensile", "larghezza": 60, "num_ripiani": 1},
+        {"tipo_mobile": "Armadio", "num_ante": 3, "tipo_schienale": "Incastrato (scanalatura 10mm)"},
+        {"tipo_schienale": "Arretrato custom", "arretramento_schienale": 1.0, "num_ripiani": 4},
+        {"profondita": 0.5, "num_ripiani": 3},  # profondità ripiano <= 0.1 → nessun ripiano
+    ]
+
+    def test_batch_same_geometry_as_scalar(self):
+        batch = build_panel_specs_batch(rows_to_columns(self.ROWS))
+        for i, row in enumerate(self.ROWS):
+            self.assertEqual(batch_cabinet_specs(batch, i), build_panels(row))
+
+    def test_batch_offsets(self):
+        batch = build_panel_specs_batch(rows_to_columns(self.ROWS))
+        self.assertEqual(len(batch["offsets"]), len(self.ROWS) + 1)
+        self.assertEqual(int(batch["offsets"][-1]), len(batch["size_x"]))
+
+    def test_columns_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            build_panel_specs_batch({"larghezza": [60, 80], "altezza": [90]})
+
+
+class TestPanelTable(unittest.TestCase):
+    def test_panel_dict_compat(self):
+        panel = build_panels(normalize_params({}))[0]
+        self.assertIsInstance(panel, Panel)
+        self.assertEqual(panel["name"], "Fianco_SX")
+        self.assertEqual(dict(panel), panel.as_dict())
+        self.assertEqual(panel.get("missing", 1), 1)
+        with self.assertRaises(KeyError):
+            panel["missing"]
+
+    def test_table_roundtrip_and_cut_dims(self):
+        panels = build_panels(normalize_params({"num_ante": 2}))
+        table = PanelTable(panels)
+        self.assertEqual(len(table), len(panels))
+        self.assertEqual(list(table), panels)
+        self.assertEqual(table.as_dicts(), [p.as_dict() for p in panels])
+        for (name, l, w, t), panel in zip(table.iter_cut_dimensions(), panels):
+            self.assertEqual(name, panel.name)
+            self.assertEqual([l, w, t], sorted([panel.size_x, panel.size_y, panel.size_z], reverse=True))
+
+    def test_table_from_batch(self):
+        rows = [{"num_ripiani": 1}, {"tipo_mobile": "Pensile", "num_ante": 2}]
+        table = PanelTable.from_batch(build_panel_specs_batch(rows_to_columns(rows)))
+        self.assertEqual(list(table), build_panels(rows[0]) + build_panels(rows[1]))
+
+    def test_cutlist_from_table_matches_list(self):
+        panels = build_panels(normalize_params({"num_ante": 2}))
+        self.assertEqual(panels_to_cutlist(PanelTable(panels)), panels_to_cutlist(panels))
+        self.assertEqual(panels_to_cutlist([p.as_dict() for p in panels]), panels_to_cutlist(panels))
+
+
+class TestSpecCache(unittest.TestCase):
+    def setUp(self):
+        spec_cache.invalidate_caches()
+
+    def test_fingerprint_order_independent(self):
+        a = spec_cache.params_fingerprint({"larghezza": 60, "num_ante": 2})
+        b = spec_cache.params_fingerprint({"num_ante": 2, "larghezza": 60.0, "tipo_mobile": "Mobile Base"})
+        c = spec_cache.params_fingerprint({"larghezza": 80, "num_ante": 2})
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+    def test_lru_counters(self):
+        cache = spec_cache.LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)  # evict "b" (meno recente)
+        self.assertNotIn("b", cache)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_cached_specs_hit(self):
+        before = spec_cache.cache_stats()["specs"]["hits"]
+        first = spec_cache.cached_panel_specs({"larghezza": 60})
+        second = spec_cache.cached_panel_specs({"larghezza": 60.0})
+        self.assertEqual(first, build_panels({"larghezza": 60}))
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertEqual(spec_cache.cache_stats()["specs"]["hits"], before + 1)
+
+    def test_cached_cutlist_rows_are_copies(self):
+        rows = spec_cache.cached_cutlist({"larghezza": 60})
+        rows[0]["quantita"] = 99
+        self.assertEqual(spec_cache.cached_cutlist({"larghezza": 60})[0]["quantita"], 1)
+
+    def test_invalidate_caches(self):
+        spec_cache.cached_panel_specs({"larghezza": 60})
+        self.assertEqual(spec_cache.cache_stats()["specs"]["size"], 1)
+        spec_cache.invalidate_caches()
+        self.assertEqual(spec_cache.cache_stats()["specs"]["size"], 0)
+
+
+class TestIncremental(unittest.TestCase):
+    BASE = {"larghezza": 80, "num_ripiani": 2, "num_ante": 2}
+
+    def test_respec_matches_full_rebuild(self):
+        deltas = [
+            {"num_ripiani": 4},
+            {"num_ante": 0},
+            {"spessore_anta": 2.2},
+            {"larghezza": 60},
+            {"con_zoccolo": False},
+            {"tipo_schienale": "Incastrato (scanalatura 10mm)"},
+        ]
+        for delta in deltas:
+            diff = respec(self.BASE, delta)
+            self.assertEqual(diff.panels, build_panels({**self.BASE, **delta}), delta)
+
+    def test_num_ante_touches_only_doors(self):
+        old_panels = build_panels(self.BASE)
+        diff = respec(self.BASE, {"num_ante": 3}, old_panels)
+        self.assertEqual(diff.recomputed, ("ante",))
+        self.assertEqual([p.name for p in diff.added], ["Anta_3"])
+        self.assertEqual(len(diff.modified), 2)  # larghezza ante ripartita
+        self.assertFalse(diff.removed)
+        self.assertIs(diff.panels[0], old_panels[0])  # Fianco_SX riutilizzato
+
+    def test_dict_old_panels(self):
+        diff = respec(self.BASE, {"num_ante": 3}, build_panel_specs(self.BASE))
+        self.assertTrue(all(isinstance(p, Panel) for p in diff.panels))
+        self.assertTrue(all(isinstance(old, Panel) for old, _ in diff.modified))
+        self.assertEqual(diff.panels, respec(self.BASE, {"num_ante": 3}).panels)
+
+    def test_num_ripiani_removal(self):
+        diff = respec(self.BASE, {"num_ripiani": 1})
+        self.assertEqual([p.name for p in diff.removed], ["Ripiano_2"])
+        self.assertEqual([new.name for _, new in diff.modified], ["Ripiano_1"])
+
+    def test_no_change(self):
+        self.assertTrue(respec(self.BASE, {"num_ante": 2}).is_empty)
+
+    def test_dependencies(self):
+        deps = panel_dependencies("Fianco_SX")
+        self.assertTrue({"spessore_pannello", "profondita", "altezza"} <= deps)
+        self.assertNotIn("num_ante", deps)
+
+
+class TestProjectStreaming(unittest.TestCase):
+    def test_iter_panel_specs_context(self):
+        project = [
+            {"larghezza": 60},
+            ({"tipo_mobile": "Pensile"}, (60.0, 25.0, 145.0)),
+            {"params": {"num_ante": 2}, "assembly_name": "Modulo_1"},
+        ]
+        items = list(iter_panel_specs(project))
+        names = [m.name for m in {i.module.index: i.module for i in items}.values()]
+        self.assertEqual(names, ["Modulo_1", "Modulo_2", "Modulo_1_2"])
+        pensile = [i for i in items if i.module.index == 1]
+        self.assertEqual(pensile[0].module.position_cm, (60.0, 25.0, 145.0))
+        self.assertEqual([i.panel for i in pensile], build_panels({"tipo_mobile": "Pensile"}))
+
+    def test_module_names_unique(self):
+        project = [
+            {"params": {}, "assembly_name": "Modulo_2"},
+            {"larghezza": 60},
+            {"larghezza": 80},
+            {"params": {}, "assembly_name": "Modulo_2"},
+        ]
+        names = [m.name for m in iter_project_modules(project)]
+        self.assertEqual(names, ["Modulo_2", "Modulo_1", "Modulo_3", "Modulo_2_2"])
+
+    def test_iter_panel_specs_is_lazy(self):
+        def endless():
+            while True:
+                yield {"larghezza": 60}
+
+        stream = iter_panel_specs(endless())
+        first = next(stream)
+        self.assertEqual(first.panel.name, "Fianco_SX")
+
+    def test_project_cutlist(self):
+        rows = list(iter_project_cutlist(iter_panel_specs([{}, {}])))
+        single = panels_to_cutlist(build_panel_specs({}))
+        self.assertEqual(len(rows), 2 * len(single))
+        self.assertEqual(rows[0]["modulo"], "Modulo_1")
+        self.assertEqual(rows[-1]["modulo"], "Modulo_2")
+        self.assertEqual({k: rows[0][k] for k in single[0]}, single[0])
+
+
+class TestCabinetParams(unittest.TestCase):
+    def test_interning_and_hash(self):
+        a = CabinetParams({"larghezza": 60, "num_ante": 2})
+        b = CabinetParams(num_ante=2.0, larghezza=60.0)
+        self.assertIs(a, b)
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual(a, normalize_params({"larghezza": 60, "num_ante": 2}))
+        self.assertEqual({a: 1}[b], 1)
+
+    def test_frozen(self):
+        p = CabinetParams({})
+        with self.assertRaises(TypeError):
+            p["larghezza"] = 10  # type: ignore[index]
+        with self.assertRaises(AttributeError):
+            p.extra = 1  # type: ignore[attr-defined]
+        self.assertFalse(hasattr(p, "__dict__"))
+
+    def test_downstream_accepts_without_renormalizing(self):
+        p = CabinetParams({"num_ripiani": 3, "num_ante": 2})
+        self.assertEqual(build_panel_specs(p), build_panel_specs(p.to_dict()))
+        self.assertEqual(validate_cabinet_params(p), [])
+        self.assertIs(build_cabinet_assembly_spec(p)["params"], p)
+        self.assertEqual(spec_cache.params_fingerprint(p), spec_cache.params_fingerprint(p.to_dict()))
+
+    def test_replace_and_respec(self):
+        p = CabinetParams({"num_ante": 2})
+        self.assertIs(p.replace(num_ante=3), CabinetParams({**p, "num_ante": 3}))
+        diff = respec(p, {"num_ante": 3})
+        self.assertIsInstance(diff.params, CabinetParams)
+        self.assertEqual(diff.recomputed, ("ante",))
+
+    def test_project_modules_share_params(self):
+        items = list(iter_panel_specs([{"larghezza": 60}, {"larghezza": 60.0}]))
+        self.assertIs(items[0].module.params, items[-1].module.params)
+
+
+class TestParser(unittest.TestCase):
+    def test_overlapping_patterns(self):
+        p = parse_description("Pensile l=3 ante, H 70.5 p:35 con 2.5 ripiani e 4cassetti")
+        self.assertEqual(p["tipo_mobile"], "Pensile")
+        self.assertFalse(p["con_zoccolo"])
+        self.assertEqual(p["larghezza"], 3.0)
+        self.assertEqual(p["num_ante"], 3)
+        self.assertEqual(p["num_cerniere"], 6)
+        self.assertEqual(p["altezza"], 70.5)
+        self.assertEqual(p["profondita"], 35.0)
+        self.assertEqual(p["num_ripiani"], 5)
+        self.assertEqual(p["num_cassetti"], 4)
+
+    def test_first_occurrence_and_keywords(self):
+        p = parse_description("armadio alt220 h100 schienale incastrato, anta singola", "Mobile Base")
+        self.assertEqual(p["tipo_mobile"], "Armadio")
+        self.assertEqual(p["altezza"], 220.0)
+        self.assertTrue(p["tipo_schienale"].startswith("Incastrato"))
+        self.assertEqual(parse_description("una anta")["tipo_mobile"], "Anta")
+
+    def test_cache_returns_copies(self):
+        first = parse_description("base L60 2 ante")
+        first["larghezza"] = 1.0
+        self.assertEqual(parse_description("base L60 2 ante")["larghezza"], 60.0)
+
+    def test_parse_many(self):
+        lines = ["base L60 2 ante\n", "\n", "  pensile L90  "]
+        parsed = list(parse_many(iter(lines)))
+        self.assertEqual(len(parsed), 2)
+        self.assertEqual(parsed[0], parse_description("base L60 2 ante"))
+        self.assertEqual(parsed[1]["tipo_mobile"], "Pensile")
+
+
+class TestProjectDescription(unittest.TestCase):
+    ORDER = "cucina 4 moduli base 60 cm con 2 ante, 2 ripiani, 3 pensili 80 cm"
+
+    def test_groups_and_layout(self):
+        modules = parse_project_description(self.ORDER)
+        self.assertEqual(len(modules), 7)
+        bases, walls = modules[:4], modules[4:]
+        self.assertEqual([m["assembly_name"] for m in bases], ["Modulo_1", "Modulo_2", "Modulo_3", "Modulo_4"])
+        self.assertEqual([m["position_cm"][0] for m in bases], [0.0, 60.0, 120.0, 180.0])
+        self.assertEqual(bases[0]["params"]["num_ante"], 2)
+        self.assertEqual(bases[0]["params"]["num_ripiani"], 2)
+        self.assertIs(bases[0]["params"], bases[3]["params"])
+        self.assertEqual([m["assembly_name"] for m in walls], ["Pensile_1", "Pensile_2", "Pensile_3"])
+        self.assertEqual(walls[2]["position_cm"], (160.0, -35.0, constants.WALL_UNIT_BOTTOM_CM))
+        self.assertFalse(walls[0]["params"]["con_zoccolo"])
+
+    def test_quantity_not_read_as_measure(self):
+        modules = parse_project_description("2 cassettiere 45 cm alto 80 cm con 4 cassetti")
+        self.assertEqual(len(modules), 2)
+        self.assertEqual(modules[0]["params"]["num_cassetti"], 4)
+        self.assertEqual(modules[0]["params"]["altezza"], 80.0)
+        self.assertEqual(modules[0]["params"]["larghezza"], 45.0)
+
+    def test_streams_paragraphs_into_project(self):
+        lines = iter([self.ORDER + "\n", "\n", "armadio L120\n"])
+        modules = list(iter_project_description(lines))
+        self.assertEqual(modules[-1]["assembly_name"], "Modulo_5")
+        self.assertEqual(modules[-1]["position_cm"][0], 240.0)
+        names = {item.module.name for item in iter_panel_specs(modules)}
+        self.assertEqual(len(names), 8)
+
+
+class TestCutlistAggregation(unittest.TestCase):
+    def test_project_quantities(self):
+        project = [{"larghezza": 60, "num_ante": 2}] * 3 + [{"larghezza": 80}]
+        rows = list(iter_project_cutlist(iter_panel_specs(project)))
+        grouped = aggregate_cutlist(rows)
+        self.assertEqual(sum(r["quantita"] for r in grouped), len(rows))
+        self.assertAlmostEqual(sum(r["area_m2"] for r in grouped), sum(r["area_m2"] for r in rows), places=6)
+        sides = grouped[0]
+        self.assertEqual(sides["nome"], "Fianco_SX, Fianco_DX")
+        self.assertEqual(sides["quantita"], 8)
+        self.assertIn("Modulo_4/Fianco_DX", sides["pezzi"])
+        doors = [r for r in grouped if r["nome"].startswith("Anta")]
+        self.assertEqual(len(doors), 1)
+        self.assertEqual(doors[0]["quantita"], 6)
+
+    def test_material_and_grain_split_groups(self):
+        rows = panels_to_cutlist(build_panel_specs({"num_ripiani": 2}), "Rovere")
+        rows += panels_to_cutlist(build_panel_specs({"num_ripiani": 2}), "Bianco")
+        rows[0]["venatura"] = "L"
+        grouped = aggregate_cutlist(rows)
+        self.assertEqual(len({(r["materiale"], r["venatura"]) for r in grouped}), 3)
+        self.assertEqual(grouped[0]["quantita"], 1)
+        self.assertEqual(grouped[0]["pezzi"], ["Fianco_SX"])
+
+
+class TestCsvStream(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.panels = build_panel_specs({"num_ripiani": 2, "num_ante": 2})
+
+    def _read(self, name):
+        with open(os.path.join(self.tmp, name), encoding="utf-8") as f:
+            return f.read()
+
+    def test_panels_rows_and_legacy_match(self):
+        export_csv(panels_to_cutlist(self.panels, "Rovere"), os.path.join(self.tmp, "a.csv"))
+        n = export_csv_stream(iter(self.panels), os.path.join(self.tmp, "b.csv"), "Rovere", chunk_rows=3)
+        export_csv_stream(PanelTable(self.panels), os.path.join(self.tmp, "c.csv"), "Rovere")
+        self.assertEqual(n, len(self.panels))
+        self.assertEqual(self._read("a.csv"), self._read("b.csv"))
+        self.assertEqual(self._read("a.csv"), self._read("c.csv"))
+
+    def test_gzip_and_empty(self):
+        path = os.path.join(self.tmp, "lista.csv.gz")
+        rows = (row for row in panels_to_cutlist(self.panels))
+        self.assertEqual(export_csv_stream(rows, path), len(self.panels))
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+            self.assertEqual(f.read(), self._read_plain())
+        self.assertEqual(export_csv_stream([], os.path.join(self.tmp, "vuota.csv")), 0)
+        self.assertTrue(self._read("vuota.csv").startswith("Nome,"))
+
+    def test_failing_source_leaves_no_file(self):
+        def broken():
+            raise RuntimeError("sorgente non disponibile")
+            yield
+
+        path = os.path.join(self.tmp, "rotta.csv")
+        with self.assertRaises(RuntimeError):
+            export_csv_stream(broken(), path)
+        self.assertFalse(os.path.exists(path))
+
+    def _read_plain(self):
+        export_csv(panels_to_cutlist(self.panels), os.path.join(self.tmp, "plain.csv"))
+        with open(os.path.join(self.tmp, "plain.csv"), encoding="utf-8", newline="") as f:
+            return f.read()
+
+
+class TestExcelStream(unittest.TestCase):
+    NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.rows = panels_to_cutlist(build_panel_specs({"num_ante": 2}), "Rovere")
+        self.rows += panels_to_cutlist(build_panel_specs({"spessore_pannello": 2.5}), "Bianco <&>")
+
+    def _sheet_values(self, path, index):
+        with zipfile.ZipFile(path) as zf:
+            root = ElementTree.fromstring(zf.read("xl/worksheets/sheet{}.xml".format(index)))
+        return [
+            [("".join(c.itertext())) for c in row.findall("m:c", self.NS)]
+            for row in root.iter("{%s}row" % self.NS["m"])
+        ]
+
+    def test_stdlib_sheets_per_material_and_summary(self):
+        path = os.path.join(self.tmp, "lista.xlsx")
+        result = export_excel_stream(iter(self.rows), path, engine="stdlib")
+        self.assertEqual(result["righe"], len(self.rows))
+        self.assertEqual(
+            list(result["fogli"]), ["Rovere 1.8", "Rovere 0.6", "Bianco <&> 2.5", "Bianco <&> 0.6"]
+        )
+        with zipfile.ZipFile(path) as zf:
+            workbook = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+        names = [s.get("name") for s in workbook.iter("{%s}sheet" % self.NS["m"])]
+        self.assertEqual(names[0], "Riepilogo")
+        summary = self._sheet_values(path, 1)
+        self.assertEqual(summary[-1][0], "Totale")
+        self.assertEqual(int(summary[-1][3]), len(self.rows))
+        rovere = self._sheet_values(path, 2)
+        self.assertEqual(rovere[1][:2], ["Fianco_SX", "90.0"])
+        self.assertEqual(len(rovere) - 1, result["fogli"]["Rovere 1.8"][0])
+
+    def test_panels_input(self):
+        path = os.path.join(self.tmp, "pannelli.xlsx")
+        result = export_excel_stream(build_panel_specs({}), path, "Noce", engine="stdlib")
+        self.assertIn("Noce 1.8", result["fogli"])
+
+    def test_numpy_and_non_finite_values(self):
+        try:
+            import numpy as np
+        except ImportError:
+            self.skipTest("numpy non installato")
+        path = os.path.join(self.tmp, "numpy.xlsx")
+        with XlsxWriter(path) as book:
+            sheet = book.add_sheet("Valori")
+            book.append(sheet, [np.float64(1.5), np.int64(3), np.float32(0.5), float("nan"), np.inf, 2])
+        with zipfile.ZipFile(path) as zf:
+            xml = zf.read("xl/worksheets/sheet1.xml").decode("utf-8")
+        self.assertIn("<c><v>1.5</v></c><c><v>3</v></c><c><v>0.5</v></c><c/><c/><c><v>2</v></c>", xml)
+
+    def test_openpyxl_write_only(self):
+        try:
+            import openpyxl
+        except ImportError:
+            self.skipTest("openpyxl non installato")
+        path = os.path.join(self.tmp, "openpyxl.xlsx")
+        result = export_excel_stream(self.rows, path, engine="openpyxl")
+        wb = openpyxl.load_workbook(path, read_only=True)
+        self.assertEqual(wb.sheetnames, ["Riepilogo"] + list(result["fogli"]))
+
+
+class TestBatchValidation(unittest.TestCase):
+    ROWS = [
+        {"larghezza": 80, "num_ripiani": 2, "num_ante": 2},
+        {"larghezza": 10, "altezza": 400, "num_ripiani": 12},
+        {"profondita": 0.8, "num_ripiani": 2},
+        {"larghezza": 20, "num_ante": 80, "spessore_pannello": 1.0},
+        {"altezza": 20, "spessore_pannello": 5.0},
+    ]
+
+    def test_range_messages_match_scalar(self):
+        result = validate_many(self.ROWS)
+        self.assertEqual(result.rows, len(self.ROWS))
+        for i, row in enumerate(self.ROWS):
+            expected = validate_cabinet_params(normalize_params(row))
+            got = [m for c, m in zip(result.codes(i), result.messages(i)) if c.endswith("_RANGE")]
+            self.assertEqual(got, expected)
+
+    def test_cross_field_codes(self):
+        result = validate_many(self.ROWS)
+        self.assertEqual(result.codes(0), [])
+        self.assertIn("E_RIPIANO_PROFONDITA", result.codes(2))
+        self.assertIn("E_ANTA_LARGHEZZA", result.codes(3))
+        self.assertIn("E_ALTEZZA_INTERNA", result.codes(4))
+        self.assertEqual(result.by_code()["E_NUM_RIPIANI_RANGE"], [1])
+        self.assertEqual(result.valid_rows(), [0])
+
+    def test_columns_and_fallback_agree(self):
+        columns = {"larghezza": [80, 10, 60], "num_ante": [2, 1, 30]}
+        result = validate_many(columns)
+        original = validation.np
+        validation.np = None
+        try:
+            self.assertEqual(validate_many(columns), result)
+        finally:
+            validation.np = original
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -5,10 +5,20 @@ Test per XilogGenerator
 import unittest
 import sys
 import os
+import io
+import tempfile
+from unittest import mock
+from array import array
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from postprocessor.xilog_generator import XilogGenerator
+from postprocessor.boring_head import Spindle, SpindleMap, compile_plunges
+from postprocessor.modal_output import compress_program, short_number, verify_compression
+from postprocessor.operation_plan import OperationRecorder, count_changes, sequence_operations
+from postprocessor.program_sink import atomic_write
+from postprocessor.subprograms import SubprogramSyntax, expand_subprograms, extract_subprograms
+from postprocessor.path_optimizer import optimize_order, travel_distance
+from postprocessor.xilog_generator import XilogGenerator, holes_from_arrays, np
 from tlg_parser.tlg_library import TLGLibrary
 
 
@@ -45,6 +55,263 @@ class TestXilogGenerator(unittest.TestCase):
         self.assertIn('P=40.00', code)
         self.assertIn('XBOE', code)
     
+    def test_origin_offset(self):
+        """Test traslazione coordinate pezzo sul campo"""
+        self.gen.set_origin(1000, 500)
+        self.gen.add_drilling([{'x': 50, 'y': 50, 'diameter': 8.0, 'depth': 40.0}])
+        self.gen.add_routing([(10, 10), (100, 10)], depth=5.0, tool_diameter=8.0)
+        self.gen.add_groove(0, 20, 300, 4, 8)
+        self.gen.set_origin(0, 0)
+        self.gen.add_drilling([{'x': 50, 'y': 50, 'diameter': 5.0, 'depth': 12.0}])
+        code = self.gen.generate()
+        
+        self.assertIn('X=1050.00 Y=550.00', code)
+        self.assertIn('XG0 X=1010.00 Y=510.00', code)
+        self.assertIn('XL2P X=1100.00 Y=510.00', code)
+        self.assertIn('XL2P X=1300.00 Y=520.00', code)
+        self.assertIn('  X=50.00 Y=50.00 Z=0.00 P=12.00', code)
+    
+    def test_drill_path_optimization(self):
+        """Test riordino fori reggi-ripiano (niente zig-zag tra le file)"""
+        holes = []
+        for y in range(100, 520, 32):
+            holes.append({'x': 32.0, 'y': float(y), 'diameter': 5.0, 'depth': 12.0})
+            holes.append({'x': 868.0, 'y': float(y), 'diameter': 5.0, 'depth': 12.0})
+        
+        plain = XilogGenerator(self.tlg)
+        plain.add_drilling(holes)
+        self.gen.optimize_path = True
+        self.gen.add_drilling(holes)
+        code = self.gen.generate()
+        
+        self.assertIn('; Percorso ottimizzato:', code)
+        coords = [l for l in code.splitlines() if l.startswith('  X=')]
+        self.assertEqual(sorted(coords), sorted(l for l in plain.generate().splitlines() if l.startswith('  X=')))
+        report = self.gen.travel_report()
+        self.assertEqual(report['fori'], len(holes))
+        self.assertGreater(report['risparmio_pct'], 80.0)
+        self.assertNotIn('Percorso', plain.generate())
+        
+        again = XilogGenerator(self.tlg, optimize_path=True)
+        again.add_drilling(holes)
+        self.assertEqual(again.generate(), code)
+    
+    def test_optimize_order_never_worse(self):
+        """Test ottimizzatore: permutazione valida e percorso non peggiore"""
+        import random
+        rnd = random.Random(7)
+        for n in (1, 2, 5, 40):
+            points = [(rnd.uniform(0, 2900), rnd.uniform(0, 1300)) for _ in range(n)]
+            order = optimize_order(points, max_evaluations=5000)
+            self.assertEqual(sorted(order), list(range(n)))
+            self.assertLessEqual(travel_distance([points[i] for i in order]), travel_distance(points) + 1e-9)
+        # Fila di punti in disordine: percorso ottimo = visita in fila
+        points = [(float(x), 0.0) for x in (5, 1, 4, 2, 3)]
+        order = optimize_order(points)
+        self.assertEqual([points[i][0] for i in order], [1.0, 2.0, 3.0, 4.0, 5.0])
+    
+    def test_multi_spindle_plunges(self):
+        """Test fori reggi-ripiano in affondate multi-mandrino"""
+        holes = []
+        for y in range(100, 516, 32):
+            holes.append({'x': 32.0, 'y': float(y), 'diameter': 5.0, 'depth': 12.0})
+            holes.append({'x': 836.0, 'y': float(y), 'diameter': 5.0, 'depth': 12.0})
+        
+        plunges = compile_plunges(holes, SpindleMap(tlg_library=self.tlg))
+        self.assertEqual(len(plunges), 4)
+        self.assertEqual(sorted(id(h) for p in plunges for h in p.holes), sorted(id(h) for h in holes))
+        self.assertEqual(plunges[0].spindles, (1, 13, 14, 15, 16, 17, 18))
+        for p in plunges:
+            ys = [h['y'] for h in p.holes]
+            self.assertEqual(ys, [ys[0] + 32.0 * k for k in range(len(ys))])
+        
+        gen = XilogGenerator(self.tlg, spindle_map=SpindleMap(tlg_library=self.tlg))
+        gen.set_origin(100, 10)
+        gen.add_drilling(holes)
+        code = gen.generate()
+        self.assertIn('  X=132.00 Y=110.00 Z=0.00 P=12.00 R=7 DY=32.00 ; Mandrini 1,13,14,15,16,17,18', code)
+        self.assertEqual(gen.boring_report(), {'fori': 26, 'affondate': 4})
+    
+    def test_operation_sequencing(self):
+        """Test riordino lavorazioni: meno cambi utensile, forature prima delle fresature"""
+        rec = OperationRecorder(self.tlg)
+        for panel in range(3):
+            rec.begin_panel(panel)
+            rec.set_origin(1000.0 * panel, 0.0)
+            rec.add_drilling([{'x': 50, 'y': 50, 'diameter': 8, 'depth': 30}])
+            rec.add_routing([(0, 0), (100, 0)], depth=5, tool_diameter=10)
+            rec.add_drilling([{'x': 80, 'y': 50, 'diameter': 5, 'depth': 12}])
+            rec.add_drilling([{'x': 90, 'y': 50, 'diameter': 8, 'depth': 30}])
+        self.assertEqual(len(rec.operations), 12)
+        self.assertEqual(rec.operations[4].args[0][0]['x'], 1050)
+        
+        for cross_panel in (False, True):
+            planned = sequence_operations(rec.operations, cross_panel=cross_panel)
+            before = count_changes(rec.operations)['cambi_utensile']
+            self.assertLess(count_changes(planned)['cambi_utensile'], before)
+            holes = sorted(h['x'] for op in planned if op.kind == 'drill' for h in op.args[0])
+            self.assertEqual(holes, [50, 80, 90, 1050, 1080, 1090, 2050, 2080, 2090])
+            for panel in range(3):
+                kinds = [op.kind for op in planned if op.panel == panel]
+                self.assertEqual(kinds[-1], 'routing')
+            if not cross_panel:
+                panels = [op.panel for op in planned]
+                self.assertEqual(panels, sorted(panels))
+        self.assertEqual(count_changes(planned)['cambi_utensile'], 3)
+    
+    def test_modal_output(self):
+        """Test uscita modale: parole ridondanti tolte, stessa lavorazione"""
+        gen = XilogGenerator(self.tlg)
+        gen.add_header('Test', (800, 600, 18))
+        gen.add_header('Test_2', (800, 600, 18))
+        gen.add_drilling([{'x': 32, 'y': y, 'diameter': 5, 'depth': 12} for y in (100, 132, 164)])
+        gen.add_drilling([{'x': 64.5, 'y': 100, 'diameter': 5, 'depth': 12}])
+        gen.add_routing([(0, 0), (800, 0), (800, 600)], depth=18.5, tool_diameter=10)
+        gen.add_footer()
+        full = gen.generate()
+        
+        gen.modal = True
+        code = gen.generate()
+        self.assertEqual(code, compress_program(full))
+        self.assertEqual(verify_compression(full, code), [])
+        self.assertLess(len(code), len(full) * 0.8)
+        self.assertEqual(code.count('G90'), 1)
+        self.assertEqual(code.count('\nT=1\n'), 1)
+        self.assertIn('  X=32 Y=100 Z=0 P=12\n  Y=132\n  Y=164\n', code)
+        self.assertIn('  X=64.5 Y=100 Z=0 P=12\n', code)
+        self.assertIn('XL2P X=800\nXL2P Y=600\n', code)
+        self.assertEqual((short_number('-0.00'), short_number('12.50')), ('0', '12.5'))
+        
+        broken = code.replace('  Y=164', '  Y=196')
+        self.assertEqual(len(verify_compression(full, broken)), 1)
+        self.assertTrue(verify_compression(full, code.replace('\nT=1', '\n')))
+    
+    def test_subprograms(self):
+        """Test blocchi di fori ripetuti come sottoprogrammi"""
+        gen = XilogGenerator(self.tlg)
+        for ox in (0, 1000, 2000.5):
+            gen.set_origin(ox, 10)
+            gen.add_dowel_holes([(50, 50), (850, 50)])
+            gen.add_drilling([{'x': 32, 'y': y, 'diameter': 5, 'depth': 12} for y in (100, 132)])
+        gen.set_origin(0, 0)
+        gen.add_drilling([{'x': 10, 'y': 10, 'diameter': 5, 'depth': 12},
+                          {'x': 20, 'y': 10, 'diameter': 5, 'depth': 12}])
+        gen.add_footer()
+        full = gen.generate()
+        
+        code = extract_subprograms(full)
+        self.assertEqual(code.count('\nCALL '), 6)
+        self.assertIn('CALL 1 X=2050.50 Y=60.00', code)
+        self.assertIn('SUB 2\nXBO\n  X=0.00 Y=0.00 Z=0.00 P=12.00\n  X=0.00 Y=32.00 Z=0.00 P=12.00\nXBOE\nENDSUB', code)
+        self.assertLess(code.index('M30'), code.index('SUB 1'))
+        self.assertIn('  X=20.00 Y=10.00', code)  # forma usata una volta: resta in linea
+        self.assertEqual(verify_compression(full, expand_subprograms(code)), [])
+        
+        gen.subprograms = gen.modal = True
+        gen.subprogram_syntax = SubprogramSyntax('%L', 'RET', 'L')
+        code = gen.generate()
+        self.assertIn('L 1 X=2050.5 Y=60', code)
+        self.assertEqual(verify_compression(full, expand_subprograms(code, gen.subprogram_syntax)), [])
+        with self.assertRaises(ValueError):
+            expand_subprograms(code.replace('L 1 X=50', 'L 9 X=50'), gen.subprogram_syntax)
+    
+    def test_stream_sink(self):
+        """Test scrittura in streaming: stesso testo di generate()"""
+        def build(gen):
+            gen.add_header('Test', (800, 600, 18))
+            gen.add_dowel_holes([(50, 50), (750, 50)])
+            gen.add_routing([(0, 0), (800, 0)], depth=5, tool_diameter=10)
+            gen.add_footer()
+        
+        for modal in (False, True):
+            gen = XilogGenerator(self.tlg, modal=modal)
+            build(gen)
+            stream = io.StringIO()
+            streamed = XilogGenerator(self.tlg, modal=modal, sink=stream)
+            build(streamed)
+            self.assertEqual(stream.getvalue(), gen.generate())
+            with self.assertRaises(ValueError):
+                streamed.generate()
+        with self.assertRaises(ValueError):
+            XilogGenerator(self.tlg, subprograms=True, sink=io.StringIO())
+    
+    def test_atomic_write(self):
+        """Test scrittura atomica: un errore lascia il file precedente"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'pezzo.xilog')
+            gen = XilogGenerator(self.tlg)
+            gen.add_footer()
+            self.assertTrue(gen.save_to_file(path))
+            with self.assertRaises(RuntimeError):
+                with atomic_write(path) as f:
+                    f.write('G90')
+                    raise RuntimeError('interrotto')
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(f.read(), gen.generate())
+            self.assertEqual(os.listdir(tmp), ['pezzo.xilog'])
+            # Permessi: file nuovo 0600, file esistente invariati; umask mai toccata
+            os.chmod(path, 0o640)
+            with mock.patch('os.umask', side_effect=AssertionError('umask modificata')):
+                with atomic_write(path) as f:
+                    f.write('G90')
+                with atomic_write(os.path.join(tmp, 'nuovo.xilog')) as f:
+                    f.write('G90')
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o640)
+            self.assertEqual(os.stat(os.path.join(tmp, 'nuovo.xilog')).st_mode & 0o777, 0o600)
+    
+    def test_drilling_arrays(self):
+        """Test foratura da colonne: stesso testo di add_drilling"""
+        xs = [50.0 + 32.0 * (k % 20) for k in range(60)] + [-0.0, 0.0, 12.345]
+        ys = [9.0 + 96.0 * (k // 20) for k in range(60)] + [0.0, -0.0, 7.005]
+        holes = [{'x': x, 'y': y, 'diameter': 5.0, 'depth': 12.0} for x, y in zip(xs, ys)]
+        columns = [(xs, ys)]
+        columns.append((array('d', xs), array('d', ys)))
+        if np is not None:
+            columns.append((np.array(xs), np.array(ys)))
+        for origin in ((0.0, 0.0), (10.0, -5.5)):
+            for optimized in (True, False):
+                expected = XilogGenerator(self.tlg)
+                expected.set_origin(*origin)
+                expected.add_drilling(holes, face=2, optimized=optimized)
+                for x, y in columns:
+                    gen = XilogGenerator(self.tlg)
+                    gen.set_origin(*origin)
+                    gen.add_drilling_arrays(x, y, 12.0, 5.0, face=2, optimized=optimized)
+                    self.assertEqual(gen.generate(), expected.generate())
+                    self.assertEqual(gen.head_position, expected.head_position)
+        with self.assertRaises(ValueError):
+            self.gen.add_drilling_arrays([1.0, 2.0], [1.0], 12.0, 5.0)
+    
+    def test_drilling_arrays_scalars(self):
+        """Test foratura da colonne: x/y scalari valgono un foro o vengono ripetuti"""
+        scalars = [(50, 9.0)]
+        if np is not None:
+            scalars += [(np.int64(50), np.float64(9.0)), (np.array(50.0), np.array(9))]
+        expected = XilogGenerator(self.tlg)
+        expected.set_origin(10.0, 0.0)
+        expected.add_drilling([{'x': 50, 'y': 9.0, 'diameter': 5.0, 'depth': 12.0}])
+        for x, y in scalars:
+            gen = XilogGenerator(self.tlg)
+            gen.set_origin(10.0, 0.0)
+            gen.add_drilling_arrays(x, y, 12.0, 5.0)
+            self.assertEqual(gen.generate(), expected.generate())
+        holes = holes_from_arrays(32.0, [9.0, 41.0], 12.0, 5.0)
+        self.assertEqual([(h['x'], h['y']) for h in holes], [(32.0, 9.0), (32.0, 41.0)])
+    
+    def test_spindle_map_uses_tool_data(self):
+        """Test mappa mandrini: diametro e profondità dagli utensili TLG"""
+        spindles = [Spindle(n, 32.0 * (n - 1), 0.0, 3) for n in range(1, 5)]  # T=3 Ø8
+        spindles.append(Spindle(5, 128.0, 0.0, 7))  # T=7 Ø35: interrompe la catena Ø8
+        head = SpindleMap(spindles, tlg_library=self.tlg)
+        self.assertEqual(head.chain('X', 8.0, 40.0), [1, 2, 3, 4])
+        self.assertEqual(len(head.chain('Y', 8.0, 40.0)), 1)  # nessuna fila lungo Y
+        self.assertEqual(head.chain('X', 8.0, 80.0), [])  # oltre max_depth 70
+        
+        row = [{'x': 50.0 + 32.0 * k, 'y': 9.0, 'diameter': 8.0, 'depth': 30.0} for k in range(6)]
+        plunges = compile_plunges(row + [{'x': 400.0, 'y': 300.0, 'diameter': 8.0, 'depth': 30.0}], head)
+        self.assertEqual([len(p.holes) for p in plunges], [4, 2, 1])
+        self.assertEqual([p.axis for p in plunges], ['X', 'X', None])
+    
     def test_face_change(self):
         """Test cambio faccia"""
         self.gen.add_face_change(2)
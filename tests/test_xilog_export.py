@@ -2,17 +2,31 @@
 Test export Xilog da furniture_core.
 """
 
+import json
 import os
 import sys
 import tempfile
 import unittest
+from unittest import mock
 
 _REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if _REPO_ROOT not in sys.path:
     sys.path.insert(0, _REPO_ROOT)
 
+from furniture_core.bed_layout import BedPart, BedSpec, layout_bed
 from furniture_core.models import normalize_params
-from furniture_core.xilog_export import generate_xilog_for_cabinet, save_xilog_for_cabinet
+from furniture_core.program_export import export_project_programs
+from furniture_core.xilog_export import (
+    generate_xilog_bed_programs,
+    generate_xilog_for_cabinet,
+    generate_xilog_for_project,
+    save_xilog_bed_programs,
+    save_xilog_for_cabinet,
+    save_xilog_for_project,
+    xilog_sequencing_report,
+)
+from postprocessor.modal_output import compress_program, verify_compression
+from postprocessor.subprograms import expand_subprograms
 
 
 class TestXilogExport(unittest.TestCase):
@@ -33,6 +47,170 @@ class TestXilogExport(unittest.TestCase):
         finally:
             os.unlink(path)
 
+    def test_project_program(self):
+        project = [{"num_ante": 1}, {"tipo_mobile": "Pensile"}]
+        code = generate_xilog_for_project(project)
+        self.assertIn("PANNELLO: Modulo_1_Anta_1", code)
+        self.assertIn("PANNELLO: Modulo_2_Fianco_SX", code)
+        self.assertEqual(code.count("M30"), 1)
+
+        with tempfile.NamedTemporaryFile(suffix=".xilog", delete=False) as tmp:
+            path = tmp.name
+        try:
+            self.assertTrue(save_xilog_for_project(iter(project), path))
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), code)
+        finally:
+            os.unlink(path)
+
+
+def _overlap(a, b):
+    ax, ay, al, aw = a
+    bx, by, bl, bw = b
+    return ax < bx + bl and bx < ax + al and ay < by + bw and by < ay + aw
+
+
+class TestBedPrograms(unittest.TestCase):
+    PROJECT = [{"num_ante": 2, "num_ripiani": 2, "spinatura": True, "larghezza": w} for w in (40, 60, 80)]
+
+    def test_layout_respects_field_gaps_and_clamps(self):
+        bed = BedSpec(clamp_zones=((1400.0, 0.0, 150.0, 1300.0),))
+        parts = [BedPart("P{}".format(i), 500.0 + 40 * (i % 5), 300.0 + 30 * (i % 4), 18.0) for i in range(30)]
+        parts.append(BedPart("Fondo_sottile", 500.0, 300.0, 6.0))
+        cycles, oversize = layout_bed(parts, bed)
+        self.assertEqual(oversize, [])
+        self.assertEqual(sum(len(c.placements) for c in cycles), len(parts))
+        for cycle in cycles:
+            self.assertEqual({p.part.thickness for p in cycle.placements}, {cycle.thickness})
+            rects = [(p.x, p.y, p.part.length, p.part.width) for p in cycle.placements]
+            for x, y, l, w in rects:
+                self.assertGreaterEqual(min(x, y), bed.margin)
+                self.assertLessEqual(x + l, bed.length - bed.margin)
+                self.assertLessEqual(y + w, bed.width - bed.margin)
+                self.assertFalse(_overlap((x, y, l, w), (1400.0 - bed.gap, 0.0, 150.0 + 2 * bed.gap, 1300.0)))
+            for i, a in enumerate(rects):
+                for b in rects[i + 1:]:
+                    grown = (a[0] - bed.gap, a[1] - bed.gap, a[2] + 2 * bed.gap, a[3] + 2 * bed.gap)
+                    self.assertFalse(_overlap(grown, b))
+        self.assertEqual(layout_bed([BedPart("Lungo", 3000.0, 400.0, 18.0)])[1][0].label, "Lungo")
+
+    def test_programs_combine_panels_per_cycle(self):
+        programs = generate_xilog_bed_programs(self.PROJECT)
+        code = "\n".join(text for _, text in programs)
+        single = generate_xilog_for_project(self.PROJECT)
+        panels = single.count("; PANNELLO: ")
+        self.assertLessEqual(len(programs) * 2, panels)
+        self.assertEqual(code.count("; PEZZO: "), panels)
+        self.assertEqual(code.count("M30"), len(programs))
+        self.assertEqual(programs[0][0], "ciclo_01_t18")
+        # Le forature della singola anta ricompaiono traslate dell'origine del pezzo
+        for _, text in programs:
+            for line in text.splitlines():
+                if line.startswith("; PEZZO: Modulo_1_Anta_1 "):
+                    x = float(line.split("X=")[1].split()[0])
+                    y = float(line.split("Y=")[1].split()[0])
+                    self.assertIn("  X={:.2f} Y={:.2f} Z=0.00 P=13.00".format(50.0 + x, 150.0 + y), text)
+
+    def test_sequenced_programs_keep_holes(self):
+        plain = generate_xilog_bed_programs(self.PROJECT)
+        planned = generate_xilog_bed_programs(self.PROJECT, sequence=True)
+        self.assertEqual(len(plain), len(planned))
+        for (_, a), (_, b) in zip(plain, planned):
+            holes = lambda text: sorted(l for l in text.splitlines() if l.startswith("  X="))
+            self.assertEqual(holes(a), holes(b))
+            self.assertLessEqual(b.count("\nT="), a.count("\nT="))
+            self.assertIn("; Sequenza lavorazioni: cambi utensile ", b)
+        self.assertLess(sum(t.count("\nT=") for _, t in planned), sum(t.count("\nT=") for _, t in plain))
+
+        params = self.PROJECT[0]
+        report = xilog_sequencing_report(params)
+        self.assertLessEqual(report.after["cambi_utensile"], report.before["cambi_utensile"])
+        code = generate_xilog_for_cabinet(params, sequence=True)
+        self.assertEqual(code.count("; PANNELLO: "), generate_xilog_for_cabinet(params).count("; PANNELLO: "))
+        self.assertIn(report.lines()[0], code)
+
+    def test_modal_programs_match_full_programs(self):
+        full = generate_xilog_for_project(self.PROJECT)
+        modal = generate_xilog_for_project(self.PROJECT, modal=True)
+        self.assertEqual(modal, compress_program(full))
+        self.assertEqual(verify_compression(full, modal), [])
+        self.assertLess(len(modal), len(full) * 0.75)
+        code = generate_xilog_for_cabinet(self.PROJECT[0], modal=True)
+        self.assertEqual(verify_compression(generate_xilog_for_cabinet(self.PROJECT[0]), code), [])
+        for (_, a), (_, b) in zip(generate_xilog_bed_programs(self.PROJECT), generate_xilog_bed_programs(self.PROJECT, modal=True)):
+            self.assertEqual(verify_compression(a, b), [])
+
+    def test_subprograms_for_repeated_patterns(self):
+        full = generate_xilog_for_project(self.PROJECT * 4)
+        code = generate_xilog_for_project(self.PROJECT * 4, modal=True, subprograms=True)
+        self.assertEqual(verify_compression(full, expand_subprograms(code)), [])
+        lines = lambda text: [l for l in text.splitlines() if l.strip() and not l.startswith(";")]
+        self.assertLess(len(lines(code)) * 4, len(lines(full)))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "progetto.xilog")
+            self.assertTrue(save_xilog_for_project(self.PROJECT * 4, path, modal=True, subprograms=True))
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), code)
+
+    def test_save_project_streams_same_program(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "progetto.xilog")
+            for modal in (False, True):
+                self.assertTrue(save_xilog_for_project(self.PROJECT, path, modal=modal))
+                with open(path, encoding="utf-8") as f:
+                    self.assertEqual(f.read(), generate_xilog_for_project(self.PROJECT, modal=modal))
+            self.assertEqual(os.listdir(tmp), ["progetto.xilog"])
+
+    def test_save_bed_programs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = save_xilog_bed_programs(self.PROJECT, os.path.join(tmp, "cicli"))
+            self.assertEqual([os.path.basename(p) for p in paths][:1], ["ciclo_01_t18.xilog"])
+            with open(paths[-1], encoding="utf-8") as f:
+                self.assertIn("M30", f.read())
+
+
+class TestProjectExport(unittest.TestCase):
+    PROJECT = TestBedPrograms.PROJECT
+
+    def test_panel_programs_parallel_match_sequential(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sequential = export_project_programs(self.PROJECT, os.path.join(tmp, "seq"), processes=1)
+            parallel = export_project_programs(self.PROJECT, os.path.join(tmp, "par"), processes=2)
+            single = generate_xilog_for_project(self.PROJECT)
+            self.assertEqual(len(sequential), single.count("; PANNELLO: "))
+            self.assertEqual(sequential[0].programma, "0001_Modulo_1_Fianco_SX")
+            for a, b in zip(sequential, parallel):
+                self.assertEqual(a._replace(path=""), b._replace(path=""))
+                with open(a.path, encoding="utf-8") as fa, open(b.path, encoding="utf-8") as fb:
+                    text = fa.read()
+                    self.assertEqual(text, fb.read())
+                self.assertEqual(text.count("; PANNELLO: "), 1)
+                self.assertIn("M30", text)
+            with open(os.path.join(tmp, "par", "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+            self.assertEqual(manifest["modo"], "pannello")
+            self.assertEqual([p["file"] for p in manifest["programmi"]], [os.path.basename(p.path) for p in sequential])
+
+    def test_freecad_runs_sequentially(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.dict(sys.modules, {"FreeCAD": mock.MagicMock()}), \
+                mock.patch("furniture_core.program_export.ProcessPoolExecutor",
+                           side_effect=AssertionError("pool avviato dentro FreeCAD")):
+            programs = export_project_programs(self.PROJECT, tmp, processes=2)
+        self.assertTrue(programs)
+
+    def test_cycle_programs_match_bed_programs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            programs = export_project_programs(self.PROJECT, tmp, modo="ciclo", modal=True, processes=1)
+            expected = generate_xilog_bed_programs(self.PROJECT, modal=True)
+            self.assertEqual([p.programma for p in programs], [name for name, _ in expected])
+            for program, (_, text) in zip(programs, expected):
+                with open(program.path, encoding="utf-8") as f:
+                    self.assertEqual(f.read(), text)
+            self.assertEqual(sum(len(p.pezzi) for p in programs), generate_xilog_for_project(self.PROJECT).count("; PANNELLO: "))
+            with self.assertRaises(ValueError):
+                export_project_programs(self.PROJECT, tmp, modo="mobile")
+
 
 if __name__ == "__main__":
     unittest.main()